@@ -0,0 +1,65 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+from django.db import migrations
+
+
+UNKNOWN = 'Unknown'
+
+
+def _normalize(value):
+    return ' '.join((value or '').split()) or UNKNOWN
+
+
+def _build_dimension(model, values):
+    """
+    Deduplicate free-text values case-insensitively and return a
+    {normalized_lower: dimension_id} map. The first spelling seen wins.
+    """
+    by_key = {}
+    for value in values:
+        name = _normalize(value)
+        by_key.setdefault(name.lower(), name)
+    model.objects.bulk_create([model(name=name) for name in by_key.values()])
+    return {
+        row.name.lower(): row.id
+        for row in model.objects.all()
+    }
+
+
+def forwards(apps, schema_editor):
+    Equipment = apps.get_model('equipment', 'Equipment')
+    Department = apps.get_model('equipment', 'Department')
+    Location = apps.get_model('equipment', 'Location')
+
+    rows = list(Equipment.objects.values_list('id', 'department', 'location'))
+    department_ids = _build_dimension(Department, (r[1] for r in rows))
+    location_ids = _build_dimension(Location, (r[2] for r in rows))
+
+    updates = [
+        Equipment(
+            id=pk,
+            department_ref_id=department_ids[_normalize(department).lower()],
+            location_ref_id=location_ids[_normalize(location).lower()],
+        )
+        for pk, department, location in rows
+    ]
+    Equipment.objects.bulk_update(updates, ['department_ref', 'location_ref'], batch_size=500)
+
+
+def backwards(apps, schema_editor):
+    Equipment = apps.get_model('equipment', 'Equipment')
+    for eq in Equipment.objects.select_related('department_ref', 'location_ref'):
+        eq.department = eq.department_ref.name if eq.department_ref else ''
+        eq.location = eq.location_ref.name if eq.location_ref else ''
+        eq.save(update_fields=['department', 'location'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0003_department_location'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0004_populate_department_location'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='equipment',
+            name='department',
+        ),
+        migrations.RemoveField(
+            model_name='equipment',
+            name='location',
+        ),
+        migrations.RenameField(
+            model_name='equipment',
+            old_name='department_ref',
+            new_name='department',
+        ),
+        migrations.RenameField(
+            model_name='equipment',
+            old_name='location_ref',
+            new_name='location',
+        ),
+        migrations.AlterField(
+            model_name='equipment',
+            name='department',
+            field=models.ForeignKey(help_text='Department responsible for this equipment', on_delete=django.db.models.deletion.PROTECT, related_name='equipment', to='equipment.department'),
+        ),
+        migrations.AlterField(
+            model_name='equipment',
+            name='location',
+            field=models.ForeignKey(help_text="Physical location within facility (e.g., 'Building A, Floor 2, Section 3')", on_delete=django.db.models.deletion.PROTECT, related_name='equipment', to='equipment.location'),
+        ),
+    ]
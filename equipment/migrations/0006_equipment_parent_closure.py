@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-19 10:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0005_equipment_department_location_fk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='Parent asset (e.g., the production line this machine belongs to)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='children', to='equipment.equipment'),
+        ),
+        migrations.CreateModel(
+            name='EquipmentClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='equipment.equipment')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='equipment.equipment')),
+            ],
+            options={
+                'verbose_name': 'Equipment Closure',
+                'verbose_name_plural': 'Equipment Closure',
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='equipment_e_descend_4ac8ea_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='equipment_closure_unique_pair')],
+            },
+        ),
+    ]
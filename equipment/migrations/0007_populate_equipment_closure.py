@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-19 10:15
+
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    Equipment = apps.get_model('equipment', 'Equipment')
+    EquipmentClosure = apps.get_model('equipment', 'EquipmentClosure')
+
+    parents = dict(Equipment.objects.values_list('id', 'parent_id'))
+    rows = []
+    for node_id in parents:
+        ancestor_id, depth = node_id, 0
+        while ancestor_id is not None:
+            rows.append(EquipmentClosure(
+                ancestor_id=ancestor_id, descendant_id=node_id, depth=depth
+            ))
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    EquipmentClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+def backwards(apps, schema_editor):
+    apps.get_model('equipment', 'EquipmentClosure').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0006_equipment_parent_closure'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -1,8 +1,101 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from gearguard import metrics
 from teams.models import MaintenanceTeam
 
 
+def normalize_dimension_name(value):
+    """
+    Collapse whitespace so 'Building A,  Floor 2 ' and 'Building A, Floor 2'
+    resolve to the same dimension row.
+    """
+    return ' '.join((value or '').split())
+
+
+class DimensionModel(models.Model):
+    """
+    Small lookup table (Department, Location) referenced by integer key.
+
+    The full table is tiny, so dropdowns and report labels are served from a
+    cached list instead of a DISTINCT scan over Equipment.
+    """
+    name = models.CharField(max_length=200, unique=True)
+
+    CACHE_TIMEOUT = 300
+
+    class Meta:
+        abstract = True
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def cache_key(cls):
+        return f"dimension:{cls._meta.label_lower}:choices"
+
+    @classmethod
+    def cached_choices(cls):
+        """
+        Return [{'id': int, 'name': str}, ...] ordered by name.
+        Used for filter dropdowns and id -> label lookups in reports.
+        """
+        choices = cache.get(cls.cache_key())
+        metrics.cache_result(f'dimension:{cls._meta.model_name}', hit=choices is not None)
+        if choices is None:
+            choices = list(cls.objects.order_by('name').values('id', 'name'))
+            cache.set(cls.cache_key(), choices, cls.CACHE_TIMEOUT)
+        return choices
+
+    @classmethod
+    def cached_names(cls):
+        """Return {id: name} built from the cached choices."""
+        return {c['id']: c['name'] for c in cls.cached_choices()}
+
+    @classmethod
+    def invalidate_cache(cls):
+        cache.delete(cls.cache_key())
+
+    @classmethod
+    def get_for_name(cls, name):
+        """
+        Get or create the dimension row for a free-text name.
+        Matching is whitespace- and case-insensitive.
+        """
+        name = normalize_dimension_name(name)
+        existing = cls.objects.filter(name__iexact=name).first()
+        if existing:
+            return existing
+        return cls.objects.create(name=name)
+
+    def save(self, *args, **kwargs):
+        self.name = normalize_dimension_name(self.name)
+        super().save(*args, **kwargs)
+        type(self).invalidate_cache()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        type(self).invalidate_cache()
+        return result
+
+
+class Department(DimensionModel):
+    """Organizational department that owns equipment."""
+
+    class Meta(DimensionModel.Meta):
+        verbose_name = "Department"
+        verbose_name_plural = "Departments"
+
+
+class Location(DimensionModel):
+    """Physical location within the facility."""
+
+    class Meta(DimensionModel.Meta):
+        verbose_name = "Location"
+        verbose_name_plural = "Locations"
+
+
 class Equipment(models.Model):
     """
     Represents a company asset requiring maintenance tracking.
@@ -16,12 +109,24 @@ class Equipment(models.Model):
         unique=True,
         help_text="Unique manufacturer serial number"
     )
-    department = models.CharField(
-        max_length=100,
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='children',
+        help_text="Parent asset (e.g., the production line this machine belongs to)"
+    )
+    department = models.ForeignKey(
+        Department,
+        on_delete=models.PROTECT,
+        related_name='equipment',
         help_text="Department responsible for this equipment"
     )
-    location = models.CharField(
-        max_length=200,
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.PROTECT,
+        related_name='equipment',
         help_text="Physical location within facility (e.g., 'Building A, Floor 2, Section 3')"
     )
     assigned_employee = models.ForeignKey(
@@ -76,6 +181,37 @@ class Equipment(models.Model):
         status = "[SCRAPPED]" if self.is_scrapped else ""
         return f"{self.name} (SN: {self.serial_number}) {status}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored parent so save() can detect re-parenting
+        instance._loaded_parent_id = instance.__dict__.get('parent_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Keep the closure table in sync with the parent relationship.
+        """
+        from equipment import tree
+
+        update_fields = kwargs.get('update_fields')
+        is_new = self._state.adding
+        parent_changed = (
+            not is_new
+            and (update_fields is None or 'parent' in update_fields)
+            and getattr(self, '_loaded_parent_id', self.parent_id) != self.parent_id
+        )
+        if is_new or parent_changed:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                if is_new:
+                    tree.insert_node(self)
+                else:
+                    tree.move_subtrees([self.pk], self.parent_id)
+        else:
+            super().save(*args, **kwargs)
+        self._loaded_parent_id = self.parent_id
+
     @property
     def is_under_warranty(self):
         """Check if equipment is still under warranty."""
@@ -92,6 +228,13 @@ class Equipment(models.Model):
             status__in=['New', 'In Progress']
         ).count()
 
+    def get_subtree_open_request_count(self):
+        """
+        Return count of open requests on this asset and everything below it.
+        """
+        from equipment import tree
+        return tree.subtree_request_count(self, statuses=['New', 'In Progress'])
+
     def mark_scrapped(self):
         """
         Mark equipment as scrapped (irreversible).
@@ -99,4 +242,41 @@ class Equipment(models.Model):
         """
         if not self.is_scrapped:
             self.is_scrapped = True
-            self.save(update_fields=['is_scrapped', 'updated_at'])
\ No newline at end of file
+            self.save(update_fields=['is_scrapped', 'updated_at'])
+
+
+class EquipmentClosure(models.Model):
+    """
+    Closure table for the Equipment hierarchy.
+
+    Holds one row per (ancestor, descendant) pair including the self pair at
+    depth 0, so "everything under Line 3" is a single indexed join on
+    ancestor_id. Maintained by equipment.tree; never edit rows by hand.
+    """
+    ancestor = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='descendant_links'
+    )
+    descendant = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='ancestor_links'
+    )
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name = "Equipment Closure"
+        verbose_name_plural = "Equipment Closure"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ancestor', 'descendant'],
+                name='equipment_closure_unique_pair'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth']),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
@@ -1,3 +1,243 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.template.loader import render_to_string
+from django.test import TestCase, TransactionTestCase
+
+from maintenance.models import MaintenanceRequest
+from . import tree
+from .models import Department, Equipment, EquipmentClosure, Location
+
+
+def _closure():
+    return set(EquipmentClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+
+class ClosureTableTests(TestCase):
+    """
+    The closure table stays in sync with Equipment.parent through
+    Equipment.save(), insert_node() and move_subtrees(), and always matches
+    what rebuild_closure() derives from scratch.
+    """
+
+    def setUp(self):
+        self.department = Department.get_for_name('Production')
+        self.location = Location.get_for_name('Hall 1')
+        # line -> cell -> press -> die
+        #      -> robot
+        # spare
+        self.line = self._make('Line')
+        self.cell = self._make('Cell', self.line)
+        self.press = self._make('Press', self.cell)
+        self.die = self._make('Die', self.press)
+        self.robot = self._make('Robot', self.line)
+        self.spare = self._make('Spare')
+
+    def _make(self, name, parent=None):
+        return Equipment.objects.create(
+            name=name, serial_number=f'SN-{name}', parent=parent,
+            department=self.department, location=self.location,
+            purchase_date=datetime.date(2024, 1, 1),
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = _closure()
+        tree.rebuild_closure()
+        self.assertEqual(incremental, _closure())
+
+    def assertSubtree(self, root, nodes):
+        self.assertEqual(set(tree.subtree(root)), set(nodes))
+
+    def test_insert_links_every_ancestor(self):
+        self.assertEqual(
+            {(a, d) for a, d, _ in _closure() if d == self.die.pk},
+            {(self.die.pk, self.die.pk), (self.press.pk, self.die.pk),
+             (self.cell.pk, self.die.pk), (self.line.pk, self.die.pk)},
+        )
+        self.assertEqual(tree.ancestors(self.die), [self.line, self.cell, self.press])
+        self.assertSubtree(self.line, [self.line, self.cell, self.press, self.die, self.robot])
+        self.assertMatchesRebuild()
+
+    def test_move_subtree(self):
+        tree.move_subtrees([self.cell], self.spare)
+        self.assertSubtree(self.spare, [self.spare, self.cell, self.press, self.die])
+        self.assertSubtree(self.line, [self.line, self.robot])
+        self.assertEqual(tree.ancestors(self.die), [self.spare, self.cell, self.press])
+        self.cell.refresh_from_db()
+        self.assertEqual(self.cell.parent, self.spare)
+        self.assertMatchesRebuild()
+
+    def test_move_to_root(self):
+        tree.move_subtrees([self.press], None)
+        self.assertEqual(tree.ancestors(self.die), [self.press])
+        self.assertSubtree(self.line, [self.line, self.cell, self.robot])
+        self.assertMatchesRebuild()
+
+    def test_move_node_together_with_its_descendant(self):
+        tree.move_subtrees([self.cell, self.die], self.spare)
+        # Both become direct children of spare; press stays under cell
+        self.assertEqual(tree.ancestors(self.die), [self.spare])
+        self.assertEqual(tree.ancestors(self.press), [self.spare, self.cell])
+        self.assertSubtree(self.cell, [self.cell, self.press])
+        self.assertMatchesRebuild()
+
+    def test_rejects_cycles(self):
+        before = _closure()
+        for target in (self.cell, self.press, self.die):
+            with self.subTest(target=target.name):
+                with self.assertRaises(ValidationError):
+                    tree.move_subtrees([self.cell], target)
+        with self.assertRaises(ValidationError):
+            tree.move_subtrees([self.spare, self.line], self.die)
+        self.assertEqual(_closure(), before)
+        self.assertEqual(Equipment.objects.get(pk=self.cell.pk).parent_id, self.line.pk)
+
+    def test_save_reparents(self):
+        press = Equipment.objects.get(pk=self.press.pk)
+        press.parent = self.robot
+        press.save()
+        self.assertEqual(tree.ancestors(self.die), [self.line, self.robot, self.press])
+        self.assertSubtree(self.cell, [self.cell])
+        self.assertMatchesRebuild()
+
+        # Saving other fields leaves the closure alone
+        before = _closure()
+        press.name = 'Press 2'
+        press.save()
+        press.save(update_fields=['name'])
+        self.assertEqual(_closure(), before)
+
+    def test_save_rejects_cycle(self):
+        line = Equipment.objects.get(pk=self.line.pk)
+        line.parent = self.die
+        with self.assertRaises(ValidationError):
+            line.save()
+        self.assertIsNone(Equipment.objects.get(pk=self.line.pk).parent_id)
+        self.assertMatchesRebuild()
+
+    def test_rebuild_repairs_missing_rows(self):
+        expected = _closure()
+        EquipmentClosure.objects.filter(descendant=self.die).delete()
+        self.assertEqual(tree.rebuild_closure(), len(expected))
+        self.assertEqual(_closure(), expected)
+
+
+class DimensionTests(TestCase):
+    """Department and Location rows are shared by name and served from a cached list."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_get_for_name_normalizes_and_reuses(self):
+        for model in (Department, Location):
+            with self.subTest(model=model.__name__):
+                row = model.get_for_name('  Building A,   Floor 2 ')
+                self.assertEqual(row.name, 'Building A, Floor 2')
+                self.assertEqual(model.get_for_name('building a, floor 2'), row)
+                self.assertEqual(model.objects.count(), 1)
+
+    def test_choices_are_cached_and_invalidated(self):
+        for model in (Department, Location):
+            with self.subTest(model=model.__name__):
+                b = model.get_for_name('B')
+                a = model.get_for_name('A')
+                self.assertEqual(model.cached_choices(), [{'id': a.pk, 'name': 'A'}, {'id': b.pk, 'name': 'B'}])
+                with self.assertNumQueries(0):
+                    self.assertEqual(model.cached_names(), {a.pk: 'A', b.pk: 'B'})
+
+                # save() and delete() drop the cached list
+                a.name = 'C'
+                a.save()
+                self.assertEqual([c['name'] for c in model.cached_choices()], ['B', 'C'])
+                b.delete()
+                self.assertEqual(model.cached_choices(), [{'id': a.pk, 'name': 'C'}])
+
+
+class DimensionReportFilterTests(TestCase):
+    """The equipment report filters by Department id."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', password='x', is_staff=True)
+        cls.production = Department.get_for_name('Production')
+        cls.packaging = Department.get_for_name('Packaging')
+        location = Location.get_for_name('Hall 1')
+        for department in (cls.production, cls.packaging):
+            equipment = Equipment.objects.create(
+                name=f'{department.name} press', serial_number=f'SN-{department.name}',
+                department=department, location=location, purchase_date=datetime.date(2024, 1, 1),
+            )
+            MaintenanceRequest.objects.create(
+                subject='Leak', request_type='Corrective', equipment=equipment, created_by=cls.manager,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.manager)
+
+    def _names(self, **params):
+        response = self.client.get('/maintenance/reports/equipment-requests/', {'format': 'json', **params})
+        self.assertEqual(response.status_code, 200)
+        return sorted(row['name'] for row in response.json()['data'])
+
+    def test_filters_by_department_id(self):
+        self.assertEqual(self._names(department=self.packaging.pk), ['Packaging press'])
+        self.assertEqual(self._names(), ['Packaging press', 'Production press'])
+        # Names and junk are ignored rather than failing
+        self.assertEqual(self._names(department='Packaging'), ['Packaging press', 'Production press'])
+
+    def test_dropdown_selects_the_filtered_id(self):
+        html = render_to_string('maintenance/report_base.html', {
+            'departments': Department.cached_choices(),
+            'department_filter': self.packaging.pk,
+        })
+        self.assertInHTML(f'<option value="{self.packaging.pk}" selected>Packaging</option>', html)
+        self.assertInHTML(f'<option value="{self.production.pk}">Production</option>', html)
+
+
+class DimensionMigrationTests(TransactionTestCase):
+    """0004 turns free-text department/location values into shared dimension rows."""
+
+    before = [('equipment', '0003_department_location')]
+    after = [('equipment', '0004_populate_department_location')]
+
+    def _migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def test_populates_dimensions_from_free_text(self):
+        self.addCleanup(lambda: self._migrate(MigrationExecutor(connection).loader.graph.leaf_nodes()))
+        apps = self._migrate(self.before)
+        OldEquipment = apps.get_model('equipment', 'Equipment')
+        values = [(' Production ', 'Hall  1'), ('production', 'hall 1'), ('', 'Yard'), ('Packaging', '')]
+        for i, (department, location) in enumerate(values):
+            OldEquipment.objects.create(
+                name=f'E{i}', serial_number=f'SN-{i}', department=department, location=location,
+                purchase_date=datetime.date(2024, 1, 1),
+            )
+
+        apps = self._migrate(self.after)
+        NewEquipment = apps.get_model('equipment', 'Equipment')
+        self.assertEqual(
+            sorted(apps.get_model('equipment', 'Department').objects.values_list('name', flat=True)),
+            ['Packaging', 'Production', 'Unknown'],
+        )
+        self.assertEqual(
+            sorted(apps.get_model('equipment', 'Location').objects.values_list('name', flat=True)),
+            ['Hall 1', 'Unknown', 'Yard'],
+        )
+        rows = {
+            e.name: (e.department_ref.name, e.location_ref.name)
+            for e in NewEquipment.objects.select_related('department_ref', 'location_ref')
+        }
+        self.assertEqual(rows, {
+            'E0': ('Production', 'Hall 1'),
+            'E1': ('Production', 'Hall 1'),
+            'E2': ('Unknown', 'Yard'),
+            'E3': ('Packaging', 'Unknown'),
+        })
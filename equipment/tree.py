@@ -0,0 +1,179 @@
+"""
+Equipment hierarchy backed by a closure table.
+
+Every asset has one EquipmentClosure row per ancestor (including itself at
+depth 0). Subtree reads are then a single join on the
+(ancestor, descendant) unique index instead of a recursive walk:
+
+- subtree(root)                 -> Equipment queryset under root
+- subtree_requests(root)        -> MaintenanceRequest queryset under root
+- subtree_request_count(root)   -> one COUNT query
+- filter_requests_by_subtree()  -> report filter helper
+
+Writes go through insert_node() (called from Equipment.save) and
+move_subtrees(), which re-parents any number of assets in one transaction.
+"""
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Equipment, EquipmentClosure
+
+
+def _pk(obj):
+    """Accept an Equipment instance, a primary key or None."""
+    return getattr(obj, 'pk', obj)
+
+
+# ============================================================================
+# READS
+# ============================================================================
+
+def subtree(root, include_self=True):
+    """Return all equipment under root as a single indexed join."""
+    min_depth = 0 if include_self else 1
+    return Equipment.objects.filter(
+        ancestor_links__ancestor_id=_pk(root),
+        ancestor_links__depth__gte=min_depth,
+    )
+
+
+def ancestors(node, include_self=False):
+    """Return the ancestors of node as a list, root first."""
+    min_depth = 0 if include_self else 1
+    links = EquipmentClosure.objects.filter(
+        descendant_id=_pk(node), depth__gte=min_depth
+    ).select_related('ancestor').order_by('-depth')
+    return [link.ancestor for link in links]
+
+
+def subtree_requests(root, statuses=None):
+    """Return maintenance requests on root and all of its descendants."""
+    from maintenance.models import MaintenanceRequest
+
+    qs = MaintenanceRequest.objects.filter(
+        equipment__ancestor_links__ancestor_id=_pk(root)
+    )
+    if statuses:
+        qs = qs.filter(status__in=statuses)
+    return qs
+
+
+def subtree_request_count(root, statuses=None):
+    """Count requests under root with one query."""
+    return subtree_requests(root, statuses=statuses).count()
+
+
+def filter_requests_by_subtree(qs, root_id):
+    """
+    Restrict a MaintenanceRequest queryset to equipment under root_id.
+    Used by the report filters; silently ignores empty/invalid ids.
+    """
+    try:
+        root_id = int(root_id) if root_id else None
+    except (TypeError, ValueError):
+        root_id = None
+    if not root_id:
+        return qs
+    return qs.filter(equipment__ancestor_links__ancestor_id=root_id)
+
+
+# ============================================================================
+# WRITES
+# ============================================================================
+
+def insert_node(node):
+    """
+    Create closure rows for a freshly saved asset: the self row plus one
+    row per ancestor of its parent.
+    """
+    rows = [EquipmentClosure(ancestor_id=node.pk, descendant_id=node.pk, depth=0)]
+    if node.parent_id:
+        rows.extend(
+            EquipmentClosure(ancestor_id=ancestor_id, descendant_id=node.pk, depth=depth + 1)
+            for ancestor_id, depth in EquipmentClosure.objects.filter(
+                descendant_id=node.parent_id
+            ).values_list('ancestor_id', 'depth')
+        )
+    EquipmentClosure.objects.bulk_create(rows)
+
+
+@transaction.atomic
+def move_subtrees(nodes, new_parent):
+    """
+    Re-parent the given assets (and everything below them) under new_parent.
+
+    Args:
+        nodes: iterable of Equipment instances or ids
+        new_parent: Equipment instance, id, or None to make them roots
+
+    Raises:
+        ValidationError: if new_parent lies inside one of the moved subtrees
+    """
+    node_ids = [_pk(n) for n in nodes]
+    new_parent_id = _pk(new_parent)
+    if not node_ids:
+        return 0
+
+    if new_parent_id and EquipmentClosure.objects.filter(
+        ancestor_id__in=node_ids, descendant_id=new_parent_id
+    ).exists():
+        raise ValidationError(
+            "Cannot move an asset underneath itself or one of its descendants."
+        )
+
+    new_ancestors = []
+    if new_parent_id:
+        new_ancestors = list(
+            EquipmentClosure.objects.filter(
+                descendant_id=new_parent_id
+            ).values_list('ancestor_id', 'depth')
+        )
+
+    for node_id in node_ids:
+        subtree_rows = list(
+            EquipmentClosure.objects.filter(
+                ancestor_id=node_id
+            ).values_list('descendant_id', 'depth')
+        )
+        subtree_ids = [descendant_id for descendant_id, _ in subtree_rows]
+
+        # Detach: drop every link from an outside ancestor into the subtree
+        EquipmentClosure.objects.filter(
+            descendant_id__in=subtree_ids
+        ).exclude(
+            ancestor_id__in=subtree_ids
+        ).delete()
+
+        # Attach: cross product of new ancestors x subtree members
+        EquipmentClosure.objects.bulk_create([
+            EquipmentClosure(
+                ancestor_id=ancestor_id,
+                descendant_id=descendant_id,
+                depth=ancestor_depth + depth + 1,
+            )
+            for ancestor_id, ancestor_depth in new_ancestors
+            for descendant_id, depth in subtree_rows
+        ], batch_size=500)
+
+    return Equipment.objects.filter(pk__in=node_ids).update(parent_id=new_parent_id)
+
+
+@transaction.atomic
+def rebuild_closure():
+    """
+    Rebuild the whole closure table from Equipment.parent.
+    Used by the data migration and as a repair tool.
+    """
+    EquipmentClosure.objects.all().delete()
+    parents = dict(Equipment.objects.values_list('id', 'parent_id'))
+    rows = []
+    for node_id in parents:
+        ancestor_id, depth = node_id, 0
+        while ancestor_id is not None:
+            rows.append(EquipmentClosure(
+                ancestor_id=ancestor_id, descendant_id=node_id, depth=depth
+            ))
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    EquipmentClosure.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -2,10 +2,12 @@ from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
+from gearguard.query_budget import query_budget
 from .models import Equipment
 from maintenance.models import MaintenanceRequest
 
 
+@query_budget(4)
 @login_required
 @require_http_methods(["GET"])
 def equipment_detail(request, equipment_id):
@@ -13,7 +15,13 @@ def equipment_detail(request, equipment_id):
     Display equipment detail page with Smart Button.
     Shows open request count (New + In Progress).
     """
-    equipment = get_object_or_404(Equipment, id=equipment_id)
+    equipment = get_object_or_404(
+        Equipment.objects.select_related(
+            'department', 'location', 'assigned_employee',
+            'default_maintenance_team', 'default_technician',
+        ),
+        id=equipment_id
+    )
     open_count = equipment.get_open_request_count()
     
     context = {
@@ -23,6 +31,7 @@ def equipment_detail(request, equipment_id):
     return render(request, 'equipment/detail.html', context)
 
 
+@query_budget(4)
 @login_required
 @require_http_methods(["GET"])
 def equipment_maintenance_list(request, equipment_id):
@@ -0,0 +1,105 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from equipment.models import Department, Equipment, Location
+from maintenance.models import MaintenanceRequest
+from teams.membership import team_index
+from teams.models import MaintenanceTeam
+
+
+class MaintenanceDashboardTests(TestCase):
+    """Dashboard stats come from one aggregation query per scope."""
+
+    # session + user + stats aggregate + latest requests
+    # (+ membership version and team index load)
+    QUERY_BUDGET = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', password='x', is_staff=True)
+        cls.technician = User.objects.create_user('tech', password='x')
+        cls.requester = User.objects.create_user('requester', password='x')
+        cls.team = MaintenanceTeam.objects.create(name='Mechanical')
+        cls.team.members.add(cls.technician)
+        cls.equipment = Equipment.objects.create(
+            name='Press',
+            serial_number='P-1',
+            department=Department.get_for_name('Production'),
+            location=Location.get_for_name('Hall 1'),
+            purchase_date=date(2024, 1, 1),
+            default_maintenance_team=cls.team,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def _add_requests(self, count):
+        MaintenanceRequest.objects.bulk_create([
+            MaintenanceRequest(
+                subject=f'Request {i}',
+                request_type='Corrective',
+                equipment=self.equipment,
+                assigned_team=self.team,
+                assigned_technician=self.technician,
+                created_by=self.requester,
+                status=['New', 'In Progress', 'Repaired'][i % 3],
+                scheduled_date=date.today() - timedelta(days=1),
+                due_date=date.today() - timedelta(days=1),
+            )
+            for i in range(count)
+        ])
+
+    def _get_dashboard(self, user):
+        cache.clear()
+        team_index.expire()
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('frontend-maintenance-dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_is_constant_per_scope(self):
+        for user in (self.manager, self.technician, self.requester):
+            with self.subTest(user=user.username):
+                self._add_requests(3)
+                _, small = self._get_dashboard(user)
+                self._add_requests(60)
+                _, large = self._get_dashboard(user)
+                self.assertLessEqual(small, self.QUERY_BUDGET)
+                self.assertLessEqual(large, small)
+
+    def test_manager_stats(self):
+        self._add_requests(6)
+        response, _ = self._get_dashboard(self.manager)
+        stats = response.context['stats']
+        self.assertEqual(stats['total_requests'], 6)
+        self.assertEqual(stats['new_requests'], 2)
+        self.assertEqual(stats['in_progress'], 2)
+        self.assertEqual(stats['repaired'], 2)
+        self.assertEqual(stats['overdue'], 4)
+        self.assertEqual(stats['total_equipment'], 1)
+        self.assertEqual(stats['under_maintenance'], 1)
+        self.assertTrue(response.context['is_manager'])
+
+    def test_manager_stats_without_requests(self):
+        response, _ = self._get_dashboard(self.manager)
+        stats = response.context['stats']
+        self.assertEqual(stats['total_requests'], 0)
+        self.assertEqual(stats['total_equipment'], 1)
+
+    def test_stats_are_cached_per_scope(self):
+        self._add_requests(3)
+        self.client.force_login(self.technician)
+        url = reverse('frontend-maintenance-dashboard')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse(any('COUNT(' in q['sql'] for q in queries.captured_queries))
+        self.assertEqual(response.context['stats']['total_requests'], 3)
+        self.assertTrue(response.context['is_technician'])
@@ -1,68 +1,98 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.db.models import Count, Q
-from maintenance.models import MaintenanceRequest
+from maintenance.models import MaintenanceRequest, overdue_q
+from maintenance.workflow import PermissionChecker, UserRole
 from equipment.models import Equipment
 from django.utils import timezone
+from gearguard import metrics
+from gearguard.query_budget import query_budget
 
 
+DASHBOARD_STATS_TIMEOUT = 30  # seconds
+
+
+def _dashboard_scope(user):
+    """
+    Return (role, queryset, cache key) for the dashboard scope of a user.
+
+    - Manager: all requests (one shared cache entry)
+    - Technician: requests assigned to them
+    - User: requests they created
+    """
+    role = PermissionChecker.get_user_role(user)
+    qs = MaintenanceRequest.objects.all()
+    if role == UserRole.MANAGER:
+        return role, qs, 'dashboard:stats:manager'
+    if role == UserRole.TECHNICIAN:
+        return role, qs.filter(assigned_technician=user), f'dashboard:stats:technician:{user.pk}'
+    return role, qs.filter(created_by=user), f'dashboard:stats:user:{user.pk}'
+
+
+def dashboard_stats(role, qs, cache_key):
+    """
+    Compute the stats block for one scope with a single
+    conditional-aggregation query (plus an equipment count for managers),
+    cached briefly per scope.
+    """
+    stats = cache.get(cache_key)
+    metrics.cache_result('dashboard_stats', hit=stats is not None)
+    if stats is not None:
+        return stats
+
+    today = timezone.localdate()
+    aggregates = {
+        'total_requests': Count('id'),
+        'new_requests': Count('id', filter=Q(status='New')),
+        'in_progress': Count('id', filter=Q(status='In Progress')),
+        'repaired': Count('id', filter=Q(status='Repaired')),
+        'overdue': Count('id', filter=overdue_q(today)),
+    }
+    if role == UserRole.MANAGER:
+        aggregates.update({
+            'under_maintenance': Count(
+                'equipment', distinct=True, filter=Q(status='In Progress')
+            ),
+            'preventive_upcoming': Count('id', filter=Q(
+                request_type='Preventive',
+                status='New',
+                scheduled_date__gte=today,
+                scheduled_date__lte=today + timezone.timedelta(days=30),
+            )),
+        })
+
+    stats = qs.order_by().aggregate(**aggregates)
+    if role == UserRole.MANAGER:
+        stats['total_equipment'] = Equipment.objects.count()
+
+    cache.set(cache_key, stats, DASHBOARD_STATS_TIMEOUT)
+    return stats
+
+
+@query_budget(6)
 @login_required(login_url='login')
 def maintenance_dashboard(request):
     """Enhanced maintenance dashboard with user-specific statistics."""
-    user = request.user
-    is_manager = user.groups.filter(name='manager_group').exists()
-    is_technician = user.groups.filter(name='technician_group').exists()
-    
-    # Get all requests with related objects
-    all_requests = MaintenanceRequest.objects.select_related(
-        "equipment", "team", "assigned_technician", "created_by"
+    role, user_requests, cache_key = _dashboard_scope(request.user)
+    is_manager = role == UserRole.MANAGER
+    is_technician = role == UserRole.TECHNICIAN
+
+    stats = dashboard_stats(role, user_requests, cache_key)
+
+    # Latest 20 requests with related objects; the recent list is its head
+    requests = list(
+        user_requests.select_related(
+            'equipment', 'assigned_team', 'assigned_technician', 'created_by'
+        ).order_by('-created_at')[:20]
     )
-    
-    # Filter based on user role
-    if is_technician and not is_manager:
-        # Technician: see only their assigned requests
-        user_requests = all_requests.filter(assigned_technician=user)
-    elif user.is_superuser or is_manager:
-        # Manager: see all requests
-        user_requests = all_requests
-    else:
-        # Regular user: see only requests they created
-        user_requests = all_requests.filter(created_by=user)
-    
-    # Statistics
-    stats = {
-        'total_requests': user_requests.count(),
-        'new_requests': user_requests.filter(status='New').count(),
-        'in_progress': user_requests.filter(status='In Progress').count(),
-        'repaired': user_requests.filter(status='Repaired').count(),
-        'overdue': user_requests.filter(
-            status__in=['New', 'In Progress'],
-            scheduled_date__lt=timezone.now().date()
-        ).count(),
-    }
-    
-    # Get recent requests
-    recent_requests = user_requests.order_by('-created_at')[:5]
-    
-    # Manager-specific stats
-    if is_manager or user.is_superuser:
-        stats['total_equipment'] = Equipment.objects.count()
-        stats['under_maintenance'] = Equipment.objects.filter(
-            maintenancerequest__status='In Progress'
-        ).distinct().count()
-        stats['preventive_upcoming'] = MaintenanceRequest.objects.filter(
-            request_type='Preventive',
-            status='New',
-            scheduled_date__gte=timezone.now().date(),
-            scheduled_date__lte=timezone.now().date() + timezone.timedelta(days=30)
-        ).count()
-    
+
     context = {
-        'requests': user_requests[:20],  # Show latest 20
-        'recent_requests': recent_requests,
+        'requests': requests,
+        'recent_requests': requests[:5],
         'stats': stats,
         'is_manager': is_manager,
         'is_technician': is_technician,
     }
-    
+
     return render(request, "frontend/maintenance_dashboard.html", context)
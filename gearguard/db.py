@@ -0,0 +1,53 @@
+"""
+Database helpers for SQLite under concurrent writers.
+
+retry_on_busy runs a write inside transaction.atomic() and, when SQLite
+reports the database as locked or busy even after the busy timeout,
+rolls back and runs it again with jittered exponential backoff
+(SQLITE_BUSY_RETRIES attempts from SQLITE_BUSY_RETRY_DELAY seconds).
+
+A retry is only safe when the whole unit of work is inside that
+transaction, so nothing is retried when the caller already holds an
+atomic block: the error propagates and the outermost block decides.
+
+Usage:
+
+    @retry_on_busy
+    def save_transition(request_obj):
+        request_obj.save()
+"""
+
+import functools
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+from . import metrics
+
+
+BUSY_MESSAGES = ('database is locked', 'database is busy', 'database table is locked')
+
+
+def is_busy_error(exc):
+    return isinstance(exc, OperationalError) and any(m in str(exc) for m in BUSY_MESSAGES)
+
+
+def retry_on_busy(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if connection.in_atomic_block:
+            return func(*args, **kwargs)
+        retries = getattr(settings, 'SQLITE_BUSY_RETRIES', 3)
+        delay = getattr(settings, 'SQLITE_BUSY_RETRY_DELAY', 0.05)
+        for attempt in range(retries + 1):
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as e:
+                if attempt == retries or not is_busy_error(e):
+                    raise
+                metrics.inc('gearguard_db_busy_retries_total', operation=func.__qualname__)
+                time.sleep(delay * 2 ** attempt * random.uniform(0.5, 1.5))
+    return wrapper
@@ -0,0 +1,416 @@
+"""
+Prometheus metrics shared across worker processes.
+
+Recording is lock-free: every thread increments plain dicts in its own
+shard, so the request path never waits on another thread or process.
+When a thread exits its shard is folded into the process's base shard.
+Each process that has recorded something periodically
+(METRICS_FLUSH_INTERVAL) merges its shards and rewrites its own file,
+``<METRICS_DIR>/metrics-<pid>.json``, with an atomic rename. The /metrics
+view merges every process file and renders the Prometheus text format;
+scraping never touches the database.
+
+Merging rules:
+
+- counters and histograms are summed over every file; the files of
+  processes that have exited are folded into ``metrics-retired.json`` at
+  scrape time, so totals stay monotonic across worker restarts without
+  the directory growing (clear METRICS_DIR on deploy to start from zero)
+- gauges are summed over live processes only
+
+Usage:
+
+    from gearguard import metrics
+    metrics.inc('gearguard_permission_denials_total', action='start_work')
+    metrics.observe('gearguard_http_request_duration_seconds', 0.012, view='...')
+    metrics.cache_result('dashboard_stats', hit=True)
+
+Every metric must be declared in METRICS below.
+"""
+
+import atexit
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:   # no advisory locks: files of exited processes are kept
+    fcntl = None
+
+
+COUNTER, GAUGE, HISTOGRAM = 'counter', 'gauge', 'histogram'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help, label names)
+METRICS = {
+    'gearguard_http_requests_total': (
+        COUNTER, 'HTTP requests by resolved view, method and status code.',
+        ('view', 'method', 'status'),
+    ),
+    'gearguard_http_request_duration_seconds': (
+        HISTOGRAM, 'HTTP request wall time by resolved view.', ('view',),
+    ),
+    'gearguard_workflow_transitions_total': (
+        COUNTER, 'WorkflowEngine actions by from/to status and outcome.',
+        ('action', 'from_status', 'to_status', 'outcome'),
+    ),
+    'gearguard_permission_denials_total': (
+        COUNTER, 'Workflow actions refused by PermissionChecker.', ('action',),
+    ),
+    'gearguard_cache_requests_total': (
+        COUNTER, 'Cache lookups by cache and result (hit / miss).', ('cache', 'result'),
+    ),
+    'gearguard_db_busy_retries_total': (
+        COUNTER, 'Writes retried after SQLite reported the database busy (gearguard.db).',
+        ('operation',),
+    ),
+    'gearguard_background_tasks_pending': (
+        GAUGE, 'Deferred background tasks queued or running (maintenance.tasks).', (),
+    ),
+}
+
+
+def _dir():
+    return str(getattr(settings, 'METRICS_DIR', os.path.join(tempfile.gettempdir(), 'gearguard-metrics')))
+
+
+def _key(name, labels):
+    declared = METRICS[name][2]
+    return name, tuple(str(labels.get(label, '')) for label in declared)
+
+
+# ============================================================================
+# PER-THREAD SHARDS
+# ============================================================================
+
+class _Shard:
+    """One thread's counters and histograms. Only its owner thread writes."""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}   # key -> [bucket counts..., +Inf count, sum]
+
+    def merge(self, other):
+        for key, value in other.counters.copy().items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, row in other.histograms.copy().items():
+            merged = self.histograms.setdefault(key, [0] * len(row))
+            for i, value in enumerate(list(row)):
+                merged[i] += value
+
+    def __bool__(self):
+        return bool(self.counters or self.histograms)
+
+
+class _Owner:
+    """Referenced only by one thread's _local; freed when the thread exits."""
+
+
+_local = threading.local()
+_base = _Shard()                  # shards of exited threads, guarded by _shards_lock
+_shards = []
+_shards_lock = threading.Lock()   # taken once per new or exiting thread, never per record
+_gauge_callbacks = {}
+_last_flush = [0.0]
+
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _local.shard = _Shard()
+        _local.owner = _Owner()
+        weakref.finalize(_local.owner, _retire, shard)
+        with _shards_lock:
+            _shards.append(shard)
+    return shard
+
+
+def _retire(shard):
+    """Fold an exited thread's shard into the base shard and drop it."""
+    with _shards_lock:
+        _base.merge(shard)
+        _shards.remove(shard)
+
+
+def reset():
+    """Forget everything this process has recorded."""
+    with _shards_lock:
+        for shard in [_base] + _shards:
+            shard.counters.clear()
+            shard.histograms.clear()
+
+
+def inc(name, value=1, **labels):
+    """Increment a counter."""
+    key = _key(name, labels)
+    counters = _shard().counters
+    counters[key] = counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """Record one observation (seconds) in a histogram."""
+    key = _key(name, labels)
+    histograms = _shard().histograms
+    row = histograms.get(key)
+    if row is None:
+        row = histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+    for i, bound in enumerate(LATENCY_BUCKETS):
+        if value <= bound:
+            row[i] += 1
+            break
+    else:
+        row[len(LATENCY_BUCKETS)] += 1
+    row[-1] += value
+
+
+def cache_result(cache, hit):
+    inc('gearguard_cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+
+def register_gauge(name, callback, **labels):
+    """Sample callback() for a gauge whenever this process flushes."""
+    _gauge_callbacks[_key(name, labels)] = callback
+
+
+# ============================================================================
+# PROCESS FILES
+# ============================================================================
+
+def _collect():
+    """Merge this process's shards into one JSON-ready dict."""
+    total = _Shard()
+    with _shards_lock:
+        for shard in [_base] + _shards:
+            total.merge(shard)
+    gauges = {}
+    for key, callback in list(_gauge_callbacks.items()):
+        try:
+            gauges[key] = float(callback())
+        except Exception:
+            continue
+    encode = lambda d: [[name, list(labels), value] for (name, labels), value in d.items()]
+    return {
+        'pid': os.getpid(),
+        'counters': encode(total.counters),
+        'histograms': encode(total.histograms),
+        'gauges': encode(gauges),
+    }
+
+
+def _write(path, data):
+    """Replace path with data as JSON (atomic rename)."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.metrics-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _recorded():
+    with _shards_lock:
+        return bool(_base) or any(_shards)
+
+
+_flushed_pid = [None]   # pid that has written its file (a forked child differs)
+_adopt_lock = threading.Lock()
+
+
+def flush():
+    """Write this process's metrics file."""
+    path = os.path.join(_dir(), f'metrics-{os.getpid()}.json')
+    with _adopt_lock:
+        if _flushed_pid[0] != os.getpid():
+            # Any file under our pid was left by an exited process whose
+            # pid the OS reused; fold it before overwriting it
+            _fold_files(_dir(), [path], blocking=True, dead_only=False)
+            _flushed_pid[0] = os.getpid()
+    _write(path, _collect())
+    _last_flush[0] = time.monotonic()
+
+
+def maybe_flush():
+    """
+    Flush if METRICS_FLUSH_INTERVAL has passed since the last flush and
+    this process has recorded something (management commands and other
+    short-lived processes that record nothing leave no file behind).
+    """
+    interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0)
+    if time.monotonic() - _last_flush[0] >= interval and _recorded():
+        try:
+            flush()
+        except OSError:
+            pass
+
+
+atexit.register(maybe_flush)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+RETIRED = 'metrics-retired.json'
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _add(totals, kind, rows):
+    for name, labels, value in rows:
+        if name not in METRICS:
+            continue
+        key = (name, tuple(labels))
+        if kind == 'histograms':
+            merged = totals[kind].setdefault(key, [0] * len(value))
+            for i, v in enumerate(value):
+                merged[i] += v
+        else:
+            totals[kind][key] = totals[kind].get(key, 0) + value
+
+
+def _fold_files(directory, paths, blocking=False, dead_only=True):
+    """
+    Fold the given process files into RETIRED and delete them, under an
+    exclusive lock so no file is ever folded twice. With `dead_only`,
+    files whose process is alive (checked under the lock) are skipped.
+    Without `blocking` the call does nothing while another process holds
+    the lock.
+
+    RETIRED remembers the files of its last fold (name and mtime), so a
+    file left behind by an interrupted fold is deleted rather than counted
+    again.
+    """
+    if fcntl is None or not os.path.isdir(directory):
+        return
+    with open(os.path.join(directory, '.compact.lock'), 'a') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except OSError:
+            return
+        retired_path = os.path.join(directory, RETIRED)
+        retired = _read(retired_path) or {'pid': None, 'counters': [], 'histograms': [], 'gauges': [], 'folded': {}}
+        folded = {}
+        totals = {'counters': {}, 'histograms': {}}
+        for kind in totals:
+            _add(totals, kind, retired[kind])
+        for path in paths:
+            data = _read(path)
+            if data is None or (dead_only and _alive(data['pid'])):
+                continue
+            name, mtime = os.path.basename(path), os.stat(path).st_mtime_ns
+            if retired['folded'].get(name) != mtime:
+                for kind in totals:
+                    _add(totals, kind, data[kind])
+            folded[name] = mtime
+        if not folded:
+            return
+        encode = lambda d: [[name, list(labels), value] for (name, labels), value in d.items()]
+        _write(retired_path, {
+            'pid': None,
+            'counters': encode(totals['counters']),
+            'histograms': encode(totals['histograms']),
+            'gauges': [],
+            'folded': folded,
+        })
+        for name in folded:
+            try:
+                os.unlink(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def compact():
+    """Fold the files of exited processes into RETIRED (see _fold_files)."""
+    directory = _dir()
+    paths = [
+        path for path in glob.glob(os.path.join(directory, 'metrics-*.json'))
+        if os.path.basename(path) != RETIRED
+    ]
+    if paths:
+        _fold_files(directory, paths)
+
+
+def aggregate():
+    """Merge every process file: {'counters'|'histograms'|'gauges': {key: value}}."""
+    try:
+        compact()
+    except OSError:
+        pass
+    totals = {'counters': {}, 'histograms': {}, 'gauges': {}}
+    for path in glob.glob(os.path.join(_dir(), 'metrics-*.json')):
+        data = _read(path)
+        if data is None:
+            continue
+        live = data['pid'] is not None and _alive(data['pid'])
+        for kind in ('counters', 'histograms', 'gauges'):
+            if kind == 'gauges' and not live:
+                continue
+            _add(totals, kind, data[kind])
+    return totals
+
+
+# ============================================================================
+# EXPOSITION
+# ============================================================================
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Prometheus text exposition (format 0.0.4) of the merged metrics."""
+    totals = aggregate()
+    kinds = {COUNTER: 'counters', GAUGE: 'gauges', HISTOGRAM: 'histograms'}
+    lines = []
+    for name, (kind, help_text, label_names) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        series = sorted(
+            (labels, value) for (n, labels), value in totals[kinds[kind]].items() if n == name
+        )
+        for labels, value in series:
+            if kind != HISTOGRAM:
+                lines.append(f'{name}{_labels(label_names, labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), value[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f'{name}_bucket{_labels(label_names, labels, [le])} {cumulative}')
+            lines.append(f'{name}_sum{_labels(label_names, labels)} {_number(float(value[-1]))}')
+            lines.append(f'{name}_count{_labels(label_names, labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
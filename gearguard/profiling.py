@@ -0,0 +1,181 @@
+"""
+On-demand sampling profiler for live requests.
+
+Staff can profile a single request by sending ``X-Profile: 1`` or adding
+``?__profile=1`` to the URL. ProfilingMiddleware then runs a sampler
+thread next to the request: every PROFILE_INTERVAL seconds it reads the
+request thread's current stack (sys._current_frames), so the view runs
+at full speed with no tracing hooks installed.
+
+Samples are written in the collapsed-stack format that flamegraph.pl,
+speedscope and similar tools read (one ``frame;frame;frame count`` line
+per distinct stack) to ``<PROFILE_DIR>/<profile id>.folded``. The profile
+id is a well-formed X-Request-ID header plus a random suffix (so a
+repeated or guessed request id never overwrites another profile), or a
+generated id, and is returned in the ``X-Profile-Id`` response header;
+staff download the file from /internal/profiles/<id>/.
+
+PROFILE_MAX_FILES and PROFILE_MAX_BYTES bound the directory; the oldest
+profiles are removed first. Requests without the flag, or from non-staff
+users, are not affected.
+"""
+
+import os
+import re
+import sys
+import threading
+import uuid
+
+from django.conf import settings
+
+
+REQUEST_ID = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+
+def _dir():
+    return str(settings.PROFILE_DIR)
+
+
+def profile_path(profile_id):
+    """Path of one stored profile, or None for a malformed id."""
+    if not REQUEST_ID.match(profile_id or ''):
+        return None
+    return os.path.join(_dir(), f'{profile_id}.folded')
+
+
+# ============================================================================
+# SAMPLER
+# ============================================================================
+
+def _frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get('__name__') or os.path.basename(code.co_filename)
+    return f'{module}:{code.co_name}'
+
+
+class StackSampler:
+    """
+    Periodically sample the stack of one thread.
+
+    counts maps a collapsed stack (root first, ';'-separated) to the
+    number of samples that saw it.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='gearguard-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        if not stack:
+            return
+        key = ';'.join(reversed(stack))
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.samples += 1
+
+    def collapsed(self):
+        """The samples as collapsed-stack text, most frequent stack first."""
+        ordered = sorted(self.counts.items(), key=lambda item: -item[1])
+        return ''.join(f'{stack} {count}\n' for stack, count in ordered)
+
+
+# ============================================================================
+# STORAGE
+# ============================================================================
+
+def save(profile_id, text):
+    """Write one profile, then enforce the retention limits."""
+    directory = _dir()
+    os.makedirs(directory, exist_ok=True)
+    path = profile_path(profile_id)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+    prune(directory, settings.PROFILE_MAX_FILES, settings.PROFILE_MAX_BYTES)
+    return path
+
+
+def prune(directory, max_files, max_bytes):
+    """Delete the oldest profiles until both limits hold. Returns the removed paths."""
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith('.folded'):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    entries.sort(reverse=True)   # newest first
+
+    removed = []
+    total = 0
+    for index, (_, size, path) in enumerate(entries):
+        total += size
+        if index >= max_files or total > max_bytes:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            removed.append(path)
+    return removed
+
+
+# ============================================================================
+# MIDDLEWARE
+# ============================================================================
+
+def wants_profile(request):
+    return request.headers.get('X-Profile') == '1' or request.GET.get('__profile') == '1'
+
+
+class ProfilingMiddleware:
+    """
+    Profile flagged requests from staff users. Place it after
+    AuthenticationMiddleware and last in MIDDLEWARE, so the samples cover
+    the view rather than the middleware stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not wants_profile(request) or not request.user.is_staff:
+            return self.get_response(request)
+
+        incoming = request.headers.get('X-Request-ID', '')
+        if REQUEST_ID.match(incoming):
+            profile_id = f'{incoming[:48]}-{uuid.uuid4().hex[:12]}'
+        else:
+            profile_id = uuid.uuid4().hex
+        sampler = StackSampler(threading.get_ident(), settings.PROFILE_INTERVAL)
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        save(profile_id, sampler.collapsed())
+        response['X-Profile-Id'] = profile_id
+        response['X-Profile-Samples'] = str(sampler.samples)
+        return response
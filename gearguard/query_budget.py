@@ -0,0 +1,47 @@
+"""
+Per-view SQL query budgets.
+
+Views declare the most queries one request may issue:
+
+    @query_budget(6)
+    @login_required
+    @require_http_methods(["GET"])
+    def request_detail(request, request_id):
+        ...
+
+The budget covers the whole request as the test client sees it: session
+and user lookups, the view itself and template rendering (lazy relation
+loads included). It must not depend on the amount of data, so anything
+that loops over rows belongs in select_related / prefetch_related or an
+aggregate, not in a per-row query.
+
+Budgets are enforced by the test suite (maintenance.tests), which calls
+every registered view at 1x, 10x and 100x data sizes. Nothing is checked
+at runtime.
+"""
+
+REGISTRY = {}
+
+
+def view_key(view):
+    """Dotted 'module.function' name of a view."""
+    return f'{view.__module__}.{view.__name__}'
+
+
+def query_budget(max_queries):
+    """
+    Declare the query budget of a view and register it.
+
+    Apply it outermost (above login_required and friends) so the budget is
+    attached to the callable the URLconf actually routes to.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        REGISTRY[view_key(view)] = max_queries
+        return view
+    return decorator
+
+
+def budget_for(view):
+    """Return the declared budget of a view, or None if it has none."""
+    return getattr(view, 'query_budget', None)
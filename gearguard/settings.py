@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +47,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its total covers the rest of the stack (see gearguard/timing.py)
+    'gearguard.timing.RequestTimingMiddleware',
+    'gearguard.slow_queries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,13 +57,16 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Last, so samples cover the view (see gearguard/profiling.py)
+    'gearguard.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'gearguard.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that records rendering time for Server-Timing
+        'BACKEND': 'gearguard.timing.TimedDjangoTemplates',
         'DIRS': ['templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -94,6 +103,91 @@ DATABASES = {
 
 }
 
+# SQLite profiles, selected with GEARGUARD_DB_PROFILE (default: development).
+# production turns on WAL so readers never block the writer, relaxes fsync
+# to WAL checkpoints (synchronous=NORMAL), gives every connection a 64 MiB
+# page cache and 256 MiB of mmap, opens atomic blocks with BEGIN IMMEDIATE
+# (takes the write lock up front, so writers queue on the busy timeout
+# instead of failing with "database is locked" on lock upgrade) and keeps
+# connections open between requests.
+SQLITE_PROFILES = {
+    'development': {},
+    'production': {
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 10,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA cache_size=-65536;'
+                'PRAGMA mmap_size=268435456;'
+                'PRAGMA temp_store=MEMORY'
+            ),
+        },
+    },
+}
+DATABASE_PROFILE = os.environ.get('GEARGUARD_DB_PROFILE', 'development')
+if DATABASE_PROFILE not in SQLITE_PROFILES:
+    raise ImproperlyConfigured(
+        f"GEARGUARD_DB_PROFILE={DATABASE_PROFILE!r} is not one of: {', '.join(SQLITE_PROFILES)}"
+    )
+DATABASES['default'].update(SQLITE_PROFILES[DATABASE_PROFILE])
+
+# Workflow writes retry this many times when SQLite is still busy after the
+# busy timeout (see gearguard/db.py), backing off from SQLITE_BUSY_RETRY_DELAY.
+SQLITE_BUSY_RETRIES = 3
+SQLITE_BUSY_RETRY_DELAY = 0.05
+
+
+# Team membership index (see teams/membership.py): each process re-reads
+# the shared membership version at most every TEAM_MEMBERSHIP_CHECK_INTERVAL
+# seconds, which bounds how long another worker's change can go unseen.
+TEAM_MEMBERSHIP_CHECK_INTERVAL = 2.0
+
+
+# Background follow-up work (see maintenance/tasks.py).
+# When True, deferred tasks run inline after commit instead of on a thread.
+BACKGROUND_TASKS_EAGER = False
+
+
+# Request timing (see gearguard/timing.py): per-view histograms cover the
+# last TIMING_WINDOWS windows of TIMING_WINDOW_SECONDS each.
+TIMING_WINDOW_SECONDS = 60
+TIMING_WINDOWS = 15
+
+
+# Prometheus metrics (see gearguard/metrics.py). Every worker process
+# writes its counters to METRICS_DIR at most every METRICS_FLUSH_INTERVAL
+# seconds; /metrics merges them. Set GEARGUARD_METRICS_TOKEN to require
+# "Authorization: Bearer <token>" on scrapes. "manage.py test" runs with a
+# temporary METRICS_DIR (gearguard/test_runner.py).
+TEST_RUNNER = 'gearguard.test_runner.TestRunner'
+METRICS_DIR = os.environ.get('GEARGUARD_METRICS_DIR', os.path.join(tempfile.gettempdir(), 'gearguard-metrics'))
+METRICS_FLUSH_INTERVAL = 1.0
+METRICS_TOKEN = os.environ.get('GEARGUARD_METRICS_TOKEN') or None
+
+
+# On-demand request profiling (see gearguard/profiling.py): staff send
+# "X-Profile: 1" or "?__profile=1". The stack is sampled every
+# PROFILE_INTERVAL seconds; PROFILE_DIR keeps at most PROFILE_MAX_FILES
+# profiles and PROFILE_MAX_BYTES bytes, oldest removed first.
+PROFILE_DIR = os.environ.get('GEARGUARD_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'gearguard-profiles'))
+PROFILE_INTERVAL = 0.005
+PROFILE_MAX_FILES = 200
+PROFILE_MAX_BYTES = 50 * 1024 * 1024
+
+
+# Slow-query capture (see gearguard/slow_queries.py): statements taking at
+# least SLOW_QUERY_THRESHOLD_MS are kept in a per-process ring buffer of
+# SLOW_QUERY_BUFFER entries, written to SLOW_QUERY_DIR for
+# "manage.py slow_queries".
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('GEARGUARD_SLOW_QUERY_MS', 100))
+SLOW_QUERY_BUFFER = 1000
+SLOW_QUERY_DIR = os.environ.get('GEARGUARD_SLOW_QUERY_DIR', os.path.join(tempfile.gettempdir(), 'gearguard-slow-queries'))
+SLOW_QUERY_FLUSH_INTERVAL = 1.0
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
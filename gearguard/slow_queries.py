@@ -0,0 +1,347 @@
+"""
+Slow-query capture.
+
+SlowQueryMiddleware installs an execute wrapper (connection.execute_wrapper)
+on every database connection for the duration of a request. Any statement
+taking at least SLOW_QUERY_THRESHOLD_MS is recorded with
+
+- its fingerprint: the SQL with literals replaced by ``?``, IN lists
+  collapsed to ``IN (...)`` and whitespace normalized, so the same query
+  with different ids or list lengths groups together
+- the resolved view name (admin paths included, e.g. ``admin:...``)
+- the innermost project frame that issued it (``maintenance/views.py:123
+  in report_team_requests``), skipping Django and library frames
+- the duration and a sample of the raw SQL
+
+Each process keeps the last SLOW_QUERY_BUFFER entries in a ring buffer and
+writes it to ``<SLOW_QUERY_DIR>/slow-<pid>.json`` (at most once per
+SLOW_QUERY_FLUSH_INTERVAL), so ``manage.py slow_queries`` can merge every
+worker and report the top fingerprints with counts and percentiles.
+
+Reading folds the files of exited processes into ``slow-retired.json``
+(newest SLOW_QUERY_BUFFER entries). ``slow_queries --clear`` writes a
+cutoff time to ``cleared.json``: every worker drops older entries from its
+buffer on its next flush, and readers ignore them until then.
+"""
+
+import atexit
+import collections
+import contextvars
+import glob
+import json
+import math
+import os
+import re
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+try:
+    import fcntl
+except ImportError:   # no advisory locks: files of exited processes are kept
+    fcntl = None
+
+
+# ============================================================================
+# FINGERPRINTS
+# ============================================================================
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normalize a statement so that executions differing only in values match."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+# ============================================================================
+# ORIGIN
+# ============================================================================
+
+# Instrumentation modules that sit between the caller and the database
+_SKIP_MODULES = {__name__, 'gearguard.timing', 'gearguard.metrics', 'gearguard.profiling', '__main__'}
+
+
+def _label(frame, path):
+    return f'{path}:{frame.f_lineno} in {frame.f_code.co_name}'
+
+
+def origin_frame():
+    """
+    'path:line in function' of the innermost project frame. Queries issued
+    entirely inside library code (admin changelists, lazy querysets
+    iterated by templates) fall back to the innermost library frame
+    outside the ORM.
+    """
+    root = str(settings.BASE_DIR) + os.sep
+    fallback = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__') or ''
+        filename = frame.f_code.co_filename
+        if module in _SKIP_MODULES:
+            pass
+        elif filename.startswith(root) and 'site-packages' not in filename:
+            return _label(frame, os.path.relpath(filename, root))
+        elif fallback is None and not module.startswith('django.db'):
+            fallback = _label(frame, filename.rpartition('site-packages' + os.sep)[2])
+        frame = frame.f_back
+    return fallback or '?'
+
+
+# ============================================================================
+# FILES
+# ============================================================================
+
+CLEARED = 'cleared.json'
+RETIRED = 'slow-retired.json'
+
+
+def _dir():
+    return str(settings.SLOW_QUERY_DIR)
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path, data):
+    """Replace path with data as JSON (atomic rename)."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.slow-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def cutoff():
+    """Time of the last clear_files(); entries recorded until then are gone."""
+    data = _read(os.path.join(_dir(), CLEARED))
+    try:
+        return float(data['at'])
+    except (TypeError, KeyError, ValueError):
+        return 0.0
+
+
+# ============================================================================
+# RING BUFFER
+# ============================================================================
+
+class SlowQueryLog:
+    """The last `size` slow queries of this process."""
+
+    def __init__(self, size):
+        self.entries = collections.deque(maxlen=size)
+        self._dirty = False
+        self._last_flush = 0.0
+
+    def record(self, entry):
+        self.entries.append(entry)   # deque.append is thread-safe
+        self._dirty = True
+
+    def clear(self):
+        self.entries.clear()
+        self._dirty = True
+
+    def path(self):
+        return os.path.join(_dir(), f'slow-{os.getpid()}.json')
+
+    def flush(self):
+        # Forget what "slow_queries --clear" removed since the last flush
+        since = cutoff()
+        while self.entries and self.entries[0]['at'] <= since:
+            self.entries.popleft()
+        _write(self.path(), [e for e in list(self.entries) if e['at'] > since])
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def maybe_flush(self):
+        if self._dirty and time.monotonic() - self._last_flush >= settings.SLOW_QUERY_FLUSH_INTERVAL:
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+
+log = SlowQueryLog(getattr(settings, 'SLOW_QUERY_BUFFER', 1000))
+atexit.register(log.maybe_flush)
+
+
+def compact():
+    """
+    Fold the files of exited processes into RETIRED, keeping the newest
+    SLOW_QUERY_BUFFER entries, and delete them. Skipped while another
+    reader holds the lock.
+    """
+    directory = _dir()
+    if fcntl is None or not os.path.isdir(directory):
+        return
+    with open(os.path.join(directory, '.compact.lock'), 'a') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return
+        retired_path = os.path.join(directory, RETIRED)
+        entries = _read(retired_path) or []
+        dead = []
+        for path in glob.glob(os.path.join(directory, 'slow-*.json')):
+            pid = os.path.basename(path)[len('slow-'):-len('.json')]
+            if not pid.isdigit() or metrics._alive(int(pid)):
+                continue
+            entries.extend(_read(path) or [])
+            dead.append(path)
+        if not dead:
+            return
+        since = cutoff()
+        entries = sorted((e for e in entries if e['at'] > since), key=lambda e: e['at'])
+        _write(retired_path, entries[-getattr(settings, 'SLOW_QUERY_BUFFER', 1000):])
+        for path in dead:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+def load_entries():
+    """Entries of every process file in SLOW_QUERY_DIR, newer than the last clear."""
+    try:
+        compact()
+    except OSError:
+        pass
+    since = cutoff()
+    entries = []
+    for path in glob.glob(os.path.join(_dir(), 'slow-*.json')):
+        entries.extend(e for e in _read(path) or [] if e['at'] > since)
+    return entries
+
+
+def clear_files():
+    """Drop every entry captured so far, including those still buffered by live workers."""
+    _write(os.path.join(_dir(), CLEARED), {'at': time.time()})
+    for path in glob.glob(os.path.join(_dir(), 'slow-*.json')):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def _percentile(ordered, q):
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def aggregate(entries):
+    """
+    Group entries by fingerprint.
+
+    Returns [{fingerprint, count, total_ms, p50_ms, p95_ms, max_ms,
+    views: {name: n}, frames: {origin: n}, sample}], highest total first.
+    """
+    groups = {}
+    for entry in entries:
+        groups.setdefault(entry['fingerprint'], []).append(entry)
+
+    rows = []
+    for fp, group in groups.items():
+        durations = sorted(e['ms'] for e in group)
+        slowest = max(group, key=lambda e: e['ms'])
+        rows.append({
+            'fingerprint': fp,
+            'count': len(group),
+            'total_ms': round(sum(durations), 3),
+            'p50_ms': _percentile(durations, 0.50),
+            'p95_ms': _percentile(durations, 0.95),
+            'max_ms': durations[-1],
+            'views': dict(collections.Counter(e['view'] for e in group).most_common()),
+            'frames': dict(collections.Counter(e['frame'] for e in group).most_common()),
+            'sample': slowest['sql'],
+        })
+    rows.sort(key=lambda row: -row['total_ms'])
+    return rows
+
+
+# ============================================================================
+# MIDDLEWARE
+# ============================================================================
+
+_request = contextvars.ContextVar('slow_query_request', default=None)
+
+
+class _RequestState:
+    __slots__ = ('view', 'entries')
+
+    def __init__(self):
+        self.view = '<unresolved>'
+        self.entries = []
+
+
+def _wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+            state = _request.get()
+            entry = {
+                'fingerprint': fingerprint(sql),
+                'sql': sql[:2000],
+                'ms': round(elapsed_ms, 3),
+                'view': state.view if state else '<no request>',
+                'frame': origin_frame(),
+                'at': time.time(),
+            }
+            if state is not None:
+                state.entries.append(entry)
+            log.record(entry)
+
+
+class SlowQueryMiddleware:
+    """
+    Record slow SQL issued while serving a request. Queries that run
+    before the URL is resolved (session, auth) are attributed to the view
+    once it is known.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = _RequestState()
+        token = _request.set(state)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_wrapper))
+                response = self.get_response(request)
+        finally:
+            _request.reset(token)
+            match = getattr(request, 'resolver_match', None)
+            view = match.view_name if match else '<unresolved>'
+            for entry in state.entries:
+                entry['view'] = view
+            log.maybe_flush()
+        return response
@@ -0,0 +1,30 @@
+"""
+Test runner that keeps test runs out of the shared metrics directory.
+
+Every request made by the test client is recorded by gearguard.metrics;
+without this the test process would leave a metrics-<pid>.json in
+METRICS_DIR that production scrapes keep counting.
+"""
+
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from . import metrics
+
+
+class TestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._metrics_dir = tempfile.TemporaryDirectory(prefix='gearguard-test-metrics-')
+        self._metrics_settings = override_settings(METRICS_DIR=self._metrics_dir.name)
+        self._metrics_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        # Nothing left for the exit-time flush to write to the real directory
+        metrics.reset()
+        self._metrics_settings.disable()
+        self._metrics_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
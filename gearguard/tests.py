@@ -0,0 +1,468 @@
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.management import call_command
+from django.db import OperationalError, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from maintenance.models import MaintenanceRequest
+from maintenance.workflow import PermissionError, WorkflowEngine
+from . import db, metrics, profiling, slow_queries, timing
+
+
+class LatencyHistogramTests(SimpleTestCase):
+
+    def test_buckets_cover_every_value_once(self):
+        H = timing.LatencyHistogram
+        for value in range(20_000):
+            bucket = H.bucket_of(value)
+            self.assertGreaterEqual(H.bucket_ceiling(bucket), value)
+            if bucket:
+                self.assertLess(H.bucket_ceiling(bucket - 1), value)
+
+    def test_percentiles_within_bucket_error(self):
+        rand = random.Random(7)
+        values = sorted(rand.randint(0, 5_000_000) for _ in range(10_000))
+        histogram = timing.LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * len(values)) - 1]
+            self.assertAlmostEqual(histogram.percentile(q) / exact, 1, delta=1 / 32)
+        self.assertEqual(histogram.percentile(1.0), values[-1])
+
+    def test_old_windows_roll_off(self):
+        now = [0.0]
+        registry = timing.TimingRegistry(window_seconds=60, windows=2, clock=lambda: now[0])
+        request_timing = timing.RequestTiming()
+        request_timing.total = 0.010
+        registry.record('a', request_timing, 200)
+        now[0] = 61
+        registry.record('b', request_timing, 500)
+        self.assertEqual(set(registry.snapshot()), {'a', 'b'})
+        now[0] = 121
+        snapshot = registry.snapshot()
+        self.assertEqual(set(snapshot), {'b'})
+        self.assertEqual(snapshot['b']['errors'], 1)
+        self.assertEqual(snapshot['b']['total']['p50'], 10.0)
+
+
+class RequestTimingMiddlewareTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.user = User.objects.create_user('user', password='x')
+
+    def setUp(self):
+        timing.registry.reset()
+
+    def test_server_timing_header_and_histogram(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('maintenance:api_kanban_data'))
+        header = response['Server-Timing']
+        self.assertRegex(header, r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+$')
+
+        stats = timing.registry.snapshot()['maintenance:api_kanban_data']
+        self.assertEqual(stats['total']['count'], 1)
+        self.assertGreater(stats['queries']['max'], 0)
+        self.assertGreater(stats['serialize']['max'], 0)
+
+    def test_every_app_json_response_is_timed(self):
+        # gearguard's own views use django.http.JsonResponse directly
+        self.client.force_login(self.staff)
+        url = reverse('timing-stats')
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertRegex(response['Server-Timing'], r'serialize;dur=[\d.]+')
+        stats = response.json()['views']['timing-stats']
+        self.assertGreater(stats['serialize']['max'], 0)
+
+    def test_stats_endpoint_is_staff_only(self):
+        url = reverse('timing-stats')
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(self.staff)
+        self.client.get(reverse('maintenance:calendar'))
+        data = self.client.get(url).json()
+        self.assertTrue(data['success'])
+        self.assertIn('maintenance:calendar', data['views'])
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        overrides = override_settings(METRICS_DIR=self.directory.name, METRICS_TOKEN=None)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def _scrape(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def _sample(self, text, series):
+        for line in text.splitlines():
+            if line.startswith(series + ' '):
+                return float(line.rsplit(' ', 1)[1])
+        return 0.0
+
+    def test_exports_http_workflow_and_permission_metrics(self):
+        denials = 'gearguard_permission_denials_total{action="scrap_request"}'
+        refused = (
+            'gearguard_workflow_transitions_total{action="scrap_request",from_status="New",'
+            'to_status="Scrap",outcome="permission_denied"}'
+        )
+        before = self._scrape()
+
+        user = User.objects.create_user('viewer', password='x')
+        with self.assertRaises(PermissionError):
+            WorkflowEngine.scrap_request(MaintenanceRequest(status='New'), user, save=False)
+        self.client.force_login(user)
+        self.client.get(reverse('maintenance:calendar'))
+        self.client.logout()
+
+        text = self._scrape()
+        self.assertEqual(self._sample(text, denials) - self._sample(before, denials), 1)
+        self.assertEqual(self._sample(text, refused) - self._sample(before, refused), 1)
+        self.assertIn('gearguard_http_requests_total{view="maintenance:calendar",method="GET",status="200"}', text)
+        self.assertIn('gearguard_http_request_duration_seconds_bucket{view="maintenance:calendar",le="+Inf"}', text)
+        self.assertIn('# TYPE gearguard_background_tasks_pending gauge', text)
+
+    def test_merges_process_files(self):
+        # A process that has exited: its counters still count, its gauges do not
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        with open(os.path.join(self.directory.name, f'metrics-{exited.pid}.json'), 'w') as f:
+            json.dump({
+                'pid': exited.pid,
+                'counters': [['gearguard_cache_requests_total', ['test', 'hit'], 5]],
+                'histograms': [],
+                'gauges': [['gearguard_background_tasks_pending', [], 7]],
+            }, f)
+        metrics.cache_result('test', hit=True)
+        metrics.flush()
+
+        text = metrics.render()
+        self.assertEqual(self._sample(text, 'gearguard_cache_requests_total{cache="test",result="hit"}'), 6)
+        self.assertEqual(self._sample(text, 'gearguard_background_tasks_pending'), 0)
+
+        # The exited process's file was folded into the retired totals
+        self.assertEqual(
+            sorted(os.listdir(self.directory.name)),
+            ['.compact.lock', f'metrics-{os.getpid()}.json', metrics.RETIRED],
+        )
+        self.assertEqual(self._sample(metrics.render(), 'gearguard_cache_requests_total{cache="test",result="hit"}'), 6)
+
+    def _exited_file(self, hits):
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        path = os.path.join(self.directory.name, f'metrics-{exited.pid}.json')
+        with open(path, 'w') as f:
+            json.dump({
+                'pid': exited.pid,
+                'counters': [['gearguard_cache_requests_total', ['test', 'hit'], hits]],
+                'histograms': [['gearguard_http_request_duration_seconds', ['v'], [1] + [0] * 11 + [0.001]]],
+                'gauges': [],
+            }, f)
+        return path
+
+    def test_compaction_never_counts_a_file_twice(self):
+        series = 'gearguard_cache_requests_total{cache="test",result="hit"}'
+        self._exited_file(2)
+        self._exited_file(3)
+        metrics.compact()
+        self.assertEqual([n for n in os.listdir(self.directory.name) if n.startswith('metrics-')], [metrics.RETIRED])
+
+        # A file whose deletion was interrupted is dropped, not folded again
+        with open(os.path.join(self.directory.name, metrics.RETIRED)) as f:
+            retired = json.load(f)
+        name, mtime = next(iter(retired['folded'].items()))
+        path = os.path.join(self.directory.name, name)
+        os.replace(self._exited_file(99), path)
+        os.utime(path, ns=(mtime, mtime))
+        metrics.compact()
+        self.assertFalse(os.path.exists(path))
+
+        self._exited_file(4)
+        totals = metrics.aggregate()
+        self.assertEqual(totals['counters'][('gearguard_cache_requests_total', ('test', 'hit'))], 9)
+        self.assertEqual(totals['histograms'][('gearguard_http_request_duration_seconds', ('v',))][0], 3)
+        self.assertEqual(self._sample(metrics.render(), series), 9)
+
+    def test_first_flush_keeps_a_reused_pid_file(self):
+        series = ('gearguard_cache_requests_total', ('test', 'hit'))
+        # Left by an exited process that had our pid
+        with open(os.path.join(self.directory.name, f'metrics-{os.getpid()}.json'), 'w') as f:
+            json.dump({'pid': os.getpid(), 'counters': [[series[0], list(series[1]), 5]],
+                       'histograms': [], 'gauges': []}, f)
+        metrics.reset()
+        metrics.cache_result('test', hit=True)
+        with mock.patch.object(metrics, '_flushed_pid', [None]):
+            metrics.flush()
+            metrics.flush()
+        self.assertEqual(metrics.aggregate()['counters'][series], 6)
+
+    def test_flushes_only_after_recording(self):
+        path = os.path.join(self.directory.name, f'metrics-{os.getpid()}.json')
+        metrics.reset()
+        metrics._last_flush[0] = 0.0
+        metrics.maybe_flush()
+        self.assertFalse(os.path.exists(path))
+
+        metrics.cache_result('test', hit=False)
+        metrics.maybe_flush()
+        self.assertTrue(os.path.exists(path))
+
+    def test_exited_threads_fold_into_base_shard(self):
+        series = ('gearguard_cache_requests_total', ('test', 'hit'))
+        metrics.reset()
+        shards = len(metrics._shards)
+        threads = [threading.Thread(target=metrics.cache_result, args=('test',), kwargs={'hit': True})
+                   for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(metrics._shards), shards)
+        self.assertEqual(metrics._base.counters[series], 20)
+        counters = {(name, tuple(labels)): value for name, labels, value in metrics._collect()['counters']}
+        self.assertEqual(counters[series], 20)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_required_when_configured(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+
+def _spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class ProfilingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.user = User.objects.create_user('user', password='x')
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        overrides = override_settings(PROFILE_DIR=self.directory.name, PROFILE_INTERVAL=0.001)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_sampler_collapses_stacks(self):
+        sampler = profiling.StackSampler(threading.get_ident(), 0.001)
+        sampler.start()
+        _spin(0.05)
+        sampler.stop()
+        self.assertGreater(sampler.samples, 0)
+        stack, count = sampler.collapsed().splitlines()[0].rsplit(' ', 1)
+        self.assertTrue(stack.endswith('gearguard.tests:_spin'))
+        self.assertGreater(int(count), 0)
+
+    def test_staff_flagged_request_is_profiled(self):
+        url = reverse('maintenance:api_kanban_data')
+        self.client.force_login(self.staff)
+        self.assertNotIn('X-Profile-Id', self.client.get(url))
+
+        response = self.client.get(url, {'__profile': '1'}, HTTP_X_REQUEST_ID='req-12345678')
+        profile_id = response['X-Profile-Id']
+        self.assertRegex(profile_id, r'^req-12345678-[0-9a-f]{12}$')
+        download = self.client.get(reverse('profile-download', args=[profile_id]))
+        self.assertEqual(download.status_code, 200)
+        lines = b''.join(download.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), len(set(lines)))
+        self.assertEqual(sum(int(line.rsplit(' ', 1)[1]) for line in lines), int(response['X-Profile-Samples']))
+
+        self.client.force_login(self.user)
+        self.assertNotIn('X-Profile-Id', self.client.get(url, HTTP_X_PROFILE='1'))
+        self.assertEqual(self.client.get(reverse('profile-download', args=[profile_id])).status_code, 403)
+
+    def test_repeated_request_id_does_not_overwrite(self):
+        url = reverse('maintenance:api_kanban_data')
+        self.client.force_login(self.staff)
+        ids = [
+            self.client.get(url, HTTP_X_PROFILE='1', HTTP_X_REQUEST_ID='x' * 64)['X-Profile-Id']
+            for _ in range(2)
+        ]
+        self.assertNotEqual(ids[0], ids[1])
+        for profile_id in ids:
+            self.assertIsNotNone(profiling.profile_path(profile_id))
+            self.assertEqual(self.client.get(reverse('profile-download', args=[profile_id])).status_code, 200)
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
+
+    def test_prune_keeps_newest_within_limits(self):
+        for i in range(5):
+            path = os.path.join(self.directory.name, f'p{i}.folded')
+            with open(path, 'w') as f:
+                f.write('x' * 100)
+            os.utime(path, (i, i))
+        removed = profiling.prune(self.directory.name, max_files=4, max_bytes=250)
+        self.assertEqual(sorted(os.path.basename(p) for p in removed), ['p0.folded', 'p1.folded', 'p2.folded'])
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ['p3.folded', 'p4.folded'])
+
+
+class SlowQueryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        overrides = override_settings(SLOW_QUERY_DIR=self.directory.name, SLOW_QUERY_THRESHOLD_MS=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        slow_queries.log.clear()
+
+    def test_fingerprint_normalizes_values(self):
+        self.assertEqual(
+            slow_queries.fingerprint("SELECT  \"t\".\"id\" FROM t U0 WHERE id IN (%s, %s, %s)\n AND name = 'o''k' LIMIT 21"),
+            'SELECT "t"."id" FROM t U0 WHERE id IN (...) AND name = ? LIMIT ?',
+        )
+        self.assertEqual(
+            slow_queries.fingerprint('SELECT 1 FROM t WHERE id IN (%s)'),
+            slow_queries.fingerprint('SELECT 2 FROM t WHERE id IN (%s, %s)'),
+        )
+
+    def test_captures_view_and_origin_and_dumps_top_offenders(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse('maintenance:api_kanban_data'))
+        slow_queries.log.flush()
+
+        entries = [e for e in slow_queries.load_entries() if e['view'] == 'maintenance:api_kanban_data']
+        self.assertTrue(entries)
+        self.assertTrue(any(e['frame'].startswith('maintenance/views.py:') for e in entries))
+
+        out = io.StringIO()
+        call_command('slow_queries', view='maintenance:api_kanban_data', json=True, stdout=out)
+        rows = json.loads(out.getvalue())
+        self.assertEqual(sum(row['count'] for row in rows), len(entries))
+        self.assertLessEqual(rows[0]['p50_ms'], rows[0]['max_ms'])
+
+    def _entry(self, at):
+        return {'fingerprint': 'SELECT ?', 'sql': 'SELECT 1', 'ms': 1.0,
+                'view': 'v', 'frame': 'f', 'at': at}
+
+    def test_clear_drops_entries_buffered_by_live_workers(self):
+        slow_queries.log.record(self._entry(time.time() - 1))
+        slow_queries.log.flush()
+        call_command('slow_queries', clear=True, stdout=io.StringIO())
+        self.assertEqual(slow_queries.load_entries(), [])
+
+        # The worker flushes again without having seen the clear
+        slow_queries.log.flush()
+        self.assertEqual(slow_queries.load_entries(), [])
+        self.assertEqual(len(slow_queries.log.entries), 0)
+
+        slow_queries.log.record(self._entry(time.time() + 1))
+        slow_queries.log.flush()
+        self.assertEqual(len(slow_queries.load_entries()), 1)
+
+    @override_settings(SLOW_QUERY_BUFFER=3)
+    def test_files_of_exited_processes_are_folded(self):
+        now = time.time()
+        for batch in range(2):
+            exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+            exited.wait()
+            with open(os.path.join(self.directory.name, f'slow-{exited.pid}.json'), 'w') as f:
+                json.dump([self._entry(now + batch * 10 + i) for i in range(2)], f)
+
+        entries = slow_queries.load_entries()
+        self.assertEqual([e['at'] for e in entries], [now + 1, now + 10, now + 11])
+        self.assertEqual(
+            [n for n in os.listdir(self.directory.name) if n.startswith('slow-')],
+            [slow_queries.RETIRED],
+        )
+        self.assertEqual(len(slow_queries.load_entries()), 3)
+
+
+class ProductionDatabaseProfileTests(SimpleTestCase):
+
+    def test_production_profile_pragmas(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        profile = settings.SQLITE_PROFILES['production']
+        wrapper = DatabaseWrapper({
+            **settings.DATABASES['default'], **profile,
+            'NAME': os.path.join(directory.name, 'profile.sqlite3'),
+        }, alias='profile-test')
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        pragma = lambda name: wrapper.connection.execute(f'PRAGMA {name}').fetchone()[0]
+
+        self.assertEqual(pragma('journal_mode'), 'wal')
+        self.assertEqual(pragma('synchronous'), 1)   # NORMAL
+        self.assertEqual(pragma('cache_size'), -65536)
+        self.assertEqual(wrapper.transaction_mode, 'IMMEDIATE')
+        self.assertEqual(profile['CONN_MAX_AGE'], 600)
+
+    def test_unknown_profile_is_improperly_configured(self):
+        result = subprocess.run(
+            [sys.executable, '-c', 'import gearguard.settings'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+            env={**os.environ, 'GEARGUARD_DB_PROFILE': 'prod'},
+        )
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('ImproperlyConfigured', result.stderr)
+        self.assertIn('development, production', result.stderr)
+
+
+@override_settings(SQLITE_BUSY_RETRIES=3, SQLITE_BUSY_RETRY_DELAY=0)
+class RetryOnBusyTests(TransactionTestCase):
+
+    def _failing(self, errors):
+        calls = []
+
+        @db.retry_on_busy
+        def write():
+            calls.append(1)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return 'written'
+        return write, calls
+
+    def test_retries_busy_errors(self):
+        write, calls = self._failing([OperationalError('database is locked')] * 2)
+        self.assertEqual(write(), 'written')
+        self.assertEqual(len(calls), 3)
+
+    def test_gives_up_after_the_last_retry(self):
+        write, calls = self._failing([OperationalError('database is locked')] * 4)
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 4)
+
+    def test_other_errors_and_outer_transactions_are_not_retried(self):
+        write, calls = self._failing([OperationalError('no such table: x')])
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+
+        write, calls = self._failing([OperationalError('database is locked')])
+        with self.assertRaises(OperationalError), transaction.atomic():
+            write()
+        self.assertEqual(len(calls), 1)
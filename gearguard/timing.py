@@ -0,0 +1,340 @@
+"""
+Request timing: Server-Timing headers and per-view latency histograms.
+
+RequestTimingMiddleware measures, for every request:
+
+- total: wall time through the middleware stack
+- db: time spent executing SQL (all connections) and the query count
+- serialize: time spent encoding JSON responses and rendering templates
+
+and sends them back as a ``Server-Timing`` header, which browser dev
+tools show next to each request.
+
+The same figures feed process-local rolling histograms keyed by the
+resolved view name (e.g. ``maintenance:api_kanban_data``). Each histogram
+uses HDR-style log-linear buckets (about 3% relative error at any scale)
+so recording is O(1) and memory stays bounded. Histograms are kept per
+time window; the last TIMING_WINDOWS windows of TIMING_WINDOW_SECONDS each
+are merged on read, so a dump shows recent behaviour rather than totals
+since the process started.
+
+Serialization time is recorded by wrapping django.http.JsonResponse
+(installed by the middleware, so every app keeps importing it from
+django.http) and by the TimedDjangoTemplates template backend (see
+settings.TEMPLATES).
+
+Request counts and latency are also exported to Prometheus (gearguard/metrics.py).
+"""
+
+import contextvars
+import functools
+import math
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from . import metrics
+
+
+# ============================================================================
+# HISTOGRAMS
+# ============================================================================
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of non-negative integer values (microseconds).
+
+    Values below SUB_BUCKETS are exact; above that every power of two is
+    split into SUB_BUCKETS linear buckets, so a bucket never spans more
+    than 1/SUB_BUCKETS of its value.
+    """
+
+    SUB_BUCKETS = 32
+    _SUB_BITS = 5
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @classmethod
+    def bucket_of(cls, value):
+        if value < cls.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - cls._SUB_BITS - 1
+        return (shift + 1) * cls.SUB_BUCKETS + (value >> shift) - cls.SUB_BUCKETS
+
+    @classmethod
+    def bucket_ceiling(cls, bucket):
+        """Largest value that falls into a bucket."""
+        if bucket < cls.SUB_BUCKETS:
+            return bucket
+        shift = bucket // cls.SUB_BUCKETS - 1
+        mantissa = bucket % cls.SUB_BUCKETS + cls.SUB_BUCKETS
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value):
+        value = max(0, int(value))
+        bucket = self.bucket_of(value)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for bucket, n in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-quantile (0 if empty)."""
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self.bucket_ceiling(bucket), self.max)
+        return self.max
+
+    def summary(self):
+        """Milliseconds summary of the recorded microsecond values."""
+        ms = lambda us: round(us / 1000, 3)
+        return {
+            'count': self.count,
+            'mean': ms(self.total / self.count) if self.count else 0,
+            'p50': ms(self.percentile(0.50)),
+            'p90': ms(self.percentile(0.90)),
+            'p99': ms(self.percentile(0.99)),
+            'max': ms(self.max),
+        }
+
+
+class ViewStats:
+    """Histograms of one view in one window."""
+
+    METRICS = ('total', 'db', 'serialize')
+
+    def __init__(self):
+        self.histograms = {metric: LatencyHistogram() for metric in self.METRICS}
+        self.queries = 0
+        self.max_queries = 0
+        self.errors = 0
+
+    def merge(self, other):
+        for metric, histogram in other.histograms.items():
+            self.histograms[metric].merge(histogram)
+        self.queries += other.queries
+        self.max_queries = max(self.max_queries, other.max_queries)
+        self.errors += other.errors
+
+    def summary(self):
+        data = {metric: h.summary() for metric, h in self.histograms.items()}
+        count = self.histograms['total'].count
+        data['queries'] = {
+            'mean': round(self.queries / count, 2) if count else 0,
+            'max': self.max_queries,
+        }
+        data['errors'] = self.errors
+        return data
+
+
+class TimingRegistry:
+    """Process-local rolling windows of per-view stats."""
+
+    def __init__(self, window_seconds=60, windows=15, clock=time.monotonic):
+        self.window_seconds = window_seconds
+        self.windows = windows
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._windows = {}   # window number -> {view name: ViewStats}
+
+    def _current(self):
+        number = int(self.clock() // self.window_seconds)
+        window = self._windows.get(number)
+        if window is None:
+            window = self._windows[number] = {}
+            for old in [n for n in self._windows if n <= number - self.windows]:
+                del self._windows[old]
+        return window
+
+    def record(self, view_name, timing, status_code):
+        with self._lock:
+            window = self._current()
+            stats = window.get(view_name)
+            if stats is None:
+                stats = window[view_name] = ViewStats()
+            stats.histograms['total'].record(timing.total * 1e6)
+            stats.histograms['db'].record(timing.db * 1e6)
+            stats.histograms['serialize'].record(timing.serialize * 1e6)
+            stats.queries += timing.queries
+            stats.max_queries = max(stats.max_queries, timing.queries)
+            if status_code >= 500:
+                stats.errors += 1
+
+    def snapshot(self):
+        """Merge the live windows: {view name: summary}, slowest p99 first."""
+        with self._lock:
+            oldest = int(self.clock() // self.window_seconds) - self.windows
+            merged = {}
+            for number, window in self._windows.items():
+                if number <= oldest:
+                    continue
+                for view_name, stats in window.items():
+                    merged.setdefault(view_name, ViewStats()).merge(stats)
+        summaries = {name: stats.summary() for name, stats in merged.items()}
+        return dict(sorted(summaries.items(), key=lambda item: -item[1]['total']['p99']))
+
+    def reset(self):
+        with self._lock:
+            self._windows.clear()
+
+
+registry = TimingRegistry(
+    window_seconds=getattr(settings, 'TIMING_WINDOW_SECONDS', 60),
+    windows=getattr(settings, 'TIMING_WINDOWS', 15),
+)
+
+
+# ============================================================================
+# PER-REQUEST TIMING
+# ============================================================================
+
+class RequestTiming:
+    """Accumulated timings (seconds) of the request being served."""
+
+    __slots__ = ('total', 'db', 'queries', 'serialize')
+
+    def __init__(self):
+        self.total = 0.0
+        self.db = 0.0
+        self.queries = 0
+        self.serialize = 0.0
+
+    def server_timing(self):
+        return ', '.join([
+            f'total;dur={self.total * 1000:.1f}',
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize * 1000:.1f}',
+        ])
+
+
+_current = contextvars.ContextVar('request_timing', default=None)
+
+
+def current_timing():
+    """The RequestTiming of the request being served, or None."""
+    return _current.get()
+
+
+@contextmanager
+def serializing():
+    """Count the enclosed block as serialization time of the current request."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.serialize += time.perf_counter() - started
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db += time.perf_counter() - started
+        timing.queries += 1
+
+
+def instrument_json_response():
+    """Record the encoding time of every django.http.JsonResponse (idempotent)."""
+    init = JsonResponse.__init__
+    if getattr(init, 'timed', False):
+        return
+
+    @functools.wraps(init)
+    def timed_init(self, *args, **kwargs):
+        with serializing():
+            init(self, *args, **kwargs)
+    timed_init.timed = True
+    JsonResponse.__init__ = timed_init
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with serializing():
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend that records rendering time."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+# ============================================================================
+# MIDDLEWARE
+# ============================================================================
+
+class RequestTimingMiddleware:
+    """
+    Time every request, add a Server-Timing header and record the figures
+    under the resolved view name. Place it first in MIDDLEWARE so the total
+    covers the rest of the stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_json_response()
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        token = _current.set(timing)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_db_wrapper))
+                response = self.get_response(request)
+        finally:
+            timing.total = time.perf_counter() - started
+            _current.reset(token)
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else '<unresolved>'
+        registry.record(view_name, timing, response.status_code)
+        metrics.observe('gearguard_http_request_duration_seconds', timing.total, view=view_name)
+        metrics.inc(
+            'gearguard_http_requests_total',
+            view=view_name, method=request.method, status=response.status_code,
+        )
+        metrics.maybe_flush()
+        response['Server-Timing'] = timing.server_timing()
+        return response
@@ -27,5 +27,9 @@ urlpatterns = [
     path('accounts/signup/', views.signup_view, name='signup'),
     path('equipment/', include('equipment.urls')),
     path('maintenance/', include('maintenance.urls')), 
+    path('ui/', include('frontend.urls')),
+    path('internal/timing/', views.timing_stats, name='timing-stats'),
+    path('internal/profiles/<str:profile_id>/', views.profile_download, name='profile-download'),
+    path('metrics', views.metrics_view, name='metrics'),
 
 ]
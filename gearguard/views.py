@@ -1,9 +1,15 @@
-from django.http import HttpResponse
+import os
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, JsonResponse
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_http_methods
+
+from . import metrics, profiling, timing
 
 
 def home(request):
@@ -72,3 +78,71 @@ def logout_view(request):
     return redirect('home')
 
 
+@login_required
+@require_http_methods(["GET"])
+def timing_stats(request):
+    """
+    Staff only: per-view latency histograms of this process (see timing.py).
+
+    Returns { success, window_seconds, windows, views: { view_name: {
+    total|db|serialize: {count, mean, p50, p90, p99, max} (ms),
+    queries: {mean, max}, errors } } }, slowest p99 first.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({
+            'success': False,
+            'error': 'Timing stats are available to staff only.',
+            'error_type': 'permission'
+        }, status=403)
+
+    return JsonResponse({
+        'success': True,
+        'window_seconds': timing.registry.window_seconds,
+        'windows': timing.registry.windows,
+        'views': timing.registry.snapshot(),
+    })
+
+
+@login_required
+@require_http_methods(["GET"])
+def profile_download(request, profile_id):
+    """
+    Staff only: one stored request profile (collapsed stacks, see
+    profiling.py), ready for flamegraph.pl or speedscope.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({
+            'success': False,
+            'error': 'Profiles are available to staff only.',
+            'error_type': 'permission'
+        }, status=403)
+
+    path = profiling.profile_path(profile_id)
+    if path is None or not os.path.exists(path):
+        return JsonResponse({
+            'success': False,
+            'error': 'Profile not found (it may have been pruned)'
+        }, status=404)
+
+    return FileResponse(
+        open(path, 'rb'), content_type='text/plain; charset=utf-8',
+        as_attachment=True, filename=f'{profile_id}.folded',
+    )
+
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint (text exposition format).
+
+    Serves the counters of every worker process from METRICS_DIR (see
+    metrics.py) and never touches the database, so it is not behind a login.
+    When METRICS_TOKEN is set, scrapers must send
+    ``Authorization: Bearer <token>``.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+
+    metrics.flush()
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
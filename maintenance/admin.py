@@ -1,10 +1,34 @@
 from django.contrib import admin
 
 # Register your models here.
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.shortcuts import render
+from django.db.models import Count, IntegerField, OuterRef, Subquery
 from django.utils.html import format_html
-from .models import MaintenanceRequest
-from .workflow import get_available_actions, PermissionChecker
+from .models import MaintenanceRequest, overdue_q
+from .pagination import EstimatedCountPaginator
+from teams.models import MaintenanceTeam
+from .workflow import get_available_actions, PermissionChecker, BulkWorkflow
+from .forms import BulkAssignTeamForm, BulkAssignTechnicianForm, BulkCompleteForm
+from .assignment import AssignmentEngine
+
+class OverdueFilter(admin.SimpleListFilter):
+	"""Overdue / on time, evaluated in SQL (see maintenance.models.overdue_q)."""
+	
+	title = 'schedule'
+	parameter_name = 'overdue'
+	
+	def lookups(self, request, model_admin):
+		return (('yes', 'Overdue'), ('no', 'On time'))
+	
+	def queryset(self, request, queryset):
+		if self.value() == 'yes':
+			return queryset.overdue()
+		if self.value() == 'no':
+			return queryset.exclude(overdue_q())
+		return queryset
+
 
 @admin.register(MaintenanceRequest)
 class MaintenanceRequestAdmin(admin.ModelAdmin):
@@ -12,7 +36,24 @@ class MaintenanceRequestAdmin(admin.ModelAdmin):
 	Django admin interface for MaintenanceRequest with workflow visualization.
     
 	PHASE 5: Shows workflow state and available actions for each request.
+	
+	Changelist rows are fully resolved by one annotated queryset
+	(select_related + team member count subquery), so the page runs a
+	constant number of queries at any page size.
 	"""
+	
+	paginator = EstimatedCountPaginator
+	show_full_result_count = False
+	raw_id_fields = ('equipment', 'assigned_technician')
+	
+	# Status is read-only: transitions go through the workflow actions below
+	actions = (
+		'assign_team_action',
+		'assign_technician_action',
+		'start_work_action',
+		'complete_work_action',
+		'scrap_action',
+	)
     
 	list_display = (
 		'id_link',
@@ -27,6 +68,7 @@ class MaintenanceRequestAdmin(admin.ModelAdmin):
 	)
     
 	list_filter = (
+		OverdueFilter,
 		'status',
 		'request_type',
 		'assigned_team',
@@ -42,6 +84,7 @@ class MaintenanceRequestAdmin(admin.ModelAdmin):
 	)
     
 	readonly_fields = (
+		'status',
 		'created_by',
 		'created_at',
 		'updated_at',
@@ -122,7 +165,10 @@ class MaintenanceRequestAdmin(admin.ModelAdmin):
 	def assigned_team_name(self, obj):
 		"""Display assigned team."""
 		if obj.assigned_team:
-			return f"{obj.assigned_team.name} ({obj.assigned_team.member_count})"
+			member_count = getattr(obj, 'team_member_count', None)
+			if member_count is None:
+				member_count = obj.assigned_team.member_count
+			return f"{obj.assigned_team.name} ({member_count})"
 		return format_html('<em>Not assigned</em>')
 	assigned_team_name.short_description = 'Team'
     
@@ -143,9 +189,16 @@ class MaintenanceRequestAdmin(admin.ModelAdmin):
 		return '—'
 	created_at_short.short_description = 'Created'
     
+	def _workflow_state(self, obj):
+		"""Compute workflow state once per object for both readonly panels."""
+		state = getattr(obj, '_admin_workflow_state', None)
+		if state is None:
+			state = obj._admin_workflow_state = obj.get_workflow_state()
+		return state
+    
 	def workflow_state_display(self, obj):
 		"""Display complete workflow state."""
-		state = obj.get_workflow_state()
+		state = self._workflow_state(obj)
         
 		html = '<table style="width: 100%; border-collapse: collapse;">'
 		html += '<tr style="background: #f3f4f6;"><td style="padding: 8px; border: 1px solid #d1d5db;"><b>ID</b></td>'
@@ -182,7 +235,7 @@ class MaintenanceRequestAdmin(admin.ModelAdmin):
     
 	def available_actions_display(self, obj):
 		"""Display available workflow actions for current user."""
-		valid_next = obj.get_workflow_state().get('valid_next_transitions', [])
+		valid_next = self._workflow_state(obj).get('valid_next_transitions', [])
         
 		html = '<div style="margin: 10px 0;">'
 		html += '<b>Valid Next Transitions:</b><br>'
@@ -205,13 +258,20 @@ class MaintenanceRequestAdmin(admin.ModelAdmin):
 	available_actions_display.short_description = 'Available Transitions'
     
 	def get_queryset(self, request):
-		"""Optimize queryset with select_related."""
-		qs = super().get_queryset(request)
+		"""Optimize queryset with select_related, team size and overdue annotations."""
+		qs = super().get_queryset(request).with_overdue()
+		member_counts = MaintenanceTeam.members.through.objects.filter(
+			maintenanceteam_id=OuterRef('assigned_team_id')
+		).order_by().values('maintenanceteam_id').annotate(
+			c=Count('*')
+		).values('c')
 		return qs.select_related(
 			'equipment',
 			'assigned_team',
 			'assigned_technician',
 			'created_by'
+		).annotate(
+			team_member_count=Subquery(member_counts, output_field=IntegerField())
 		)
     
 	def has_add_permission(self, request):
@@ -227,7 +287,91 @@ class MaintenanceRequestAdmin(admin.ModelAdmin):
 		return request.user.is_superuser
     
 	def save_model(self, request, obj, form, change):
-		"""Set created_by when creating new request."""
+		"""Set created_by and auto-assign a technician when creating new request."""
 		if not change:
 			obj.created_by = request.user
+			AssignmentEngine.auto_assign(obj)
 		super().save_model(request, obj, form, change)
+    
+	# ------------------------------------------------------------------
+	# Bulk workflow actions (routed through WorkflowEngine)
+	# ------------------------------------------------------------------
+    
+	def _run_bulk(self, request, queryset, action, **params):
+		"""Apply a BulkWorkflow action and report per-row results."""
+		result = BulkWorkflow.apply(queryset, action, request.user, **params)
+		succeeded, failed = result['succeeded'], result['failed']
+        
+		if succeeded:
+			self.message_user(
+				request,
+				f"{len(succeeded)} request(s) updated.",
+				messages.SUCCESS
+			)
+		if result['cascade']:
+			self.message_user(request, f"{result['cascade']['message']}.", messages.SUCCESS)
+        
+		# Group failures by reason so thousands of rows stay readable
+		by_reason = {}
+		for pk, reason in failed.items():
+			by_reason.setdefault(reason, []).append(pk)
+		for reason, pks in by_reason.items():
+			shown = ', '.join(f'#{pk}' for pk in pks[:20])
+			more = f' (+{len(pks) - 20} more)' if len(pks) > 20 else ''
+			self.message_user(
+				request,
+				f"{len(pks)} request(s) skipped — {reason} [{shown}{more}]",
+				messages.WARNING
+			)
+    
+	def _parameter_action(self, request, queryset, action, form_class, title, action_name):
+		"""Show an intermediate form for actions that need a parameter."""
+		if 'apply' in request.POST:
+			form = form_class(request.POST)
+			if form.is_valid():
+				self._run_bulk(request, queryset, action, **form.cleaned_data)
+				return None
+		else:
+			form = form_class()
+        
+		select_across = request.POST.get('select_across') == '1'
+		return render(request, 'admin/maintenance/maintenancerequest/bulk_action.html', {
+			**self.admin_site.each_context(request),
+			'title': title,
+			'opts': self.model._meta,
+			'form': form,
+			'action': action_name,
+			'select_across': '1' if select_across else '0',
+			'selected_count': queryset.count(),
+			'selected_ids': [] if select_across else request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+			'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+		})
+    
+	@admin.action(description='Assign team')
+	def assign_team_action(self, request, queryset):
+		return self._parameter_action(
+			request, queryset, 'assign_team', BulkAssignTeamForm,
+			'Assign team to selected requests', 'assign_team_action'
+		)
+    
+	@admin.action(description='Assign technician')
+	def assign_technician_action(self, request, queryset):
+		return self._parameter_action(
+			request, queryset, 'assign_technician', BulkAssignTechnicianForm,
+			'Assign technician to selected requests', 'assign_technician_action'
+		)
+    
+	@admin.action(description='Start work (New → In Progress)')
+	def start_work_action(self, request, queryset):
+		self._run_bulk(request, queryset, 'start')
+    
+	@admin.action(description='Complete work (In Progress → Repaired)')
+	def complete_work_action(self, request, queryset):
+		return self._parameter_action(
+			request, queryset, 'complete', BulkCompleteForm,
+			'Complete selected requests', 'complete_work_action'
+		)
+    
+	@admin.action(description='Scrap selected requests and their equipment')
+	def scrap_action(self, request, queryset):
+		self._run_bulk(request, queryset, 'scrap')
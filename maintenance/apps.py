@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class MaintenanceConfig(AppConfig):
     name = 'maintenance'
+
+    def ready(self):
+        from . import assignment, workload
+        assignment.connect_signals()
+        workload.connect_signals()
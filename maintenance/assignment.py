@@ -0,0 +1,250 @@
+"""
+Least-loaded technician auto-assignment.
+
+Each technician's open workload lives in a TechnicianLoad row that is kept
+up to date incrementally:
+
+- pre_save / post_save on MaintenanceRequest compute the request's old and
+  new contribution (technician, hours, due date) and apply the difference
+  with F() updates, so a save costs at most two single-row UPDATEs.
+- Bulk paths that bypass save() (ScrapCascade, BulkWorkflow) rebuild only
+  the affected technicians in the background step.
+- rebuild_loads() (manage.py rebuild_technician_load) reconciles everything.
+
+AssignmentEngine.pick_technician() then reads the load rows of the team's
+members (members come from the in-memory team index) with one primary-key
+lookup and picks the lowest score.
+"""
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from gearguard.db import retry_on_busy
+from teams.membership import team_index
+from .models import MaintenanceRequest, TechnicianLoad
+from .signals import requests_bulk_updated, scrap_cascade_completed
+
+
+# ============================================================================
+# LOAD INDEX MAINTENANCE
+# ============================================================================
+
+def _apply_delta(user_id, sign, hours, due_date):
+    updated = TechnicianLoad.objects.filter(user_id=user_id).update(
+        open_count=F('open_count') + sign,
+        estimated_hours=F('estimated_hours') + sign * hours,
+        due_count=F('due_count') + (sign if due_date else 0),
+        due_ordinal_sum=F('due_ordinal_sum') + (sign * due_date.toordinal() if due_date else 0),
+    )
+    if not updated:
+        # No row yet: compute it from scratch (already reflects this change)
+        rebuild_loads([user_id])
+
+
+@retry_on_busy
+def rebuild_loads(user_ids=None):
+    """
+    Recompute TechnicianLoad rows from the requests table.
+
+    Runs in one write transaction that starts by touching the rows it
+    rebuilds (on SQLite this takes the write lock), so a concurrent
+    _apply_delta waits for the upsert instead of landing between the read
+    and the upsert and being overwritten.
+
+    Args:
+        user_ids: technicians to rebuild, or None for everyone
+    """
+    qs = MaintenanceRequest.objects.filter(
+        status__in=MaintenanceRequest.OPEN_STATUSES,
+        assigned_technician__isnull=False,
+    )
+    locked = TechnicianLoad.objects.all()
+    if user_ids is not None:
+        user_ids = [pk for pk in set(user_ids) if pk]
+        if not user_ids:
+            return 0
+        qs = qs.filter(assigned_technician_id__in=user_ids)
+        locked = locked.filter(user_id__in=user_ids)
+    locked.update(open_count=F('open_count'))
+
+    loads = {}
+    for tech_id, duration, due_date in qs.values_list(
+        'assigned_technician_id', 'duration', 'due_date'
+    ).iterator():
+        load = loads.setdefault(tech_id, TechnicianLoad(user_id=tech_id))
+        load.open_count += 1
+        load.estimated_hours += duration or 0.0
+        if due_date:
+            load.due_count += 1
+            load.due_ordinal_sum += due_date.toordinal()
+
+    if user_ids is None:
+        TechnicianLoad.objects.exclude(user_id__in=list(loads)).delete()
+    else:
+        for pk in user_ids:
+            loads.setdefault(pk, TechnicianLoad(user_id=pk))
+
+    TechnicianLoad.objects.bulk_create(
+        list(loads.values()),
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['open_count', 'estimated_hours', 'due_count', 'due_ordinal_sum'],
+        batch_size=500,
+    )
+    return len(loads)
+
+
+def _on_request_pre_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if getattr(instance, '_loaded_load_state', TechnicianLoad.UNKNOWN) is TechnicianLoad.UNKNOWN:
+        if instance._state.adding:
+            instance._loaded_load_state = None
+        else:
+            previous = MaintenanceRequest.objects.filter(pk=instance.pk).values(
+                'status', 'assigned_technician_id', 'duration', 'due_date'
+            ).first()
+            instance._loaded_load_state = (
+                MaintenanceRequest(**previous).load_state() if previous else None
+            )
+
+
+def _on_request_post_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old = instance._loaded_load_state
+    new = instance.load_state()
+    if new is TechnicianLoad.UNKNOWN:
+        instance.refresh_from_db(fields=['status', 'assigned_technician', 'duration', 'due_date'])
+        new = instance.load_state()
+    if old != new:
+        if old:
+            _apply_delta(old[0], -1, old[1], old[2])
+        if new:
+            _apply_delta(new[0], 1, new[1], new[2])
+    instance._loaded_load_state = new
+
+
+def _on_request_post_delete(sender, instance, **kwargs):
+    state = getattr(instance, '_loaded_load_state', None)
+    if state is TechnicianLoad.UNKNOWN:
+        state = instance.load_state()
+    if state and state is not TechnicianLoad.UNKNOWN:
+        _apply_delta(state[0], -1, state[1], state[2])
+
+
+def _on_scrap_cascade(sender, request_ids, **kwargs):
+    technician_ids = MaintenanceRequest.objects.filter(
+        id__in=request_ids
+    ).values_list('assigned_technician_id', flat=True).distinct()
+    rebuild_loads(list(technician_ids))
+
+
+def _on_requests_bulk_updated(sender, technician_ids, **kwargs):
+    rebuild_loads(technician_ids)
+
+
+def connect_signals():
+    pre_save.connect(
+        _on_request_pre_save,
+        sender=MaintenanceRequest,
+        dispatch_uid='maintenance.assignment.pre_save',
+    )
+    post_save.connect(
+        _on_request_post_save,
+        sender=MaintenanceRequest,
+        dispatch_uid='maintenance.assignment.post_save',
+    )
+    post_delete.connect(
+        _on_request_post_delete,
+        sender=MaintenanceRequest,
+        dispatch_uid='maintenance.assignment.post_delete',
+    )
+    scrap_cascade_completed.connect(
+        _on_scrap_cascade,
+        dispatch_uid='maintenance.assignment.scrap_cascade',
+    )
+    requests_bulk_updated.connect(
+        _on_requests_bulk_updated,
+        dispatch_uid='maintenance.assignment.bulk_updated',
+    )
+
+
+# ============================================================================
+# ASSIGNMENT ENGINE
+# ============================================================================
+
+class AssignmentEngine:
+    """
+    Picks the least-loaded technician of a team.
+
+    score = open_count * COUNT_WEIGHT
+          + estimated_hours
+          + due_count * DUE_WEIGHT * pressure
+
+    where pressure grows from 0 (average due date DUE_HORIZON_DAYS or more
+    away) to 1 (due today) and up to 2 for overdue work. Ties go to the
+    equipment's default technician, then to the lowest user id.
+    """
+
+    COUNT_WEIGHT = 2.0       # hours-equivalent per open request
+    DUE_WEIGHT = 4.0         # hours-equivalent per request due now
+    DUE_HORIZON_DAYS = 7
+
+    @staticmethod
+    def score(load, today=None):
+        if load is None:
+            return 0.0
+        today = today or timezone.localdate()
+        value = load.open_count * AssignmentEngine.COUNT_WEIGHT + load.estimated_hours
+        average_due = load.average_due_ordinal
+        if average_due is not None:
+            days_left = average_due - today.toordinal()
+            pressure = 1 - days_left / AssignmentEngine.DUE_HORIZON_DAYS
+            pressure = min(max(pressure, 0.0), 2.0)
+            value += load.due_count * AssignmentEngine.DUE_WEIGHT * pressure
+        return value
+
+    @staticmethod
+    def pick_technician(team_id, preferred_id=None):
+        """
+        Return the user id of the least-loaded member of team_id, or None
+        if the team has no members.
+        """
+        member_ids = team_index.members(team_id)
+        if not member_ids:
+            return None
+
+        loads = TechnicianLoad.objects.in_bulk(list(member_ids))
+        today = timezone.localdate()
+        return min(
+            member_ids,
+            key=lambda pk: (
+                AssignmentEngine.score(loads.get(pk), today),
+                pk != preferred_id,
+                pk,
+            ),
+        )
+
+    @staticmethod
+    def auto_assign(request_obj):
+        """
+        Fill assigned_team (from the equipment default) and
+        assigned_technician (least loaded) on an unsaved request.
+        Existing assignments are left untouched. Does not save.
+
+        Returns the chosen technician id or None.
+        """
+        equipment = request_obj.equipment
+        if not request_obj.assigned_team_id and equipment.default_maintenance_team_id:
+            request_obj.assigned_team_id = equipment.default_maintenance_team_id
+        if request_obj.assigned_technician_id or not request_obj.assigned_team_id:
+            return request_obj.assigned_technician_id
+
+        technician_id = AssignmentEngine.pick_technician(
+            request_obj.assigned_team_id,
+            preferred_id=equipment.default_technician_id,
+        )
+        request_obj.assigned_technician_id = technician_id
+        return technician_id
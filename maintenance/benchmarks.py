@@ -0,0 +1,273 @@
+"""
+HTTP endpoint benchmarks.
+
+run_benchmarks() seeds a throwaway test database at each requested scale
+(see maintenance.loadgen), drives the hot endpoints through the Django
+test client as a manager and records, per scenario:
+
+- p50 / p95 / mean latency (ms) over the timed iterations
+- SQL query count of one request
+- peak traced Python memory (KiB) of one request, measured in a separate
+  pass so tracemalloc overhead does not skew the latency figures
+
+compare() checks a result set against a saved baseline and returns the
+regressions beyond a relative threshold. Results and baselines share the
+same JSON layout:
+
+    {"meta": {...}, "results": {"<scale>": {"<scenario>": {...}}}}
+"""
+
+import json
+import math
+import platform
+import time
+import tracemalloc
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment,
+)
+from django.utils import timezone
+
+from . import loadgen
+from .models import MaintenanceRequest
+
+
+DEFAULT_ITERATIONS = 20
+DEFAULT_WARMUP = 2
+DEFAULT_THRESHOLD = 0.25     # 25% slower / larger than baseline
+MIN_LATENCY_DELTA_MS = 1.0   # ignore sub-millisecond noise
+MIN_MEMORY_DELTA_KB = 64
+
+
+# ============================================================================
+# SCENARIOS
+# ============================================================================
+# Each scenario maps (context, iteration) -> (method, path, data). The
+# context holds sample ids picked once per dataset by build_context().
+
+def _kanban_data(ctx, i):
+    return 'get', '/maintenance/api/kanban-data/', {'per_column': 50}
+
+
+def _kanban_move(ctx, i):
+    # A different New card every time so each call is a real transition
+    ids = ctx['movable_ids'] or [ctx['request_id']]
+    return 'post', '/maintenance/api/kanban-move/', json.dumps({
+        'id': ids[i % len(ids)], 'new_status': 'In Progress',
+    })
+
+
+def _calendar_data(ctx, i):
+    return 'get', '/maintenance/api/calendar-data/', {'year': ctx['year'], 'month': ctx['month']}
+
+
+def _equipment_details(ctx, i):
+    return 'get', '/maintenance/api/equipment-details/', {'equipment_id': ctx['equipment_id']}
+
+
+def _request_detail(ctx, i):
+    return 'get', f"/maintenance/request/{ctx['request_id']}/", {}
+
+
+def _report(name):
+    def scenario(ctx, i):
+        return 'get', f'/maintenance/reports/{name}/', {'format': 'json'}
+    return scenario
+
+
+SCENARIOS = {
+    'kanban_data': _kanban_data,
+    'kanban_move': _kanban_move,
+    'calendar_data': _calendar_data,
+    'get_equipment_details': _equipment_details,
+    'request_detail': _request_detail,
+    'report_team_requests': _report('team-requests'),
+    'report_equipment_requests': _report('equipment-requests'),
+    'report_department_requests': _report('department-requests'),
+}
+
+
+def build_context(dataset, calls):
+    """Pick sample ids for the scenarios from a generated dataset."""
+    today = timezone.localdate()
+    sample = MaintenanceRequest.objects.filter(
+        equipment__is_scrapped=False
+    ).order_by('id').values_list('id', 'equipment_id').first()
+    return {
+        'year': today.year,
+        'month': today.month,
+        'request_id': sample[0],
+        'equipment_id': sample[1],
+        'movable_ids': list(
+            MaintenanceRequest.objects.filter(
+                status='New', assigned_technician__isnull=False
+            ).order_by('id').values_list('id', flat=True)[:calls]
+        ),
+        'manager_id': dataset['manager_id'],
+    }
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def percentile(samples, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def _call(client, method, path, data):
+    if method == 'post':
+        return client.post(path, data, content_type='application/json')
+    return client.get(path, data)
+
+
+def measure(client, scenario, ctx, iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP):
+    """Run one scenario and return its latency/query/memory summary."""
+    call = 0
+    for _ in range(warmup):
+        _call(client, *scenario(ctx, call))
+        call += 1
+
+    timings = []
+    queries = None
+    status = None
+    for _ in range(iterations):
+        request = scenario(ctx, call)
+        call += 1
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = _call(client, *request)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = len(captured)
+        status = response.status_code
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        _call(client, *scenario(ctx, call))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'queries': queries,
+        'peak_kb': round(peak / 1024, 1),
+        'status': status,
+        'iterations': iterations,
+    }
+
+
+def run_benchmarks(scales, preset='tiny', seed=0, iterations=DEFAULT_ITERATIONS,
+                   warmup=DEFAULT_WARMUP, scenarios=None, log=None):
+    """
+    Benchmark the scenarios on a fresh test database per scale.
+
+    Args:
+        scales: iterable of multipliers for the preset (e.g. [1, 10])
+        preset: loadgen preset name
+        scenarios: subset of SCENARIOS names, or None for all
+
+    Returns: {'meta': {...}, 'results': {'<preset>x<scale>': {scenario: summary}}}
+    """
+    log = log or (lambda msg: None)
+    names = list(scenarios or SCENARIOS)
+    results = {}
+
+    setup_test_environment()
+    try:
+        for scale in scales:
+            label = f'{preset}x{scale:g}'
+            old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+            try:
+                sizes = loadgen.sizes_for(preset, scale=scale)
+                log(f'Seeding {label}: ' + ', '.join(f'{k}={v:,}' for k, v in sizes.items()))
+                dataset = loadgen.generate(sizes, seed=seed, prefix='BENCH')
+                cache.clear()
+
+                ctx = build_context(dataset, calls=warmup + iterations + 1)
+                client = Client()
+                client.force_login(get_user_model().objects.get(pk=ctx['manager_id']))
+
+                results[label] = {}
+                for name in names:
+                    summary = measure(client, SCENARIOS[name], ctx, iterations, warmup)
+                    results[label][name] = summary
+                    log(
+                        f"  {name:<28} p50 {summary['p50_ms']:>8.2f} ms  "
+                        f"p95 {summary['p95_ms']:>8.2f} ms  "
+                        f"{summary['queries']:>3} queries  {summary['peak_kb']:>9.1f} KiB"
+                    )
+            finally:
+                teardown_databases(old_config, verbosity=0)
+    finally:
+        teardown_test_environment()
+
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'preset': preset,
+            'scales': list(scales),
+            'seed': seed,
+            'iterations': iterations,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+        },
+        'results': results,
+    }
+
+
+# ============================================================================
+# BASELINES
+# ============================================================================
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Return a list of regression messages of `current` against `baseline`.
+
+    - queries: any increase is a regression (counts are deterministic)
+    - p95_ms / peak_kb: regression when more than `threshold` above the
+      baseline and above a small absolute noise floor
+    """
+    regressions = []
+    for scale, scenarios in current['results'].items():
+        base_scenarios = baseline.get('results', {}).get(scale)
+        if not base_scenarios:
+            continue
+        for name, now in scenarios.items():
+            base = base_scenarios.get(name)
+            if not base:
+                continue
+            where = f'{scale} {name}'
+            if now['queries'] is not None and base.get('queries') is not None \
+                    and now['queries'] > base['queries']:
+                regressions.append(f"{where}: queries {base['queries']} -> {now['queries']}")
+            if now['p95_ms'] > base['p95_ms'] * (1 + threshold) \
+                    and now['p95_ms'] - base['p95_ms'] > MIN_LATENCY_DELTA_MS:
+                regressions.append(f"{where}: p95 {base['p95_ms']:.2f} ms -> {now['p95_ms']:.2f} ms")
+            if now['peak_kb'] > base['peak_kb'] * (1 + threshold) \
+                    and now['peak_kb'] - base['peak_kb'] > MIN_MEMORY_DELTA_KB:
+                regressions.append(f"{where}: peak memory {base['peak_kb']:.0f} KiB -> {now['peak_kb']:.0f} KiB")
+    return regressions
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -1,5 +1,7 @@
 from django import forms
+from django.contrib.auth.models import User
 from .models import MaintenanceRequest
+from teams.models import MaintenanceTeam
 
 class MaintenanceRequestForm(forms.ModelForm):
     class Meta:
@@ -15,3 +17,21 @@ class MaintenanceRequestForm(forms.ModelForm):
             cleaned_data['assigned_technician'] = equipment.default_technician
 
         return cleaned_data
+
+
+# ============================================================================
+# ADMIN BULK ACTION FORMS
+# ============================================================================
+
+class BulkAssignTeamForm(forms.Form):
+    team = forms.ModelChoiceField(queryset=MaintenanceTeam.objects.all())
+
+
+class BulkAssignTechnicianForm(forms.Form):
+    technician = forms.ModelChoiceField(
+        queryset=User.objects.filter(maintenance_teams__isnull=False).distinct().order_by('username')
+    )
+
+
+class BulkCompleteForm(forms.Form):
+    duration = forms.FloatField(min_value=0.01, help_text="Hours spent, applied to every selected request")
@@ -0,0 +1,452 @@
+"""
+Deterministic synthetic data for load and performance testing.
+
+generate() writes teams, technicians, requesters, an equipment hierarchy
+and maintenance requests with realistic distributions. Everything is
+drawn from one seeded random.Random, every date is relative to a fixed
+anchor day (today unless given), password hashes use a seed-derived salt
+and primary keys are assigned up front, so the same seed, sizes and
+anchor on an empty database always produce the same rows.
+
+Rows are written in chunks, one transaction per chunk, so memory stays
+flat and millions of requests load in minutes: bulk_create for the small
+tables, and plain multi-row INSERTs (executemany) for equipment, closure
+rows and requests, where model instantiation and per-value preparation
+in bulk_create would dominate. Neither path runs save() or signals, so
+the derived state those normally maintain (equipment closure rows,
+TechnicianLoad, membership/dimension/workload caches) is written or
+invalidated explicitly at the end.
+"""
+
+import random
+import time
+from array import array
+from datetime import datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from equipment.models import Department, Equipment, EquipmentClosure, Location
+from teams.membership import team_index
+from teams.models import MaintenanceTeam
+from .assignment import rebuild_loads
+from .models import MaintenanceRequest
+from .workload import invalidate_workload
+
+
+# Named size presets; explicit sizes override individual knobs
+PRESETS = {
+    'tiny': {
+        'teams': 3, 'technicians_per_team': 3, 'requesters': 5,
+        'departments': 4, 'locations': 8, 'equipment': 50, 'requests': 500,
+    },
+    'small': {
+        'teams': 10, 'technicians_per_team': 4, 'requesters': 20,
+        'departments': 8, 'locations': 40, 'equipment': 2_000, 'requests': 50_000,
+    },
+    'medium': {
+        'teams': 100, 'technicians_per_team': 5, 'requesters': 200,
+        'departments': 20, 'locations': 200, 'equipment': 20_000, 'requests': 1_000_000,
+    },
+    'production': {
+        'teams': 500, 'technicians_per_team': 6, 'requesters': 2_000,
+        'departments': 40, 'locations': 1_000, 'equipment': 200_000, 'requests': 10_000_000,
+    },
+}
+
+DEFAULT_PRESET = 'small'
+DEFAULT_CHUNK_SIZE = 5_000
+HISTORY_DAYS = 730
+ROOT_RATIO = 0.05        # share of equipment that are top-level lines
+SCRAPPED_RATIO = 0.02
+PREVENTIVE_RATIO = 0.3
+RECENT_DAYS = 60         # requests younger than this are mostly still open
+PASSWORD = 'loadtest'
+
+
+def sizes_for(preset=DEFAULT_PRESET, scale=1.0, **overrides):
+    """
+    Resolve generator sizes from a preset, a multiplier and overrides.
+
+    `scale` multiplies the row counts (equipment, requests, requesters,
+    teams) so benchmarks can seed 1x / 10x / 100x of the same shape.
+    """
+    sizes = dict(PRESETS[preset])
+    for key in ('teams', 'requesters', 'equipment', 'requests'):
+        sizes[key] = max(1, int(round(sizes[key] * scale)))
+    sizes.update({k: v for k, v in overrides.items() if v is not None})
+    return sizes
+
+
+def default_anchor():
+    """Today in the current time zone: the anchor day when none is given."""
+    return timezone.localdate()
+
+
+def _next_id(model):
+    return (model.objects.aggregate(m=Max('pk'))['m'] or 0) + 1
+
+
+class LoadGenerator:
+    """
+    One generation run. Use generate() rather than instantiating directly.
+    """
+
+    def __init__(self, sizes, seed=0, prefix='LT', chunk_size=DEFAULT_CHUNK_SIZE, log=None, anchor=None):
+        self.sizes = sizes
+        self.seed = seed
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.rand = random.Random(seed)
+        self.log = log or (lambda msg: None)
+        # "Now" of the dataset: midnight of the anchor day
+        self.now = timezone.make_aware(datetime.combine(anchor or default_anchor(), datetime.min.time()))
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _bulk(self, model, rows, label):
+        """bulk_create an iterable in chunks, one transaction per chunk."""
+        started = time.monotonic()
+        total = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                total += self._flush(model, chunk)
+                chunk = []
+                if total % (self.chunk_size * 20) == 0:
+                    self.log(f'  {label}: {total:,}')
+        if chunk:
+            total += self._flush(model, chunk)
+        self.log(f'✓ {label}: {total:,} rows in {time.monotonic() - started:.1f}s')
+        return total
+
+    @staticmethod
+    def _flush(model, chunk):
+        with transaction.atomic():
+            model.objects.bulk_create(chunk)
+        return len(chunk)
+
+    def _insert(self, model, fields, rows, label):
+        """
+        INSERT plain value tuples (in `fields` order) in chunks, one
+        transaction per chunk. Dates and datetimes are adapted for the
+        backend; everything else must already be a DB-ready value.
+        """
+        opts = model._meta
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(opts.db_table),
+            ', '.join(quote(opts.get_field(name).column) for name in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        adapt = {
+            'DateTimeField': connection.ops.adapt_datetimefield_value,
+            'DateField': connection.ops.adapt_datefield_value,
+        }
+        adapters = [
+            (i, adapt[opts.get_field(name).get_internal_type()])
+            for i, name in enumerate(fields)
+            if opts.get_field(name).get_internal_type() in adapt
+        ]
+
+        started = time.monotonic()
+        total = 0
+        chunk = []
+
+        def flush():
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, chunk)
+            return len(chunk)
+
+        for row in rows:
+            row = list(row)
+            for i, adapter in adapters:
+                if row[i] is not None:
+                    row[i] = adapter(row[i])
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                total += flush()
+                chunk = []
+                if total % (self.chunk_size * 20) == 0:
+                    self.log(f'  {label}: {total:,}')
+        if chunk:
+            total += flush()
+        self.log(f'✓ {label}: {total:,} rows in {time.monotonic() - started:.1f}s')
+        return total
+
+    def _moment(self, days_ago):
+        return self.now - timedelta(days=days_ago, seconds=self.rand.randrange(86400))
+
+    # ------------------------------------------------------------------
+    # Steps
+    # ------------------------------------------------------------------
+
+    def check_prefix(self):
+        marker = f'{self.prefix.lower()}_'
+        if User.objects.filter(username__startswith=marker).exists():
+            raise ValueError(
+                f"Data with prefix '{self.prefix}' already exists; "
+                f"use another prefix or start from an empty database."
+            )
+
+    def create_dimensions(self):
+        self.departments = [
+            Department.get_for_name(f'{self.prefix} Department {i}').pk
+            for i in range(1, self.sizes['departments'] + 1)
+        ]
+        self.locations = [
+            Location.get_for_name(f'{self.prefix} Building {i // 10 + 1}, Bay {i % 10 + 1}').pk
+            for i in range(self.sizes['locations'])
+        ]
+        self.log(f'✓ dimensions: {len(self.departments)} departments, {len(self.locations)} locations')
+
+    def create_people(self):
+        prefix = self.prefix.lower()
+        password = make_password(PASSWORD, salt=f'loadgen{abs(self.seed)}')
+        teams = self.sizes['teams']
+        per_team = self.sizes['technicians_per_team']
+        technicians = teams * per_team
+        requesters = self.sizes['requesters']
+
+        start = _next_id(User)
+        self.manager_id = start
+        self.technician_ids = list(range(start + 1, start + 1 + technicians))
+        self.requester_ids = list(range(start + 1 + technicians, start + 1 + technicians + requesters))
+
+        def users():
+            yield User(
+                id=self.manager_id, username=f'{prefix}_manager', password=password,
+                first_name='Load', last_name='Manager', is_staff=True, is_superuser=True,
+                date_joined=self.now,
+            )
+            for n, pk in enumerate(self.technician_ids, 1):
+                yield User(id=pk, username=f'{prefix}_tech_{n}', password=password,
+                           first_name='Tech', last_name=str(n), date_joined=self.now)
+            for n, pk in enumerate(self.requester_ids, 1):
+                yield User(id=pk, username=f'{prefix}_user_{n}', password=password,
+                           first_name='User', last_name=str(n), date_joined=self.now)
+
+        self._bulk(User, users(), 'users')
+
+        team_start = _next_id(MaintenanceTeam)
+        self.team_ids = list(range(team_start, team_start + teams))
+        self._bulk(MaintenanceTeam, (
+            MaintenanceTeam(id=pk, name=f'{self.prefix} Team {n}', description='Synthetic load-test team')
+            for n, pk in enumerate(self.team_ids, 1)
+        ), 'teams')
+        # bulk_create stamps auto_now fields with the wall clock
+        MaintenanceTeam.objects.filter(id__in=self.team_ids).update(created_at=self.now, updated_at=self.now)
+
+        # Each technician belongs to their home team; a quarter also help a
+        # neighbouring team, so membership is not perfectly partitioned
+        self.team_members = {pk: [] for pk in self.team_ids}
+        for i, tech in enumerate(self.technician_ids):
+            home = self.team_ids[i // per_team]
+            self.team_members[home].append(tech)
+            if teams > 1 and self.rand.random() < 0.25:
+                other = self.team_ids[(i // per_team + 1) % teams]
+                self.team_members[other].append(tech)
+
+        Membership = MaintenanceTeam.members.through
+        self._bulk(Membership, (
+            Membership(maintenanceteam_id=team, user_id=user)
+            for team, members in self.team_members.items() for user in members
+        ), 'team memberships')
+
+        group, _ = Group.objects.get_or_create(name='Technician')
+        GroupLink = User.groups.through
+        self._bulk(GroupLink, (
+            GroupLink(user_id=pk, group_id=group.pk) for pk in self.technician_ids
+        ), 'technician group links')
+
+    def create_equipment(self):
+        count = self.sizes['equipment']
+        roots = max(1, int(count * ROOT_RATIO))
+        start = _next_id(Equipment)
+        self.equipment_start = start
+        # Per-asset default team (index into team_ids) and scrapped flag,
+        # kept as compact arrays for the request step
+        self.equipment_team = array('i')
+        self.equipment_scrapped = bytearray(count)
+        parents = array('i')
+
+        rand = self.rand
+        fields = (
+            'id', 'name', 'serial_number', 'parent', 'department', 'location',
+            'default_maintenance_team', 'default_technician', 'assigned_employee',
+            'purchase_date', 'warranty_expiry_date', 'is_scrapped', 'created_at', 'updated_at',
+        )
+
+        def rows():
+            for i in range(count):
+                pk = start + i
+                team_pos = rand.randrange(len(self.team_ids))
+                team = self.team_ids[team_pos]
+                parent = start + rand.randrange(roots) if i >= roots else 0
+                scrapped = rand.random() < SCRAPPED_RATIO
+                self.equipment_team.append(team_pos)
+                self.equipment_scrapped[i] = scrapped
+                parents.append(parent)
+                members = self.team_members[team]
+                created = self._moment(rand.randrange(HISTORY_DAYS, HISTORY_DAYS * 3))
+                yield (
+                    pk,
+                    f'{"Line" if i < roots else "Asset"} {self.prefix}-{i + 1}',
+                    f'{self.prefix}-{self.seed}-{pk:09d}',
+                    parent or None,
+                    rand.choice(self.departments),
+                    rand.choice(self.locations),
+                    team,
+                    rand.choice(members) if members and rand.random() < 0.6 else None,
+                    rand.choice(self.requester_ids) if self.requester_ids else None,
+                    created.date(),
+                    created.date() + timedelta(days=rand.choice((365, 730, 1095))),
+                    scrapped,
+                    created,
+                    created,
+                )
+
+        self._insert(Equipment, fields, rows(), 'equipment')
+
+        # Closure rows: every node to itself, children to their line
+        def closure():
+            for i in range(count):
+                pk = start + i
+                yield (pk, pk, 0)
+                if parents[i]:
+                    yield (parents[i], pk, 1)
+
+        self._insert(EquipmentClosure, ('ancestor', 'descendant', 'depth'), closure(), 'equipment closure')
+
+    def _request_status(self, age_days):
+        r = self.rand.random()
+        if age_days > RECENT_DAYS:
+            return 'Repaired' if r < 0.9 else 'Scrap' if r < 0.95 else 'In Progress' if r < 0.98 else 'New'
+        return 'New' if r < 0.35 else 'In Progress' if r < 0.65 else 'Repaired' if r < 0.98 else 'Scrap'
+
+    def create_requests(self):
+        count = self.sizes['requests']
+        equipment_count = self.sizes['equipment']
+        start = _next_id(MaintenanceRequest)
+        rand = self.rand
+        subjects = {
+            'Corrective': ('Hydraulic leak', 'Motor failure', 'Unusual vibration', 'Belt slipping',
+                           'Sensor fault', 'Overheating', 'Electrical trip', 'Jammed feeder'),
+            'Preventive': ('Monthly inspection', 'Quarterly service', 'Lubrication round',
+                           'Filter replacement', 'Calibration check', 'Safety audit'),
+        }
+
+        fields = (
+            'id', 'subject', 'request_type', 'equipment', 'assigned_team',
+            'assigned_technician', 'status', 'created_by', 'scheduled_date',
+            'due_date', 'duration', 'created_at', 'updated_at',
+        )
+
+        def rows():
+            for i in range(count):
+                # Skewed towards low indexes: a minority of assets draws most work
+                eq_offset = int(equipment_count * rand.random() ** 2)
+                if self.equipment_scrapped[eq_offset] and rand.random() < 0.9:
+                    eq_offset = (eq_offset + 1) % equipment_count
+                team = self.team_ids[self.equipment_team[eq_offset]]
+                members = self.team_members[team]
+
+                # More requests in the recent past than long ago
+                age = int(rand.triangular(0, HISTORY_DAYS, 0))
+                created = self._moment(age)
+                status = self._request_status(age)
+                request_type = 'Preventive' if rand.random() < PREVENTIVE_RATIO else 'Corrective'
+
+                assigned = members and (status != 'New' or rand.random() < 0.5)
+                due = created.date() + timedelta(days=rand.randint(3, 21)) if rand.random() < 0.8 else None
+                if status in ('Repaired', 'Scrap'):
+                    duration = round(rand.lognormvariate(0.7, 0.6), 1)
+                else:
+                    duration = round(rand.lognormvariate(0.7, 0.6), 1) if rand.random() < 0.5 else None
+                updated = created if status == 'New' else min(
+                    self.now, created + timedelta(hours=rand.randint(1, 24 * 14))
+                )
+
+                yield (
+                    start + i,
+                    f'{rand.choice(subjects[request_type])} #{i + 1}',
+                    request_type,
+                    self.equipment_start + eq_offset,
+                    team,
+                    rand.choice(members) if assigned else None,
+                    status,
+                    rand.choice(self.requester_ids) if self.requester_ids else self.manager_id,
+                    (
+                        created.date() + timedelta(days=rand.randint(1, 30))
+                        if request_type == 'Preventive' else None
+                    ),
+                    due,
+                    duration,
+                    created,
+                    updated,
+                )
+
+        self._insert(MaintenanceRequest, fields, rows(), 'maintenance requests')
+
+    def finish(self):
+        """Rebuild or invalidate derived state the bulk inserts bypassed."""
+        # Primary keys were assigned explicitly; move sequences past them
+        # (no-op on SQLite)
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [User, MaintenanceTeam, Equipment, MaintenanceRequest]
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+        technicians = rebuild_loads()
+        team_index.invalidate()
+        Department.invalidate_cache()
+        Location.invalidate_cache()
+        invalidate_workload()
+        self.log(f'✓ rebuilt technician load for {technicians} technician(s) and invalidated caches')
+
+    def run(self):
+        self.check_prefix()
+        self.create_dimensions()
+        self.create_people()
+        self.create_equipment()
+        self.create_requests()
+        self.finish()
+        return {
+            'manager_id': self.manager_id,
+            'technician_ids': self.technician_ids,
+            'requester_ids': self.requester_ids,
+            'team_ids': self.team_ids,
+            'equipment_ids': range(self.equipment_start, self.equipment_start + self.sizes['equipment']),
+        }
+
+
+def generate(sizes, seed=0, prefix='LT', chunk_size=DEFAULT_CHUNK_SIZE, log=None, anchor=None):
+    """
+    Generate a synthetic dataset.
+
+    Args:
+        sizes: dict from sizes_for()
+        seed: random seed; same seed + sizes + anchor on an empty DB = same rows
+        prefix: marker for generated names/usernames (must be unused)
+        chunk_size: rows per insert transaction
+        log: optional callable(str) for progress lines
+        anchor: date the dataset is generated "as of" (default: today)
+
+    Returns: dict with manager_id, technician_ids, requester_ids,
+    team_ids and equipment_ids of the generated rows.
+
+    Raises:
+        ValueError: If data with this prefix already exists
+    """
+    return LoadGenerator(
+        sizes, seed=seed, prefix=prefix, chunk_size=chunk_size, log=log, anchor=anchor,
+    ).run()
@@ -0,0 +1,337 @@
+"""
+Concurrent HTTP load test against a running server.
+
+plan_workers() reads a dataset made by generate_load_data (see loadgen)
+and gives every simulated user its own plan: a role, a login and the
+rows it may act on. Rows are partitioned between workers, so two workers
+never try to move the same card and workflow rejections mean real
+contention rather than a test artefact.
+
+Each worker logs in over HTTP and, until the deadline, picks operations
+from its role's weighted mix (ROLE_MIX):
+
+- kanban_data:    poll the board (GET /maintenance/api/kanban-data/)
+- kanban_move:    start one of its New cards, or complete one it started
+- create_request: post the new-request form (Corrective)
+- report:         one of the three JSON reports (managers)
+
+Workers run as threads or, to take the client off the GIL, processes;
+they only speak HTTP, so any server (runserver, gunicorn, ...) works.
+
+summarize() reports throughput, error rates by kind and latency
+percentiles per operation. Errors whose body mentions "database is
+locked" (SQLite busy timeouts) are counted separately from other 5xx.
+"""
+
+import http.cookiejar
+import json
+import random
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+
+from equipment.models import Equipment
+from . import loadgen
+from .benchmarks import percentile
+from .models import MaintenanceRequest
+
+
+ROLE_MIX = {
+    'technician': {'kanban_data': 65, 'kanban_move': 30, 'create_request': 5},
+    'manager': {'kanban_data': 40, 'kanban_move': 15, 'report': 35, 'create_request': 10},
+    'viewer': {'kanban_data': 85, 'create_request': 15},
+}
+DEFAULT_ROLES = {'technician': 3, 'manager': 1, 'viewer': 2}
+REPORTS = ('team-requests', 'equipment-requests', 'department-requests')
+LOCKED = 'database is locked'
+MOVES_PER_WORKER = 500
+
+
+# ============================================================================
+# PLANS
+# ============================================================================
+
+def parse_roles(text):
+    """'technician=3,manager=1' -> {'technician': 3, 'manager': 1}"""
+    roles = {}
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in ROLE_MIX:
+            raise ValueError(f"Unknown role '{name}' (choose from {', '.join(sorted(ROLE_MIX))})")
+        roles[name] = int(weight or 1)
+    if not roles or sum(roles.values()) < 1:
+        raise ValueError('At least one role needs a positive weight')
+    return roles
+
+
+def _split(ids, parts):
+    return [ids[i::parts] for i in range(parts)]
+
+
+def plan_workers(base_urls, workers, roles=None, prefix='LT', duration=30.0, think=0.0, seed=0):
+    """
+    Build one plan (a picklable dict) per worker.
+
+    Roles are handed out round-robin in proportion to their weights, and
+    workers round-robin over base_urls (several server processes sharing
+    one database).
+
+    Raises:
+        ValueError: If the prefix has no generated dataset
+    """
+    roles = roles or DEFAULT_ROLES
+    prefix = prefix.lower()
+    cycle = [role for role, weight in roles.items() for _ in range(weight)]
+    assigned = [cycle[i % len(cycle)] for i in range(workers)]
+
+    manager = User.objects.filter(username=f'{prefix}_manager').first()
+    technicians = list(User.objects.filter(username__startswith=f'{prefix}_tech_').order_by('id'))
+    viewers = list(User.objects.filter(username__startswith=f'{prefix}_user_').order_by('id'))
+    if manager is None or not technicians:
+        raise ValueError(f"No load-test data with prefix '{prefix}'; run generate_load_data first")
+    viewers = viewers or technicians
+
+    open_requests = MaintenanceRequest.objects.filter(
+        equipment__is_scrapped=False, assigned_technician__isnull=False,
+    ).order_by('id')
+
+    def moves(technician_ids, exclude=False, limit=MOVES_PER_WORKER):
+        qs = open_requests.exclude if exclude else open_requests.filter
+        rows = qs(assigned_technician_id__in=technician_ids)
+        return (
+            list(rows.filter(status='New').values_list('id', flat=True)[:limit]),
+            list(rows.filter(status='In Progress').values_list('id', flat=True)[:limit]),
+        )
+
+    # Technician workers act on their own cards; managers on everyone else's
+    tech_workers = [i for i, role in enumerate(assigned) if role == 'technician']
+    manager_workers = [i for i, role in enumerate(assigned) if role == 'manager']
+    tech_for = {i: technicians[n % len(technicians)] for n, i in enumerate(tech_workers)}
+    sharing = {}
+    for i, tech in tech_for.items():
+        sharing.setdefault(tech.pk, []).append(i)
+    work = {}
+    for tech_id, indexes in sharing.items():
+        new, in_progress = moves([tech_id])
+        for i, n, p in zip(indexes, _split(new, len(indexes)), _split(in_progress, len(indexes))):
+            work[i] = (n, p)
+    if manager_workers:
+        new, in_progress = moves(list(sharing), exclude=True, limit=MOVES_PER_WORKER * len(manager_workers))
+        for i, n, p in zip(manager_workers, _split(new, len(manager_workers)),
+                           _split(in_progress, len(manager_workers))):
+            work[i] = (n, p)
+
+    equipment_ids = list(
+        Equipment.objects.filter(is_scrapped=False, default_maintenance_team__isnull=False)
+        .order_by('id').values_list('id', flat=True)[:500]
+    )
+
+    plans = []
+    for i, role in enumerate(assigned):
+        user = {
+            'technician': tech_for.get(i),
+            'manager': manager,
+            'viewer': viewers[i % len(viewers)],
+        }[role]
+        new, in_progress = work.get(i, ([], []))
+        plans.append({
+            'index': i,
+            'role': role,
+            'username': user.username,
+            'password': loadgen.PASSWORD,
+            'base_url': base_urls[i % len(base_urls)].rstrip('/'),
+            'duration': duration,
+            'think': think,
+            'seed': seed * 1000 + i,
+            'weights': ROLE_MIX[role],
+            'new_ids': new,
+            'in_progress_ids': in_progress,
+            'equipment_ids': equipment_ids,
+        })
+    return plans
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Session:
+    """A logged-in browser session: cookies, CSRF token, no redirect following."""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect()
+        )
+
+    def cookie(self, name):
+        return next((c.value for c in self.cookies if c.name == name), '')
+
+    def request(self, method, path, params=None, form=None, body=None):
+        """Returns (status, body bytes); status 0 on connection errors."""
+        url = self.base_url + path
+        if params:
+            url += '?' + urllib.parse.urlencode(params)
+        headers = {'X-CSRFToken': self.cookie('csrftoken'), 'Referer': self.base_url + '/'}
+        data = None
+        if form is not None:
+            data = urllib.parse.urlencode(dict(form, csrfmiddlewaretoken=self.cookie('csrftoken'))).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(url, data=data, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+        except (urllib.error.URLError, OSError) as e:
+            return 0, str(e).encode()
+
+    def login(self, username, password):
+        """Returns (status, body) of the login POST; 302 on success."""
+        self.request('GET', '/accounts/login/')
+        return self.request('POST', '/accounts/login/', form={'username': username, 'password': password})
+
+
+def _operation(name, plan, session, rand, state):
+    """Run one operation. Returns (status, body, expected status)."""
+    if name == 'kanban_move':
+        if state['in_progress']:
+            card = state['in_progress'].pop()
+            status, body = session.request('POST', '/maintenance/api/kanban-move/', body={
+                'id': card, 'new_status': 'Repaired', 'duration': 1.5,
+            })
+            return status, body, 200
+        if state['new']:
+            card = state['new'].pop()
+            status, body = session.request('POST', '/maintenance/api/kanban-move/', body={
+                'id': card, 'new_status': 'In Progress',
+            })
+            if status == 200:
+                state['in_progress'].append(card)
+            return status, body, 200
+        name = 'kanban_data'   # nothing left to move
+    if name == 'create_request' and plan['equipment_ids']:
+        status, body = session.request('POST', '/maintenance/request/new/', form={
+            'subject': f"Load test {plan['index']}",
+            'request_type': 'Corrective',
+            'equipment': rand.choice(plan['equipment_ids']),
+        })
+        return status, body, 302
+    if name == 'report':
+        status, body = session.request(
+            'GET', f'/maintenance/reports/{rand.choice(REPORTS)}/', params={'format': 'json'}
+        )
+        return status, body, 200
+    status, body = session.request('GET', '/maintenance/api/kanban-data/', params={'per_column': 50})
+    return status, body, 200
+
+
+def classify(status, body, expected):
+    """None for success, else the error kind."""
+    if status == expected:
+        return None
+    if status == 0:
+        return 'connection'
+    if LOCKED.encode() in body:
+        return LOCKED
+    return f'http_{status}'
+
+
+def run_worker(plan):
+    """
+    Log in and replay the plan's mix until its deadline.
+
+    Returns {'role', 'samples': [[operation, latency ms, error kind or None], ...]}.
+    """
+    rand = random.Random(plan['seed'])
+    session = Session(plan['base_url'])
+    started = time.perf_counter()
+    status, body = session.login(plan['username'], plan['password'])
+    login = ['login', round((time.perf_counter() - started) * 1000, 3), classify(status, body, 302)]
+    if not login[2] and not session.cookie('sessionid'):
+        login[2] = 'login_failed'
+    if login[2]:
+        return {'role': plan['role'], 'samples': [login]}
+
+    names = list(plan['weights'])
+    weights = [plan['weights'][n] for n in names]
+    state = {'new': list(plan['new_ids']), 'in_progress': list(plan['in_progress_ids'])}
+    samples = [login]
+    deadline = time.monotonic() + plan['duration']
+    while time.monotonic() < deadline:
+        name = rand.choices(names, weights)[0]
+        started = time.perf_counter()
+        status, body, expected = _operation(name, plan, session, rand, state)
+        elapsed = (time.perf_counter() - started) * 1000
+        samples.append([name, round(elapsed, 3), classify(status, body, expected)])
+        if plan['think']:
+            time.sleep(rand.uniform(0, 2 * plan['think']))
+    return {'role': plan['role'], 'samples': samples}
+
+
+def run(plans, processes=False):
+    """Run every plan concurrently. Returns (worker results, wall seconds)."""
+    pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    started = time.monotonic()
+    with pool(max_workers=len(plans)) as executor:
+        results = list(executor.map(run_worker, plans))
+    return results, time.monotonic() - started
+
+
+# ============================================================================
+# SUMMARY
+# ============================================================================
+
+def _stats(samples, elapsed):
+    latencies = [s[1] for s in samples]
+    errors = [s[2] for s in samples if s[2]]
+    kinds = {}
+    for kind in errors:
+        kinds[kind] = kinds.get(kind, 0) + 1
+    return {
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0,
+        'errors': len(errors),
+        'error_rate': round(len(errors) / len(samples), 4) if samples else 0,
+        'error_kinds': kinds,
+        'p50_ms': round(percentile(latencies, 0.50), 2) if samples else 0,
+        'p95_ms': round(percentile(latencies, 0.95), 2) if samples else 0,
+        'p99_ms': round(percentile(latencies, 0.99), 2) if samples else 0,
+        'max_ms': round(max(latencies), 2) if samples else 0,
+    }
+
+
+def summarize(results, elapsed):
+    """
+    Returns {'duration_s', 'workers', 'roles': {role: n}, 'overall': stats,
+    'operations': {operation: stats}} where stats carry requests,
+    throughput_rps, errors, error_rate, error_kinds and p50/p95/p99/max ms.
+    """
+    samples = [s for result in results for s in result['samples']]
+    by_operation = {}
+    for sample in samples:
+        by_operation.setdefault(sample[0], []).append(sample)
+    roles = {}
+    for result in results:
+        roles[result['role']] = roles.get(result['role'], 0) + 1
+    return {
+        'duration_s': round(elapsed, 2),
+        'workers': len(results),
+        'roles': roles,
+        'overall': _stats(samples, elapsed),
+        'operations': {name: _stats(group, elapsed) for name, group in sorted(by_operation.items())},
+    }
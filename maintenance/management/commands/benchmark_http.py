@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from maintenance import benchmarks, loadgen
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark hot HTTP endpoints on seeded test databases and write '
+        'p50/p95 latency, query counts and peak memory to a JSON baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--preset', choices=sorted(loadgen.PRESETS), default='tiny',
+                            help='Dataset shape to seed (default: %(default)s)')
+        parser.add_argument('--scales', default='1,10',
+                            help='Comma-separated multipliers of the preset (default: %(default)s)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=benchmarks.DEFAULT_ITERATIONS)
+        parser.add_argument('--warmup', type=int, default=benchmarks.DEFAULT_WARMUP)
+        parser.add_argument('--scenario', action='append', choices=sorted(benchmarks.SCENARIOS),
+                            help='Only run this scenario (repeatable)')
+        parser.add_argument('--output', default='benchmark-results.json',
+                            help='Where to write the results (default: %(default)s)')
+        parser.add_argument('--compare', metavar='BASELINE',
+                            help='Fail if results regress against this baseline file')
+        parser.add_argument('--threshold', type=float, default=benchmarks.DEFAULT_THRESHOLD,
+                            help='Allowed relative slowdown/growth in compare mode (default: %(default)s)')
+
+    def handle(self, *args, **options):
+        try:
+            scales = [float(s) for s in options['scales'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError('--scales must be comma-separated numbers, e.g. 1,10,100')
+
+        results = benchmarks.run_benchmarks(
+            scales,
+            preset=options['preset'],
+            seed=options['seed'],
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            scenarios=options['scenario'],
+            log=self.stdout.write,
+        )
+        benchmarks.save(results, options['output'])
+        self.stdout.write(self.style.SUCCESS(f"✓ Results written to {options['output']}"))
+
+        if options['compare']:
+            regressions = benchmarks.compare(
+                results, benchmarks.load(options['compare']), options['threshold']
+            )
+            if regressions:
+                for line in regressions:
+                    self.stdout.write(self.style.ERROR(f'✗ {line}'))
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}')
+            self.stdout.write(self.style.SUCCESS(f"✓ No regressions against {options['compare']}"))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from maintenance import query_plans
+
+
+class Command(BaseCommand):
+    help = (
+        'Explain the SQLite query plans of the hot code paths and fail on '
+        'unexpected full table scans or temp B-tree sorts'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--query', action='append', choices=sorted(query_plans.HOT_QUERIES),
+                            help='Only check this registered path (repeatable)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('EXPLAIN QUERY PLAN checks are only implemented for SQLite')
+
+        verbosity = options['verbosity']
+        failures = 0
+        for name, statements in query_plans.check_plans(options['query']).items():
+            violations = [v for s in statements for v in s['violations']]
+            if violations:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f'✗ {name}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {name}') + f' ({len(statements)} statements)')
+
+            for statement in statements:
+                if not statement['violations'] and verbosity < 2:
+                    continue
+                self.stdout.write(f"    {statement['sql'][:200]}")
+                for line in statement['plan']:
+                    self.stdout.write(f'      {line}')
+                for violation in statement['violations']:
+                    self.stdout.write(self.style.ERROR(f'      ✗ {violation}'))
+
+        if failures:
+            raise CommandError(f'{failures} hot path(s) with unexpected scans or sorts')
@@ -0,0 +1,86 @@
+import json
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+
+from maintenance import loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive a running server with concurrent simulated technicians, managers '
+        'and viewers, and report throughput, error rates and latency percentiles'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', action='append',
+                            help='Base URL of the server under test (default: http://127.0.0.1:8000); '
+                                 'repeat to spread the workers over several server processes')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent simulated users (default: 8)')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run (default: 30)')
+        parser.add_argument('--roles', default='technician=3,manager=1,viewer=2',
+                            help='Role weights for the workers (default: %(default)s)')
+        parser.add_argument('--think-ms', type=float, default=0.0,
+                            help='Mean pause between a worker\'s requests (default: 0)')
+        parser.add_argument('--processes', action='store_true',
+                            help='Run workers as processes instead of threads')
+        parser.add_argument('--prefix', default='LT',
+                            help='Prefix of the generate_load_data dataset to use (default: LT)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Also write the summary as JSON to this file')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        urls = options['url'] or ['http://127.0.0.1:8000']
+        try:
+            roles = loadtest.parse_roles(options['roles'])
+            plans = loadtest.plan_workers(
+                urls, options['workers'], roles,
+                prefix=options['prefix'], duration=options['duration'],
+                think=options['think_ms'] / 1000, seed=options['seed'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for url in urls:
+            try:
+                urllib.request.urlopen(url.rstrip('/') + '/accounts/login/', timeout=10).close()
+            except (urllib.error.URLError, OSError) as e:
+                raise CommandError(f'Server at {url} is not reachable: {e}')
+
+        self.stdout.write(
+            f"Running {options['workers']} {'processes' if options['processes'] else 'threads'} "
+            f"for {options['duration']:g}s against {', '.join(urls)}"
+        )
+        results, elapsed = loadtest.run(plans, processes=options['processes'])
+        summary = loadtest.summarize(results, elapsed)
+
+        self.stdout.write('Workers: ' + ', '.join(f'{n} {role}' for role, n in summary['roles'].items()))
+        self.stdout.write(
+            f"{'operation':<16}{'requests':>9}{'req/s':>9}{'errors':>8}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        )
+        for name, stats in list(summary['operations'].items()) + [('TOTAL', summary['overall'])]:
+            line = (
+                f"{name:<16}{stats['requests']:>9}{stats['throughput_rps']:>9.1f}"
+                f"{stats['error_rate']:>8.1%}{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}"
+                f"{stats['p99_ms']:>9.1f}{stats['max_ms']:>9.1f}"
+            )
+            self.stdout.write(self.style.ERROR(line) if stats['errors'] else line)
+
+        kinds = summary['overall']['error_kinds']
+        if kinds:
+            self.stdout.write('Errors: ' + ', '.join(f'{kind}: {n}' for kind, n in sorted(kinds.items())))
+            if kinds.get(loadtest.LOCKED):
+                self.stdout.write(self.style.WARNING(
+                    f"✗ {kinds[loadtest.LOCKED]} request(s) failed with '{loadtest.LOCKED}'"
+                ))
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ No errors'))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(summary, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"✓ Summary written to {options['output']}"))
@@ -1,14 +1,8 @@
-import os
-import django
-
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gearguard.settings')
-django.setup()
-
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User, Group
 from django.contrib.auth.models import Permission
 from datetime import date, timedelta
-from equipment.models import Equipment
+from equipment.models import Equipment, Department, Location
 from teams.models import MaintenanceTeam
 from maintenance.models import MaintenanceRequest
 
@@ -146,8 +140,8 @@ class Command(BaseCommand):
                 eq = Equipment.objects.create(
                     name=eq_data['name'],
                     serial_number=eq_data['serial_number'],
-                    department=eq_data['department'],
-                    location=eq_data['location'],
+                    department=Department.get_for_name(eq_data['department']),
+                    location=Location.get_for_name(eq_data['location']),
                     purchase_date=date.today() - timedelta(days=365),
                     warranty_expiry_date=date.today() + timedelta(days=180),
                     default_maintenance_team=teams[eq_data['team']],
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from maintenance.assignment import rebuild_loads
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-technician open workload used for auto-assignment'
+
+    def handle(self, *args, **options):
+        count = rebuild_loads()
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt load for {count} technician(s)'))
@@ -0,0 +1,59 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from gearguard import slow_queries
+
+
+SORT_KEYS = {
+    'total': 'total_ms',
+    'count': 'count',
+    'p95': 'p95_ms',
+    'max': 'max_ms',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Show the slowest SQL fingerprints captured by the slow-query '
+        'middleware across all worker processes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10,
+                            help='Number of fingerprints to show (default: 10)')
+        parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='total',
+                            help='Rank by total time (default), count, p95 or max')
+        parser.add_argument('--view', help='Only queries issued by this view name (e.g. admin:index)')
+        parser.add_argument('--json', action='store_true', help='Print the rows as JSON')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete the captured entries after printing')
+
+    def handle(self, *args, **options):
+        entries = slow_queries.load_entries()
+        if options['view']:
+            entries = [e for e in entries if e['view'] == options['view']]
+        rows = slow_queries.aggregate(entries)
+        key = SORT_KEYS[options['sort']]
+        rows = sorted(rows, key=lambda row: -row[key])[:options['limit']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+        elif not rows:
+            self.stdout.write('No slow queries captured.')
+        else:
+            self.stdout.write(f'{len(entries)} slow queries, top {len(rows)} fingerprints by {options["sort"]}:')
+            for rank, row in enumerate(rows, 1):
+                self.stdout.write('')
+                self.stdout.write(self.style.WARNING(
+                    f"#{rank}  count={row['count']}  total={row['total_ms']:.1f}ms  "
+                    f"p50={row['p50_ms']:.1f}ms  p95={row['p95_ms']:.1f}ms  max={row['max_ms']:.1f}ms"
+                ))
+                self.stdout.write(f"    {row['fingerprint'][:300]}")
+                for view, n in list(row['views'].items())[:3]:
+                    self.stdout.write(f'    view:  {view} ({n})')
+                for frame, n in list(row['frames'].items())[:3]:
+                    self.stdout.write(f'    frame: {frame} ({n})')
+
+        if options['clear']:
+            slow_queries.clear_files()
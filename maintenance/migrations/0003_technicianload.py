@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-19 11:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('maintenance', '0002_alter_maintenancerequest_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TechnicianLoad',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='maintenance_load', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('open_count', models.IntegerField(default=0, help_text='Open (New + In Progress) requests assigned to this technician')),
+                ('estimated_hours', models.FloatField(default=0.0, help_text='Summed duration estimates of open requests')),
+                ('due_count', models.IntegerField(default=0, help_text='Open requests that have a due date')),
+                ('due_ordinal_sum', models.BigIntegerField(default=0, help_text='Sum of due_date.toordinal() over open dated requests')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Technician Load',
+                'verbose_name_plural': 'Technician Loads',
+            },
+        ),
+    ]
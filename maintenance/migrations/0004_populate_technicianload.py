@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-19 11:40
+
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    MaintenanceRequest = apps.get_model('maintenance', 'MaintenanceRequest')
+    TechnicianLoad = apps.get_model('maintenance', 'TechnicianLoad')
+
+    loads = {}
+    rows = MaintenanceRequest.objects.filter(
+        status__in=['New', 'In Progress'],
+        assigned_technician__isnull=False,
+    ).values_list('assigned_technician_id', 'duration', 'due_date')
+    for tech_id, duration, due_date in rows.iterator():
+        load = loads.setdefault(tech_id, TechnicianLoad(user_id=tech_id))
+        load.open_count += 1
+        load.estimated_hours += duration or 0.0
+        if due_date:
+            load.due_count += 1
+            load.due_ordinal_sum += due_date.toordinal()
+    TechnicianLoad.objects.bulk_create(list(loads.values()), batch_size=500)
+
+
+def backwards(apps, schema_editor):
+    apps.get_model('maintenance', 'TechnicianLoad').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0003_technicianload'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
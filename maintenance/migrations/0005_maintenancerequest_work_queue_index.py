@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-19 07:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0004_populate_technicianload'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='maintenancerequest',
+            index=models.Index(fields=['assigned_technician', 'status', 'due_date'], name='maintenance_assigne_dbf1e2_idx'),
+        ),
+    ]
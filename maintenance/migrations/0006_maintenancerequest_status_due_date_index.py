@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-19 07:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0005_maintenancerequest_work_queue_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='maintenancerequest',
+            name='maintenance_status_0773c2_idx',
+        ),
+        migrations.AddIndex(
+            model_name='maintenancerequest',
+            index=models.Index(fields=['status', 'due_date'], name='maintenance_status_06df09_idx'),
+        ),
+    ]
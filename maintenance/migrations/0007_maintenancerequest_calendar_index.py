@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-19 07:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0006_maintenancerequest_status_due_date_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='maintenancerequest',
+            name='maintenance_request_2ba654_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='maintenancerequest',
+            name='maintenance_schedul_c5df1b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='maintenancerequest',
+            index=models.Index(fields=['request_type', 'scheduled_date'], name='maintenance_request_7583a6_idx'),
+        ),
+    ]
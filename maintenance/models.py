@@ -1,10 +1,44 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.db.models import BooleanField, Case, Q, Value, When
+from django.utils import timezone
 from equipment.models import Equipment
 from teams.models import MaintenanceTeam
 
 
+def overdue_q(today=None):
+    """
+    SQL definition of "overdue": open (New / In Progress) with a due date
+    before today. Served by the (status, due_date) index as one range scan
+    per open status; MaintenanceRequest.is_overdue mirrors it in Python.
+    """
+    return Q(
+        status__in=MaintenanceRequest.OPEN_STATUSES,
+        due_date__lt=today or timezone.localdate(),
+    )
+
+
+class MaintenanceRequestQuerySet(models.QuerySet):
+
+    def overdue(self, today=None):
+        """Only overdue requests."""
+        return self.filter(overdue_q(today))
+
+    def with_overdue(self, today=None):
+        """
+        Annotate `overdue_flag` so is_overdue needs no per-row logic.
+        CASE keeps undated rows False (a bare comparison would be NULL).
+        """
+        return self.annotate(
+            overdue_flag=Case(
+                When(overdue_q(today), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            )
+        )
+
+
 class MaintenanceRequest(models.Model):
     """
     Transactional core: represents a maintenance work order.
@@ -95,21 +129,55 @@ class MaintenanceRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = MaintenanceRequestQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Maintenance Request"
         verbose_name_plural = "Maintenance Requests"
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['status']),
-            models.Index(fields=['request_type']),
+            # Leading status column also serves plain status filters
+            models.Index(fields=['status', 'due_date']),
             models.Index(fields=['equipment']),
             models.Index(fields=['assigned_technician']),
-            models.Index(fields=['scheduled_date']),
+            # Preventive calendar: month range scan already in date order
+            # (leading request_type also serves plain type filters)
+            models.Index(fields=['request_type', 'scheduled_date']),
+            # Technician work queue (maintenance.work_queue)
+            models.Index(fields=['assigned_technician', 'status', 'due_date']),
         ]
 
     def __str__(self):
         return f"[{self.get_status_display()}] {self.subject} - {self.equipment.name}"
 
+    OPEN_STATUSES = ['New', 'In Progress']
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Snapshot this request's contribution to TechnicianLoad so the
+        # load index can apply an exact delta on the next save.
+        instance._loaded_load_state = instance.load_state()
+        return instance
+
+    def load_state(self):
+        """
+        Return (technician_id, hours, due_date) if this request counts toward
+        a technician's open load, None if it does not, or
+        TechnicianLoad.UNKNOWN when a relevant field was deferred.
+
+        Values are read raw from __dict__, so hours and due date are coerced
+        the way the fields would store them (a form may have set strings).
+        """
+        values = self.__dict__
+        if any(f not in values for f in ('status', 'assigned_technician_id', 'duration', 'due_date')):
+            return TechnicianLoad.UNKNOWN
+        if values['status'] not in self.OPEN_STATUSES or not values['assigned_technician_id']:
+            return None
+        duration = self._meta.get_field('duration').to_python(values['duration'])
+        due_date = self._meta.get_field('due_date').to_python(values['due_date'])
+        return (values['assigned_technician_id'], duration or 0.0, due_date)
+
     def save(self, *args, **kwargs):
         """
         Auto-populate assigned_team from equipment default if not provided.
@@ -120,11 +188,17 @@ class MaintenanceRequest(models.Model):
 
     @property
     def is_overdue(self):
-        """Check if request is past due date."""
+        """
+        Check if request is past due date (see overdue_q).
+
+        Uses the `overdue_flag` annotation from with_overdue() when present.
+        """
+        flag = self.__dict__.get('overdue_flag')
+        if flag is not None:
+            return bool(flag)
         if not self.due_date:
             return False
-        from datetime import date
-        return date.today() > self.due_date and self.status != 'Repaired'
+        return self.status in self.OPEN_STATUSES and self.due_date < timezone.localdate()
 
     @property
     def is_preventive(self):
@@ -181,4 +255,56 @@ class MaintenanceRequest(models.Model):
         if self.equipment and self.equipment.is_scrapped:
             raise ValidationError(
                 "Cannot create maintenance requests for scrapped equipment."
-            )
\ No newline at end of file
+            )
+
+
+class TechnicianLoad(models.Model):
+    """
+    Incrementally maintained open workload per technician.
+
+    One row per technician, updated with F() deltas whenever a request's
+    technician, status, duration or due date changes (see
+    maintenance.assignment). Auto-assignment reads these rows instead of
+    running COUNT/SUM queries per candidate.
+    """
+
+    # Sentinel for "previous contribution not known" (deferred fields)
+    UNKNOWN = object()
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='maintenance_load'
+    )
+    open_count = models.IntegerField(
+        default=0,
+        help_text="Open (New + In Progress) requests assigned to this technician"
+    )
+    estimated_hours = models.FloatField(
+        default=0.0,
+        help_text="Summed duration estimates of open requests"
+    )
+    due_count = models.IntegerField(
+        default=0,
+        help_text="Open requests that have a due date"
+    )
+    due_ordinal_sum = models.BigIntegerField(
+        default=0,
+        help_text="Sum of due_date.toordinal() over open dated requests"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Technician Load"
+        verbose_name_plural = "Technician Loads"
+
+    def __str__(self):
+        return f"{self.user_id}: {self.open_count} open, {self.estimated_hours:g} hrs"
+
+    @property
+    def average_due_ordinal(self):
+        """Mean due date (as an ordinal) of open dated requests, or None."""
+        if not self.due_count:
+            return None
+        return self.due_ordinal_sum / self.due_count
@@ -0,0 +1,74 @@
+"""
+Paginator that avoids exact COUNT(*) on very large unfiltered tables.
+"""
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for admin changelists over very large tables.
+
+    For an unfiltered queryset the row count is estimated from catalog
+    statistics (PostgreSQL) or from MAX(pk) (SQLite/MySQL, a single index
+    seek). The estimate is used only when it exceeds ESTIMATE_THRESHOLD.
+    Smaller tables and filtered querysets get an exact count.
+
+    MAX(pk) overshoots once rows have been deleted, so page() corrects the
+    count when it reaches the real end: a short page fixes it at the rows
+    seen so far, and an empty page past the end falls back to an exact
+    COUNT and raises EmptyPage like the exact paginator would.
+    """
+
+    ESTIMATE_THRESHOLD = 10000
+    estimated = False
+
+    def _estimate(self, queryset):
+        model = queryset.model
+        connection = connections[queryset.db]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [model._meta.db_table],
+                )
+            else:
+                cursor.execute(
+                    "SELECT MAX({pk}) FROM {table}".format(
+                        pk=connection.ops.quote_name(model._meta.pk.column),
+                        table=connection.ops.quote_name(model._meta.db_table),
+                    )
+                )
+            row = cursor.fetchone()
+        return int(row[0] or 0) if row else 0
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where and not query.is_sliced:
+            estimate = self._estimate(queryset)
+            if estimate > self.ESTIMATE_THRESHOLD:
+                self.estimated = True
+                return estimate
+        return super().count
+
+    def _set_count(self, count):
+        self.__dict__['count'] = count
+        self.__dict__.pop('num_pages', None)
+        self.estimated = False
+
+    def page(self, number):
+        page = super().page(number)
+        if not self.estimated:
+            return page
+        rows = len(page.object_list)   # evaluates the page's own query
+        if rows == self.per_page:
+            return page
+        if rows:
+            self._set_count(page.start_index() - 1 + rows)
+            return page
+        self._set_count(self.object_list.count())
+        return super().page(number)
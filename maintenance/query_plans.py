@@ -0,0 +1,255 @@
+"""
+EXPLAIN QUERY PLAN checks for the hot queries.
+
+HOT_QUERIES registers the code paths behind the busiest endpoints
+(Kanban, calendar, reports, work queue, request detail and the workflow
+lookups). check_plans() runs each one through its view with a
+RequestFactory request, captures the SQL it issues and asks SQLite for the
+plan of every SELECT / UPDATE / DELETE.
+
+A plan regresses when it contains
+
+- a full scan of a table (``SCAN <table>``, with or without an index), or
+- a temporary B-tree sort (``USE TEMP B-TREE FOR ORDER BY`` and friends)
+
+that the entry does not explicitly allow. Allowances name the table or
+sort kind and carry the reason, so every accepted scan or sort is
+reviewed once and anything new fails (for example after an index in
+MaintenanceRequest.Meta.indexes is dropped or reshaped).
+
+Write paths run inside a transaction that is always rolled back.
+"""
+
+import json
+import re
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from equipment.models import Equipment
+from . import views
+from .models import MaintenanceRequest
+
+
+FULL_SCAN = re.compile(r'^SCAN (\S+)')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR (.+)$')
+SUBQUERY = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE) (.+)$')
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE')
+
+# Small dimension tables; scanning them is always fine
+DIMENSION_TABLES = {
+    'equipment_department': 'dimension table, cached in process',
+    'equipment_location': 'dimension table, cached in process',
+    'teams_maintenanceteam': 'one row per team',
+    'teams_maintenanceteam_members': 'membership index loads every pair by design',
+}
+
+
+class HotQuery:
+    """
+    One registered code path.
+
+    Args:
+        run: callable(ctx) -> HttpResponse, executed with SQL capture on
+        scans: {table: reason} full scans this path is allowed to do
+        sorts: {kind: reason} temp B-tree sorts allowed, where kind is the
+            text after "USE TEMP B-TREE FOR" (e.g. 'ORDER BY', 'GROUP BY')
+    """
+
+    def __init__(self, run, scans=None, sorts=None):
+        self.run = run
+        self.scans = dict(DIMENSION_TABLES, **(scans or {}))
+        self.sorts = sorts or {}
+
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+_factory = RequestFactory()
+
+
+def _get(view, user, *args, **params):
+    request = _factory.get('/', params)
+    request.user = user
+    return view(request, *args)
+
+
+def _post(view, user, data=None, body=None):
+    if body is not None:
+        request = _factory.post('/', json.dumps(body), content_type='application/json')
+    else:
+        request = _factory.post('/', data or {})
+    request.user = user
+    return view(request)
+
+
+# Whole-table aggregates: no filter narrows the rows, and the result is
+# grouped and ordered by the count
+_REPORT_SCAN = {'maintenance_maintenancerequest': 'unfiltered report aggregates every request'}
+_REPORT_SORTS = {
+    'GROUP BY': 'groups on a joined / non-leading column',
+    'ORDER BY': 'orders the groups by their count',
+}
+
+
+def _report(view, **params):
+    return lambda ctx: _get(view, ctx['manager'], format='json', **params)
+
+
+HOT_QUERIES = {
+    'kanban_data': HotQuery(
+        lambda ctx: _get(views.kanban_data, ctx['manager'], per_column=views.KANBAN_PAGE_SIZE),
+        scans={'maintenance_maintenancerequest': 'column totals count every request (walks the status index)'},
+        sorts={'ORDER BY': 'ROW_NUMBER() order within each status, then the page order'},
+    ),
+    'kanban_data_column': HotQuery(
+        lambda ctx: _get(
+            views.kanban_data, ctx['manager'],
+            status='New', per_column=views.KANBAN_PAGE_SIZE, offset=views.KANBAN_PAGE_SIZE,
+        ),
+        sorts={'ORDER BY': 'ROW_NUMBER() order within the column, then the page order'},
+    ),
+    'calendar_data': HotQuery(
+        lambda ctx: _get(views.calendar_data, ctx['manager'], year=ctx['today'].year, month=ctx['today'].month),
+    ),
+    'work_queue': HotQuery(
+        lambda ctx: _get(views.work_queue_data, ctx['technician']),
+        sorts={'ORDER BY': 'NULLS LAST over two statuses; bounded by one technician\'s open work'},
+    ),
+    'request_detail': HotQuery(
+        lambda ctx: _get(views.request_detail, ctx['manager'], ctx['request_id']),
+        sorts={'ORDER BY': 'technician picker sorts the members of one team'},
+    ),
+    'get_request_actions': HotQuery(
+        lambda ctx: _get(views.get_request_actions, ctx['manager'], request_id=ctx['request_id']),
+    ),
+    'kanban_move': HotQuery(
+        lambda ctx: _post(views.kanban_move, ctx['manager'], body={
+            'id': ctx['new_request_id'], 'new_status': 'In Progress',
+        }),
+    ),
+    'scrap_equipment': HotQuery(
+        lambda ctx: _post(views.scrap_equipment, ctx['manager'], {
+            'equipment_ids': [ctx['equipment_id']], 'include_descendants': '1',
+        }),
+    ),
+    'report_team_requests': HotQuery(
+        _report(views.report_team_requests), scans=_REPORT_SCAN, sorts=_REPORT_SORTS,
+    ),
+    'report_team_requests_overdue': HotQuery(
+        _report(views.report_team_requests, overdue='1'), sorts=_REPORT_SORTS,
+    ),
+    'report_team_requests_status': HotQuery(
+        _report(views.report_team_requests, status='New'), sorts=_REPORT_SORTS,
+    ),
+    'report_equipment_requests': HotQuery(
+        _report(views.report_equipment_requests), scans=_REPORT_SCAN, sorts=_REPORT_SORTS,
+    ),
+    'report_equipment_requests_overdue': HotQuery(
+        _report(views.report_equipment_requests, overdue='1'), sorts=_REPORT_SORTS,
+    ),
+    'report_department_requests': HotQuery(
+        _report(views.report_department_requests),
+        scans={'equipment_equipment': 'unfiltered report aggregates every request (driven from equipment)'},
+        sorts=_REPORT_SORTS,
+    ),
+    'report_department_requests_overdue': HotQuery(
+        _report(views.report_department_requests, overdue='1'), sorts=_REPORT_SORTS,
+    ),
+}
+
+
+def sample_context():
+    """
+    Pick the ids the registry needs from the current database.
+
+    Missing rows fall back to placeholder ids; the lookups still run (and
+    still get explained), they just take their not-found branch.
+    """
+    today = timezone.localdate()
+    requests = MaintenanceRequest.objects.filter(equipment__is_scrapped=False).order_by('id')
+    sample = requests.values_list('id', 'equipment_id').first() or (0, 0)
+    technician_id = requests.filter(
+        assigned_technician__isnull=False
+    ).values_list('assigned_technician_id', flat=True).first()
+    new_request_id = requests.filter(
+        status='New', assigned_technician__isnull=False
+    ).values_list('id', flat=True).first()
+    root_id = Equipment.objects.filter(
+        parent__isnull=True, is_scrapped=False
+    ).values_list('id', flat=True).first()
+    return {
+        'today': today,
+        # Unsaved fallbacks: role checks only need is_staff / team membership
+        'manager': (
+            User.objects.filter(is_superuser=True).order_by('id').first()
+            or User(pk=0, username='plan-check', is_staff=True, is_superuser=True)
+        ),
+        'technician': User(pk=technician_id or 0, username='plan-check-technician'),
+        'request_id': sample[0],
+        'new_request_id': new_request_id or sample[0],
+        'equipment_id': root_id or sample[1],
+    }
+
+
+# ============================================================================
+# PLANS
+# ============================================================================
+
+def explain(sql):
+    """Return the plan detail lines of one statement."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[3] for row in cursor.fetchall()]
+
+
+def plan_violations(plan, hot_query):
+    """Return the plan lines that are neither index searches nor allowed."""
+    subqueries = {m.group(1) for m in map(SUBQUERY.match, plan) if m}
+    violations = []
+    for line in plan:
+        scan = FULL_SCAN.match(line)
+        if scan:
+            table = scan.group(1)
+            if table.startswith('(') or table in subqueries or table == 'CONSTANT':
+                continue
+            if table not in hot_query.scans:
+                violations.append(f'full scan: {line}')
+            continue
+        sort = TEMP_SORT.search(line)
+        if sort and sort.group(1) not in hot_query.sorts:
+            violations.append(f'temp sort: {line}')
+    return violations
+
+
+def check_plan(name, ctx=None):
+    """
+    Run one registered path and explain what it issued.
+
+    Returns: [{'sql': str, 'plan': [str], 'violations': [str]}, ...]
+    """
+    hot_query = HOT_QUERIES[name]
+    ctx = ctx or sample_context()
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as captured:
+            hot_query.run(ctx)
+        statements = [
+            q['sql'] for q in captured.captured_queries
+            if q['sql'].lstrip().upper().startswith(EXPLAINED)
+        ]
+        results = []
+        for sql in statements:
+            plan = explain(sql)
+            results.append({'sql': sql, 'plan': plan, 'violations': plan_violations(plan, hot_query)})
+        transaction.set_rollback(True)
+    return results
+
+
+def check_plans(names=None):
+    """Run check_plan() for the given names (default: all). Returns {name: results}."""
+    ctx = sample_context()
+    return {name: check_plan(name, ctx) for name in (names or HOT_QUERIES)}
@@ -0,0 +1,16 @@
+"""
+Signals emitted by the maintenance workflow.
+
+Receivers connected here run in the background step (see maintenance.tasks),
+so they may do slow work such as cache invalidation or counter rebuilds.
+"""
+
+from django.dispatch import Signal
+
+# Sent after a scrap cascade commits.
+# kwargs: equipment_ids (list[int]), request_ids (list[int])
+scrap_cascade_completed = Signal()
+
+# Sent after BulkWorkflow writes a batch of transitions with bulk_update().
+# kwargs: request_ids (list[int]), technician_ids (list[int], old and new)
+requests_bulk_updated = Signal()
@@ -0,0 +1,60 @@
+"""
+Minimal background execution for post-commit follow-up work.
+
+There is no task queue in this deployment, so deferred work runs on a small
+in-process thread pool once the surrounding transaction has committed. Set
+BACKGROUND_TASKS_EAGER = True in settings to run it inline (tests, shells).
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from gearguard import metrics
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gearguard-bg')
+
+# Tasks submitted to the executor and not finished yet
+_pending = [0]
+_pending_lock = threading.Lock()
+
+
+def pending():
+    """Number of deferred tasks queued or running in this process."""
+    return _pending[0]
+
+
+metrics.register_gauge('gearguard_background_tasks_pending', pending)
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(func, '__name__', func))
+    finally:
+        with _pending_lock:
+            _pending[0] -= 1
+        close_old_connections()
+
+
+def defer(func, *args, **kwargs):
+    """
+    Schedule func(*args, **kwargs) to run after the current transaction
+    commits. Outside a transaction it is scheduled immediately.
+    """
+    def _submit():
+        if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+            func(*args, **kwargs)
+        else:
+            with _pending_lock:
+                _pending[0] += 1
+            _executor.submit(_run, func, args, kwargs)
+
+    transaction.on_commit(_submit)
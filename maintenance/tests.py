@@ -1,3 +1,1099 @@
-from django.test import TestCase
+import datetime
+import json
+import threading
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
+from django.db import OperationalError, connection
+from django.test import (
+    LiveServerTestCase, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+from django.utils import timezone
+
+import equipment.views
+import frontend.views
+import maintenance.views
+from equipment.models import Department, Equipment, Location
+from gearguard import metrics
+from gearguard.db import retry_on_busy
+from gearguard.query_budget import REGISTRY, budget_for, view_key
+from maintenance import benchmarks, loadgen, loadtest, query_plans
+from maintenance.models import MaintenanceRequest, TechnicianLoad
+from maintenance.pagination import EstimatedCountPaginator
+from maintenance.signals import scrap_cascade_completed
+from maintenance.workflow import (
+    BulkWorkflow, InvalidTransitionError, MissingDataError, PermissionError, ScrapCascade,
+)
+from teams.membership import team_index
+from teams.models import MaintenanceTeam
+
+
+BUDGETED_MODULES = (maintenance.views, equipment.views, frontend.views)
+
+# Cumulative multipliers of the tiny preset: seeding 1 + 9 + 90 rounds
+# leaves 1x, 10x and 100x the data in the database.
+SCALE_STEPS = ((1, 1), (10, 9), (100, 90))
+
+
+def _routed_views(patterns=None):
+    """Every view of the budgeted modules that the URLconf routes to."""
+    modules = {module.__name__ for module in BUDGETED_MODULES}
+    for entry in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(entry, URLResolver):
+            yield from _routed_views(entry.url_patterns)
+        elif entry.callback.__module__ in modules:
+            yield entry.callback
+
+
+# ============================================================================
+# REQUEST SPECS
+# ============================================================================
+# view key -> ctx -> (user, method, path, data). The context holds sample
+# rows from the newest generated dataset, so write paths always act on
+# fresh rows at every scale.
+
+def _post(path, data):
+    return 'post', path, data
+
+
+def _json(path, data):
+    return 'json', path, json.dumps(data)
+
+
+def _get(path, data=None):
+    return 'get', path, data or {}
+
+
+REQUEST_SPECS = {
+    'maintenance.views.kanban_board': lambda c: (c['manager'], *_get('/maintenance/')),
+    'maintenance.views.kanban_benchmark': lambda c: (c['manager'], *_get('/maintenance/kanban/benchmark/')),
+    'maintenance.views.kanban_data': lambda c: (
+        c['manager'], *_get('/maintenance/api/kanban-data/', {'per_column': 50})
+    ),
+    'maintenance.views.kanban_move': lambda c: (c['manager'], *_json(
+        '/maintenance/api/kanban-move/', {'id': c['new'][0], 'new_status': 'In Progress'}
+    )),
+    'maintenance.views.get_equipment_details': lambda c: (c['manager'], *_get(
+        '/maintenance/api/equipment-details/', {'equipment_id': c['equipment_id']}
+    )),
+    'maintenance.views.calendar_data': lambda c: (c['manager'], *_get(
+        '/maintenance/api/calendar-data/', {'year': c['today'].year, 'month': c['today'].month}
+    )),
+    'maintenance.views.calendar_page': lambda c: (c['manager'], *_get('/maintenance/calendar/')),
+    'maintenance.views.create_maintenance_request': lambda c: (c['manager'], *_post(
+        '/maintenance/request/new/',
+        {'subject': 'Budget check', 'request_type': 'Corrective', 'equipment': c['equipment_id'],
+         'due_date': (c['today'] + datetime.timedelta(days=7)).isoformat(), 'duration': '2.5'},
+    )),
+    'maintenance.views.assign_technician': lambda c: (c['manager'], *_post(
+        '/maintenance/api/assign-technician/',
+        {'request_id': c['new'][1], 'technician_id': c['teammate'][1]},
+    )),
+    'maintenance.views.start_work': lambda c: (c['manager'], *_post(
+        '/maintenance/api/start-work/', {'request_id': c['new'][2]}
+    )),
+    'maintenance.views.complete_work': lambda c: (c['manager'], *_post(
+        '/maintenance/api/complete-work/', {'request_id': c['in_progress'], 'duration_hours': '2'}
+    )),
+    'maintenance.views.scrap_request': lambda c: (c['manager'], *_post(
+        '/maintenance/api/scrap-request/', {'request_id': c['new'][3]}
+    )),
+    'maintenance.views.scrap_equipment': lambda c: (c['manager'], *_post(
+        '/maintenance/api/scrap-equipment/', {'equipment_ids': [c['leaf_equipment_id']]}
+    )),
+    'maintenance.views.get_request_actions': lambda c: (c['manager'], *_get(
+        '/maintenance/api/request-actions/', {'request_id': c['new'][4]}
+    )),
+    'maintenance.views.request_detail': lambda c: (c['manager'], *_get(
+        f"/maintenance/request/{c['new'][4]}/"
+    )),
+    'maintenance.views.workload_data': lambda c: (c['manager'], *_get('/maintenance/api/workload/')),
+    'maintenance.views.work_queue_data': lambda c: (c['technician'], *_get('/maintenance/api/work-queue/')),
+    'maintenance.views.report_team_requests': lambda c: (c['manager'], *_get(
+        '/maintenance/reports/team-requests/', {'format': 'json'}
+    )),
+    'maintenance.views.report_equipment_requests': lambda c: (c['manager'], *_get(
+        '/maintenance/reports/equipment-requests/', {'format': 'json'}
+    )),
+    'maintenance.views.report_department_requests': lambda c: (c['manager'], *_get(
+        '/maintenance/reports/department-requests/', {'format': 'json'}
+    )),
+    'equipment.views.equipment_detail': lambda c: (c['manager'], *_get(
+        f"/equipment/{c['equipment_id']}/"
+    )),
+    'equipment.views.equipment_maintenance_list': lambda c: (c['manager'], *_get(
+        f"/equipment/{c['equipment_id']}/maintenance/"
+    )),
+    'frontend.views.maintenance_dashboard': lambda c: (c['technician'], *_get('/ui/maintenance/')),
+}
+
+
+def _context(dataset):
+    """Pick sample rows for the specs from one generated dataset."""
+    requests = MaintenanceRequest.objects.filter(
+        equipment_id__in=dataset['equipment_ids'],
+        equipment__is_scrapped=False,
+        assigned_team__isnull=False,
+        assigned_technician__isnull=False,
+    ).order_by('id')
+    new = list(requests.filter(status='New').values_list('id', 'assigned_technician_id')[:5])
+    in_progress = requests.filter(status='In Progress').values_list('id', flat=True).first()
+    used_equipment = set(
+        MaintenanceRequest.objects.filter(id__in=[pk for pk, _ in new] + [in_progress])
+        .values_list('equipment_id', flat=True)
+    )
+    # A leaf with open requests, so scrapping it always cascades
+    leaf = Equipment.objects.filter(
+        id__in=dataset['equipment_ids'], is_scrapped=False, children__isnull=True,
+        maintenance_requests__status__in=MaintenanceRequest.OPEN_STATUSES,
+    ).exclude(id__in=used_equipment).order_by('-id').values_list('id', flat=True).first()
+    equipment_id = Equipment.objects.filter(
+        id__in=dataset['equipment_ids'], is_scrapped=False,
+        default_maintenance_team__isnull=False,
+    ).exclude(id=leaf).order_by('id').values_list('id', flat=True).first()
+    return {
+        'today': timezone.localdate(),
+        'manager': User.objects.get(pk=dataset['manager_id']),
+        'technician': User.objects.get(pk=new[0][1]),
+        'new': [pk for pk, _ in new],
+        'teammate': [tech for _, tech in new],
+        'in_progress': in_progress,
+        'equipment_id': equipment_id,
+        'leaf_equipment_id': leaf,
+    }
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+class WorkflowTestCase(TestCase):
+    """
+    A small plant: one team (tech1, tech2) maintaining line -> press -> die
+    and a robot on the same line, plus an unrelated pump and a manager.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', password='x', is_staff=True)
+        cls.tech1 = User.objects.create_user('tech1', password='x')
+        cls.tech2 = User.objects.create_user('tech2', password='x')
+        cls.viewer = User.objects.create_user('viewer', password='x')
+        cls.team = MaintenanceTeam.objects.create(name='Mechanics')
+        cls.team.members.add(cls.tech1, cls.tech2)
+        cls.department = Department.get_for_name('Production')
+        cls.location = Location.get_for_name('Hall 1')
+
+        cls.line = cls._equipment('Line')
+        cls.press = cls._equipment('Press', cls.line)
+        cls.die = cls._equipment('Die', cls.press)
+        cls.robot = cls._equipment('Robot', cls.line)
+        cls.pump = cls._equipment('Pump')
+
+    @classmethod
+    def _equipment(cls, name, parent=None):
+        return Equipment.objects.create(
+            name=name, serial_number=f'SN-{name}', parent=parent,
+            department=cls.department, location=cls.location,
+            default_maintenance_team=cls.team,
+            purchase_date=datetime.date(2024, 1, 1),
+        )
+
+    def setUp(self):
+        # Membership changes of earlier tests were rolled back behind the
+        # index's back
+        team_index.expire()
+
+    def _request(self, equipment, status='New', technician=None, due_date=None, duration=None):
+        return MaintenanceRequest.objects.create(
+            subject=f'{equipment.name} {status}', request_type='Corrective',
+            equipment=equipment, status=status, assigned_technician=technician,
+            due_date=due_date, duration=duration, created_by=self.manager,
+        )
+
+    def assertStatuses(self, requests, status):
+        ids = [r.pk for r in requests]
+        self.assertEqual(
+            list(MaintenanceRequest.objects.filter(pk__in=ids).values_list('status', flat=True)),
+            [status] * len(ids),
+        )
+
+    def assertLoadsMatchRebuild(self):
+        from maintenance.assignment import rebuild_loads
+        fields = ('user_id', 'open_count', 'estimated_hours', 'due_count', 'due_ordinal_sum')
+        snapshot = lambda: sorted(
+            row for row in TechnicianLoad.objects.values_list(*fields) if any(row[1:])
+        )
+        incremental = snapshot()
+        rebuild_loads()
+        self.assertEqual(incremental, snapshot())
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+class QueryBudgetRegistryTests(TestCase):
+    """Every view in the budgeted modules declares a budget and has a spec."""
+
+    def test_every_view_has_a_budget(self):
+        missing = [view_key(v) for v in _routed_views() if budget_for(v) is None]
+        self.assertEqual(missing, [])
+
+    def test_every_budget_has_a_request_spec(self):
+        self.assertEqual(sorted(set(REGISTRY) - set(REQUEST_SPECS)), [])
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Call every budgeted view at 1x, 10x and 100x data and fail when it
+    exceeds its budget or issues more queries than at 1x.
+
+    Caches and the team membership index are dropped before each call, so
+    counts include cold loads (membership, dashboard stats, calendar ETag).
+    """
+
+    def _call(self, spec, ctx):
+        user, method, path, data = spec(ctx)
+        self.client.force_login(user)
+        cache.clear()
+        team_index.expire()
+        with CaptureQueriesContext(connection) as queries:
+            if method == 'json':
+                response = self.client.post(path, data, content_type='application/json')
+            elif method == 'post':
+                response = self.client.post(path, data)
+            else:
+                response = self.client.get(path, data)
+        self.assertLess(response.status_code, 400, f'{path}: {response.content[:300]!r}')
+        return len(queries)
+
+    def test_views_stay_within_budget_as_data_grows(self):
+        baseline = {}
+        for scale, rounds in SCALE_STEPS:
+            dataset = loadgen.generate(
+                loadgen.sizes_for('tiny', scale=rounds), seed=scale, prefix=f'QB{scale}'
+            )
+            ctx = _context(dataset)
+            for key, budget in sorted(REGISTRY.items()):
+                with self.subTest(view=key, scale=f'{scale}x'):
+                    count = self._call(REQUEST_SPECS[key], ctx)
+                    self.assertLessEqual(count, budget, f'{key} at {scale}x')
+                    baseline.setdefault(key, count)
+                    self.assertLessEqual(count, baseline[key], f'{key} grows with data')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN checks are SQLite-specific')
+class QueryPlanTests(TestCase):
+    """Hot paths stay on index searches (see maintenance.query_plans)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        loadgen.generate(loadgen.sizes_for('tiny'), prefix='QP')
+
+    def test_hot_paths_have_no_unexpected_scans_or_sorts(self):
+        for name, statements in query_plans.check_plans().items():
+            with self.subTest(query=name):
+                self.assertTrue(statements)
+                for statement in statements:
+                    self.assertEqual(statement['violations'], [], statement['sql'])
+
+    def test_detects_full_scans_and_temp_sorts(self):
+        plan = [
+            'CO-ROUTINE qualify',
+            'SCAN maintenance_maintenancerequest',
+            'SCAN qualify',
+            'SCAN (subquery-1)',
+            'SCAN equipment_department',
+            'SEARCH equipment_equipment USING INTEGER PRIMARY KEY (rowid=?)',
+            'USE TEMP B-TREE FOR ORDER BY',
+        ]
+        self.assertEqual(query_plans.plan_violations(plan, query_plans.HotQuery(None)), [
+            'full scan: SCAN maintenance_maintenancerequest',
+            'temp sort: USE TEMP B-TREE FOR ORDER BY',
+        ])
+        allowed = query_plans.HotQuery(
+            None, scans={'maintenance_maintenancerequest': 'test'}, sorts={'ORDER BY': 'test'}
+        )
+        self.assertEqual(query_plans.plan_violations(plan, allowed), [])
+
+
+class LoadTestHarnessTests(LiveServerTestCase):
+    """A short run of each role's mix against the live test server."""
+
+    def test_mixed_workload_run(self):
+        loadgen.generate(loadgen.sizes_for('tiny'), prefix='LD')
+        plans = loadtest.plan_workers(
+            [self.live_server_url], workers=3, prefix='LD', duration=0.5,
+            roles={'technician': 1, 'manager': 1, 'viewer': 1},
+        )
+        self.assertEqual([p['role'] for p in plans], ['technician', 'manager', 'viewer'])
+        moved = [set(p['new_ids']) | set(p['in_progress_ids']) for p in plans[:2]]
+        self.assertFalse(moved[0] & moved[1])
+
+        # One worker at a time: the live server shares a single in-memory
+        # SQLite connection between its threads
+        results = [loadtest.run_worker(plan) for plan in plans]
+        summary = loadtest.summarize(results, elapsed=3.0)
+        self.assertEqual(summary['roles'], {'technician': 1, 'manager': 1, 'viewer': 1})
+        self.assertEqual(summary['operations']['login']['errors'], 0)
+        self.assertGreater(summary['operations']['kanban_data']['requests'], 0)
+        self.assertNotIn('connection', summary['overall']['error_kinds'])
+        self.assertEqual(
+            summary['overall']['requests'],
+            sum(op['requests'] for op in summary['operations'].values()),
+        )
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class ScrapCascadeTests(WorkflowTestCase):
+    """Scrapping equipment scraps its open requests and runs the follow-up after commit."""
+
+    def setUp(self):
+        super().setUp()
+        self.open = [
+            self._request(self.press, 'New', self.tech1, duration=2),
+            self._request(self.die, 'In Progress', self.tech1, duration=3),
+            self._request(self.robot, 'New', self.tech2),
+        ]
+        self.closed = self._request(self.die, 'Repaired', self.tech1)
+        self.elsewhere = self._request(self.pump, 'New', self.tech2)
+
+    def _scrap(self, *args, **kwargs):
+        signals = []
+        receiver = lambda sender, **kw: signals.append(kw)
+        scrap_cascade_completed.connect(receiver)
+        try:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                result = ScrapCascade.scrap_equipment(*args, **kwargs)
+        finally:
+            scrap_cascade_completed.disconnect(receiver)
+        return result, callbacks, signals
+
+    def test_cascades_over_subtree(self):
+        result, callbacks, signals = self._scrap([self.press], self.manager, include_descendants=True)
+
+        self.assertEqual(result['equipment_ids'], sorted([self.press.pk, self.die.pk]))
+        self.assertEqual(result['equipment_scrapped'], 2)
+        self.assertEqual(sorted(result['request_ids']), sorted(r.pk for r in self.open[:2]))
+        self.assertEqual(
+            set(Equipment.objects.filter(is_scrapped=True).values_list('id', flat=True)),
+            {self.press.pk, self.die.pk},
+        )
+        self.assertStatuses(self.open[:2], 'Scrap')
+        self.assertStatuses([self.open[2], self.elsewhere], 'New')
+        self.assertStatuses([self.closed], 'Repaired')
+
+        # Follow-up deferred to after commit, then run inline (eager)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(len(signals), 1)
+        self.assertEqual(sorted(signals[0]['request_ids']), sorted(result['request_ids']))
+        self.assertEqual(TechnicianLoad.objects.get(user=self.tech1).open_count, 0)
+        self.assertLoadsMatchRebuild()
+
+    def test_without_descendants_scraps_only_the_given_assets(self):
+        result, _, _ = self._scrap([self.press.pk], self.manager)
+        self.assertEqual(result['equipment_ids'], [self.press.pk])
+        self.assertStatuses([self.open[0]], 'Scrap')
+        self.assertStatuses([self.open[1]], 'In Progress')
+        self.assertFalse(Equipment.objects.get(pk=self.die.pk).is_scrapped)
+
+    def test_small_chunks_give_the_same_result(self):
+        with mock.patch.object(ScrapCascade, 'CHUNK_SIZE', 1):
+            result, _, signals = self._scrap(
+                [self.line, self.pump], self.manager, include_descendants=True
+            )
+        self.assertEqual(result['equipment_scrapped'], 5)
+        self.assertEqual(result['requests_scrapped'], 4)
+        self.assertStatuses(self.open + [self.elsewhere], 'Scrap')
+        self.assertStatuses([self.closed], 'Repaired')
+        self.assertEqual(len(signals), 1)
+        self.assertLoadsMatchRebuild()
+
+    def test_already_scrapped_equipment_is_not_counted_twice(self):
+        self._scrap([self.die], self.manager)
+        result, _, _ = self._scrap([self.press], self.manager, include_descendants=True)
+        self.assertEqual(result['equipment_scrapped'], 1)
+        self.assertEqual(result['request_ids'], [self.open[0].pk])
+
+    def test_only_managers_may_scrap(self):
+        for user in (self.tech1, self.viewer):
+            with self.subTest(user=user.username):
+                with self.assertRaises(PermissionError):
+                    self._scrap([self.press], user, include_descendants=True)
+        self.assertFalse(Equipment.objects.filter(is_scrapped=True).exists())
+        self.assertStatuses([self.open[0]], 'New')
+        self.assertStatuses([self.open[1]], 'In Progress')
+
+    def test_requires_equipment(self):
+        with self.assertRaises(MissingDataError):
+            self._scrap([], self.manager)
+
+
+@override_settings(SQLITE_BUSY_RETRIES=3, SQLITE_BUSY_RETRY_DELAY=0, BACKGROUND_TASKS_EAGER=True)
+class KanbanScrapRetryTests(TransactionTestCase):
+    """
+    Dropping a card on Scrap retries the request scrap and the equipment
+    cascade as one transaction when SQLite is busy. A TransactionTestCase,
+    since retry_on_busy never retries inside an outer atomic block.
+    """
+
+    RETRIES = ('gearguard_db_busy_retries_total', ('_scrap_with_equipment',))
+
+    def setUp(self):
+        team_index.expire()
+        self.manager = User.objects.create_user('manager', password='x', is_staff=True)
+        self.press = Equipment.objects.create(
+            name='Press', serial_number='SN-Press',
+            department=Department.get_for_name('Production'),
+            location=Location.get_for_name('Hall 1'),
+            purchase_date=datetime.date(2024, 1, 1),
+        )
+        self.moved, self.other = [
+            MaintenanceRequest.objects.create(
+                subject=f'Press {status}', request_type='Corrective', equipment=self.press,
+                status=status, created_by=self.manager,
+            )
+            for status in ('New', 'In Progress')
+        ]
+
+    def _retries(self):
+        counters = {(name, tuple(labels)): value for name, labels, value in metrics._collect()['counters']}
+        return counters.get(self.RETRIES, 0)
+
+    def test_busy_cascade_retries_the_whole_scrap(self):
+        scrap_equipment = ScrapCascade.scrap_equipment
+        calls = []
+
+        def busy_once(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return scrap_equipment(*args, **kwargs)
+
+        retries = self._retries()
+        self.client.force_login(self.manager)
+        with mock.patch.object(ScrapCascade, 'scrap_equipment', side_effect=busy_once):
+            response = self.client.post(
+                '/maintenance/api/kanban-move/',
+                json.dumps({'id': self.moved.pk, 'new_status': 'Scrap'}),
+                content_type='application/json',
+            )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['cascaded_request_ids'], [self.other.pk])
+        self.assertEqual(data['count_deltas'], {'New': -1, 'In Progress': -1, 'Scrap': 2})
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self._retries() - retries, 1)
+        self.assertTrue(Equipment.objects.get(pk=self.press.pk).is_scrapped)
+        self.assertEqual(
+            set(MaintenanceRequest.objects.values_list('status', flat=True)), {'Scrap'},
+        )
+
+
+class KanbanPagingTests(WorkflowTestCase):
+    """Kanban columns page with a (created_at, id) keyset cursor, in server order."""
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        # Backdated rows: creation order (id) disagrees with created_at
+        self.cards = [self._request(self.press) for _ in range(7)]
+        for card, hours in zip(self.cards, [5, 1, 3, 3, 8, 0, 2]):
+            MaintenanceRequest.objects.filter(pk=card.pk).update(created_at=now - datetime.timedelta(hours=hours))
+        self.client.force_login(self.manager)
+
+    def _page(self, after=None, per_column=3):
+        params = {'status': 'New', 'per_column': per_column}
+        if after:
+            params['after'] = f"{after['created_at']}|{after['id']}"
+        response = self.client.get('/maintenance/api/kanban-data/', params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return data['data']['New'], data['counts']['New']
+
+    def _server_order(self):
+        return list(
+            MaintenanceRequest.objects.filter(status='New')
+            .order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def test_pages_follow_server_order(self):
+        cards, total = self._page()
+        ids = [c['id'] for c in cards]
+        while len(ids) < total:
+            page, total = self._page(after=cards[-1])
+            self.assertTrue(page)
+            cards = page
+            ids.extend(c['id'] for c in page)
+        self.assertEqual(ids, self._server_order())
+        # The first page of the snapshot agrees with the keyset pages
+        snapshot = self.client.get('/maintenance/api/kanban-data/', {'per_column': 3}).json()
+        self.assertEqual([c['id'] for c in snapshot['data']['New']], ids[:3])
+
+    def test_cards_moving_out_above_the_cursor_skip_nothing(self):
+        first, _ = self._page()
+        # Two loaded cards leave the column before "load more"
+        MaintenanceRequest.objects.filter(pk__in=[first[0]['id'], first[1]['id']]).update(status='In Progress')
+        rest, total = self._page(after=first[-1], per_column=100)
+        self.assertEqual(total, len(self.cards) - 2)
+        self.assertEqual([first[2]['id']] + [c['id'] for c in rest], self._server_order())
+
+    def test_rejects_malformed_cursor(self):
+        for bad in ('yesterday|3', '2030-01-01T00:00:00|x', '2030-01-01T00:00:00|3'):
+            with self.subTest(after=bad):
+                response = self.client.get('/maintenance/api/kanban-data/', {'status': 'New', 'after': bad})
+                self.assertEqual(response.status_code, 400)
+
+
+class WorkloadTests(WorkflowTestCase):
+    """The workload matrix and the invalidation of its cached copy."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        today = timezone.localdate()
+        self.yesterday = today - datetime.timedelta(days=1)
+        self._request(self.press, 'New', self.tech1, due_date=self.yesterday, duration=2)
+        self._request(self.die, 'In Progress', self.tech1, due_date=today, duration=1.5)
+        self._request(self.robot, 'In Progress', self.tech2, due_date=self.yesterday)
+        self._request(self.pump, 'New')
+        self._request(self.pump, 'Repaired', self.tech2, due_date=self.yesterday, duration=8)
+        self._request(self.pump, 'Scrap', self.tech1, due_date=self.yesterday)
+
+    def _team(self, data):
+        (team,) = [t for t in data['teams'] if t['id'] == self.team.pk]
+        return team
+
+    def _cells(self, data):
+        return {t['id']: {k: t[k] for k in ('new', 'in_progress', 'open', 'overdue', 'estimated_hours')}
+                for t in self._team(data)['technicians']}
+
+    def test_matrix(self):
+        from maintenance.workload import compute_workload
+        data = compute_workload()
+        self.assertEqual(self._cells(data), {
+            self.tech1.pk: {'new': 1, 'in_progress': 1, 'open': 2, 'overdue': 1, 'estimated_hours': 3.5},
+            self.tech2.pk: {'new': 0, 'in_progress': 1, 'open': 1, 'overdue': 1, 'estimated_hours': 0.0},
+            None: {'new': 1, 'in_progress': 0, 'open': 1, 'overdue': 0, 'estimated_hours': 0.0},
+        })
+        self.assertEqual(self._team(data)['totals'], {
+            'new': 2, 'in_progress': 2, 'open': 4, 'overdue': 2, 'estimated_hours': 3.5,
+        })
+        names = [t['name'] for t in self._team(data)['technicians']]
+        self.assertEqual(names, ['tech1', 'tech2', 'Unassigned'])
+
+    def test_idle_members_are_listed(self):
+        from maintenance.workload import compute_workload
+        idle = User.objects.create_user('idle')
+        self.team.members.add(idle)
+        cells = self._cells(compute_workload())
+        self.assertEqual(cells[idle.pk]['open'], 0)
+
+    def test_cached_until_something_changes(self):
+        from maintenance.signals import requests_bulk_updated
+        from maintenance.workload import get_workload
+
+        def open_count():
+            return self._team(get_workload())['totals']['open']
+
+        self.assertEqual(open_count(), 4)
+        with self.assertNumQueries(0):
+            self.assertEqual(open_count(), 4)
+
+        request = self._request(self.die, 'New', self.tech2)
+        self.assertEqual(open_count(), 5)
+
+        # Bulk paths bypass save(): an unsignalled update stays cached ...
+        MaintenanceRequest.objects.filter(pk=request.pk).update(status='Repaired')
+        self.assertEqual(open_count(), 5)
+        # ... until the bulk signal fires
+        requests_bulk_updated.send(sender=None, request_ids=[request.pk], technician_ids=[self.tech2.pk])
+        self.assertEqual(open_count(), 4)
+
+        idle = User.objects.create_user('idle')
+        self.team.members.add(idle)
+        self.assertIn(idle.pk, self._cells(get_workload()))
+
+        other = self._request(self.die, 'New', self.tech2)
+        self.assertEqual(open_count(), 5)
+        other.delete()
+        self.assertEqual(open_count(), 4)
+
+    def test_manager_only_endpoint(self):
+        self.client.force_login(self.tech1)
+        self.assertEqual(self.client.get('/maintenance/api/workload/').status_code, 403)
+        self.client.force_login(self.manager)
+        response = self.client.get('/maintenance/api/workload/')
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(self._team(response.json())['totals']['open'], 4)
+
+
+class TechnicianLoadTests(WorkflowTestCase):
+    """TechnicianLoad rows follow request creation and transitions."""
+
+    def _load(self, user):
+        return TechnicianLoad.objects.filter(user=user).values_list(
+            'open_count', 'estimated_hours', 'due_count', 'due_ordinal_sum'
+        ).first()
+
+    def test_create_view_with_due_date_updates_load(self):
+        due = timezone.localdate() + datetime.timedelta(days=3)
+        self.client.force_login(self.manager)
+        response = self.client.post('/maintenance/request/new/', {
+            'subject': 'Leak', 'request_type': 'Corrective', 'equipment': self.press.pk,
+            'due_date': due.isoformat(), 'duration': '1.5',
+        })
+        self.assertEqual(response.status_code, 302)
+        request = MaintenanceRequest.objects.get(subject='Leak')
+        self.assertEqual(request.due_date, due)
+        self.assertIn(request.assigned_technician, (self.tech1, self.tech2))
+        self.assertEqual(self._load(request.assigned_technician), (1, 1.5, 1, due.toordinal()))
+        self.assertLoadsMatchRebuild()
+
+    def test_create_view_rejects_bad_dates(self):
+        self.client.force_login(self.manager)
+        response = self.client.post('/maintenance/request/new/', {
+            'subject': 'Leak', 'equipment': self.press.pk, 'due_date': 'soon',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('YYYY-MM-DD', response.context['error'])
+        self.assertFalse(MaintenanceRequest.objects.filter(subject='Leak').exists())
+
+    def test_raw_string_values_are_coerced(self):
+        request = MaintenanceRequest(
+            subject='Leak', request_type='Corrective', equipment=self.press,
+            assigned_technician=self.tech1, due_date='2030-01-02', duration='2',
+        )
+        request.save()
+        self.assertEqual(self._load(self.tech1), (1, 2.0, 1, datetime.date(2030, 1, 2).toordinal()))
+
+        request.status = 'Repaired'
+        request.save()
+        self.assertEqual(self._load(self.tech1), (0, 0.0, 0, 0))
+        self.assertLoadsMatchRebuild()
+
+    def test_reassignment_moves_load(self):
+        request = self._request(self.press, 'New', self.tech1, due_date=datetime.date(2030, 1, 2), duration=4)
+        request = MaintenanceRequest.objects.get(pk=request.pk)
+        request.assigned_technician = self.tech2
+        request.save()
+        self.assertEqual(self._load(self.tech1), (0, 0.0, 0, 0))
+        self.assertEqual(self._load(self.tech2)[:3], (1, 4.0, 1))
+        self.assertLoadsMatchRebuild()
+
+
+@override_settings(SQLITE_BUSY_RETRIES=20, SQLITE_BUSY_RETRY_DELAY=0.02)
+class TechnicianLoadRebuildRaceTests(TransactionTestCase):
+    """
+    A load delta that arrives while rebuild_loads() runs is applied after
+    the rebuild, not overwritten by it. A TransactionTestCase, so the
+    delta comes from a second connection.
+    """
+
+    def setUp(self):
+        team_index.expire()
+        self.manager = User.objects.create_user('manager', password='x', is_staff=True)
+        self.tech = User.objects.create_user('tech1', password='x')
+        self.press = Equipment.objects.create(
+            name='Press', serial_number='SN-Press',
+            department=Department.get_for_name('Production'),
+            location=Location.get_for_name('Hall 1'),
+            purchase_date=datetime.date(2024, 1, 1),
+        )
+        self._create('Worn belt')
+
+    def _create(self, subject):
+        return MaintenanceRequest.objects.create(
+            subject=subject, request_type='Corrective', equipment=self.press,
+            assigned_technician=self.tech, duration=2, created_by=self.manager,
+        )
+
+    def test_delta_during_rebuild_is_not_lost(self):
+        from maintenance.assignment import rebuild_loads
+
+        def create_concurrently():
+            try:
+                retry_on_busy(self._create)('Leak')
+            finally:
+                connection.close()
+
+        bulk_create = TechnicianLoad.objects.bulk_create
+        writer = threading.Thread(target=create_concurrently)
+
+        def upsert_after_concurrent_write(*args, **kwargs):
+            # The rebuild has read the requests; a save on another
+            # connection now tries to apply its delta
+            writer.start()
+            writer.join(0.2)
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(TechnicianLoad.objects, 'bulk_create', side_effect=upsert_after_concurrent_write):
+            rebuild_loads([self.tech.pk])
+        writer.join()
+
+        self.assertEqual(MaintenanceRequest.objects.filter(assigned_technician=self.tech).count(), 2)
+        self.assertEqual(TechnicianLoad.objects.get(user=self.tech).open_count, 2)
+        self.assertEqual(TechnicianLoad.objects.get(user=self.tech).estimated_hours, 4.0)
+
+
+@mock.patch.object(EstimatedCountPaginator, 'ESTIMATE_THRESHOLD', 5)
+class EstimatedCountPaginatorTests(WorkflowTestCase):
+    """MAX(pk) estimates are corrected once a page reaches the real end."""
+
+    def setUp(self):
+        super().setUp()
+        MaintenanceRequest.objects.bulk_create([
+            MaintenanceRequest(subject=f'R{i}', request_type='Corrective', equipment=self.pump)
+            for i in range(30)
+        ])
+        ids = list(MaintenanceRequest.objects.order_by('id').values_list('id', flat=True))
+        # Deleting from the middle leaves MAX(pk) 10 rows ahead of the count
+        MaintenanceRequest.objects.filter(id__in=ids[5:15]).delete()
+        self.queryset = MaintenanceRequest.objects.order_by('id')
+
+    def test_estimate_overshoots_until_the_end(self):
+        paginator = EstimatedCountPaginator(self.queryset, 6)
+        self.assertGreaterEqual(paginator.count, 30)
+        self.assertEqual(len(paginator.page(1).object_list), 6)
+        self.assertTrue(paginator.estimated)
+
+        last = paginator.page(4)
+        self.assertEqual(len(last.object_list), 2)
+        self.assertEqual(paginator.count, 20)
+        self.assertEqual(paginator.num_pages, 4)
+        self.assertFalse(last.has_next())
+
+    def test_page_past_the_end_counts_exactly(self):
+        paginator = EstimatedCountPaginator(self.queryset, 5)
+        self.assertGreater(paginator.num_pages, 4)
+        with self.assertRaises(EmptyPage):
+            paginator.page(5)
+        self.assertEqual(paginator.count, 20)
+        self.assertEqual(paginator.num_pages, 4)
+        self.assertEqual(len(paginator.page(4).object_list), 5)
+
+    def test_filtered_querysets_count_exactly(self):
+        paginator = EstimatedCountPaginator(self.queryset.filter(status='New'), 6)
+        self.assertEqual(paginator.count, 20)
+        self.assertFalse(paginator.estimated)
+
+    def test_admin_changelist_pages(self):
+        from maintenance.admin import MaintenanceRequestAdmin
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        url = '/admin/maintenance/maintenancerequest/'
+        with mock.patch.object(MaintenanceRequestAdmin, 'list_per_page', 6):
+            last = self.client.get(url, {'p': 4})
+            self.assertEqual(last.status_code, 200)
+            self.assertEqual(len(last.context['cl'].result_list), 2)
+            self.assertEqual(last.context['cl'].paginator.num_pages, 4)
+            # Trailing pages the estimate promised redirect like out-of-range pages
+            response = self.client.get(url, {'p': 5})
+            self.assertRedirects(response, url + '?e=1', fetch_redirect_response=False)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class BulkWorkflowTests(WorkflowTestCase):
+    """Admin bulk actions validate every row and write in chunks."""
+
+    def setUp(self):
+        super().setUp()
+        self.new = [self._request(self.press, 'New', self.tech1, duration=1) for _ in range(3)]
+        self.started = self._request(self.robot, 'In Progress', self.tech2)
+        self.done = self._request(self.pump, 'Repaired', self.tech2)
+
+    def _apply(self, action, user=None, ids=None, **params):
+        queryset = MaintenanceRequest.objects.all()
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        with self.captureOnCommitCallbacks(execute=True):
+            return BulkWorkflow.apply(queryset, action, user or self.manager, **params)
+
+    def test_per_row_failures(self):
+        result = self._apply('start')
+        self.assertEqual(sorted(result['succeeded']), [r.pk for r in self.new])
+        self.assertEqual(set(result['failed']), {self.started.pk, self.done.pk})
+        self.assertIn('In Progress', result['failed'][self.started.pk])
+        self.assertStatuses(self.new, 'In Progress')
+        self.assertStatuses([self.done], 'Repaired')
+        self.assertIsNone(result['cascade'])
+
+    def test_permission_failures_are_reported_per_row(self):
+        result = self._apply('start', user=self.tech1)
+        # tech1 may start its own requests only
+        self.assertEqual(sorted(result['succeeded']), [r.pk for r in self.new])
+        self.assertIn(self.started.pk, result['failed'])
+
+        result = self._apply('complete', user=self.viewer, duration=2)
+        self.assertEqual(result['succeeded'], [])
+        self.assertEqual(len(result['failed']), 5)
+
+    def test_chunk_boundaries(self):
+        with mock.patch.object(BulkWorkflow, 'CHUNK_SIZE', 2):
+            result = self._apply('assign_technician', technician=self.tech2)
+        self.assertEqual(sorted(result['succeeded'] + list(result['failed'])),
+                         sorted(MaintenanceRequest.objects.values_list('pk', flat=True)))
+        self.assertEqual(
+            set(MaintenanceRequest.objects.filter(status__in=['New', 'In Progress'])
+                .values_list('assigned_technician', flat=True)),
+            {self.tech2.pk},
+        )
+
+    def test_loads_are_rebuilt_after_commit(self):
+        self._apply('assign_technician', ids=[r.pk for r in self.new], technician=self.tech2)
+        self.assertEqual(TechnicianLoad.objects.get(user=self.tech1).open_count, 0)
+        self.assertEqual(TechnicianLoad.objects.get(user=self.tech2).open_count, 4)
+        self._apply('complete', ids=[self.started.pk], duration=2)
+        self.assertEqual(TechnicianLoad.objects.get(user=self.tech2).open_count, 3)
+        self.assertLoadsMatchRebuild()
+
+    def test_scrap_cascades_like_the_kanban_board(self):
+        other = self._request(self.press, 'In Progress', self.tech2)
+        result = self._apply('scrap', ids=[self.new[0].pk])
+        self.assertEqual(result['succeeded'], [self.new[0].pk])
+        self.assertEqual(sorted(result['cascade']['request_ids']),
+                         sorted([r.pk for r in self.new[1:]] + [other.pk]))
+        self.assertTrue(Equipment.objects.get(pk=self.press.pk).is_scrapped)
+        self.assertStatuses(self.new + [other], 'Scrap')
+        self.assertStatuses([self.started], 'In Progress')
+
+        # The same move on the board leaves the same state
+        self.client.force_login(self.manager)
+        response = self.client.post(
+            '/maintenance/api/kanban-move/',
+            json.dumps({'id': self.started.pk, 'new_status': 'Scrap'}),
+            content_type='application/json',
+        )
+        self.assertTrue(response.json()['success'])
+        self.assertTrue(Equipment.objects.get(pk=self.robot.pk).is_scrapped)
+        self.assertLoadsMatchRebuild()
+
+    def test_unknown_action(self):
+        with self.assertRaises(InvalidTransitionError):
+            self._apply('repair')
+
+    def test_admin_actions(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        url = '/admin/maintenance/maintenancerequest/'
+        response = self.client.post(url, {
+            'action': 'start_work_action',
+            '_selected_action': [self.new[0].pk, self.done.pk],
+        }, follow=True)
+        texts = [str(m) for m in response.context['messages']]
+        self.assertIn('1 request(s) updated.', texts)
+        self.assertTrue(any(t.startswith('1 request(s) skipped') for t in texts))
+        self.assertStatuses([self.new[0]], 'In Progress')
+
+        response = self.client.post(url, {
+            'action': 'scrap_action', '_selected_action': [self.started.pk],
+        }, follow=True)
+        texts = [str(m) for m in response.context['messages']]
+        self.assertIn('Scrapped 1 equipment and 0 open request(s).', texts)
+        self.assertTrue(Equipment.objects.get(pk=self.robot.pk).is_scrapped)
+
+
+class WorkQueueTests(WorkflowTestCase):
+    """Keyset pages of a technician's queue and the delta sync."""
+
+    def setUp(self):
+        super().setUp()
+        day = datetime.date(2030, 5, 1)
+        dues = [day, day + datetime.timedelta(days=2), day, None, day - datetime.timedelta(days=1), day, None]
+        self.queue = [self._request(self.press, 'New', self.tech1, due_date=due) for due in dues]
+        self.queue[1].status = 'In Progress'
+        self.queue[1].save()
+        self._request(self.press, 'Repaired', self.tech1, due_date=day)
+        self._request(self.press, 'New', self.tech2, due_date=day)
+        # Written well before any sync token of the tests
+        MaintenanceRequest.objects.update(updated_at=timezone.now() - datetime.timedelta(hours=1))
+
+    def _order(self, requests):
+        far = datetime.date.max
+        return [r.pk for r in sorted(requests, key=lambda r: (r.due_date or far, r.pk))]
+
+    def _walk(self, limit):
+        from maintenance import work_queue
+        ids, cursor, pages = [], None, 0
+        while True:
+            page = work_queue.queue_page(self.tech1, cursor=cursor, limit=limit)
+            ids.extend(card['id'] for card in page['results'])
+            pages += 1
+            cursor = page['next_cursor']
+            if not cursor:
+                return ids, pages
+
+    def test_pages_cover_the_queue_once_across_ties(self):
+        expected = self._order(self.queue)
+        for limit in (1, 2, 3, 7, 100):
+            with self.subTest(limit=limit):
+                ids, pages = self._walk(limit)
+                self.assertEqual(ids, expected)
+                self.assertEqual(pages, -(-len(expected) // limit))
+
+    def test_cursor_is_stable_when_rows_arrive_before_it(self):
+        from maintenance import work_queue
+        first = work_queue.queue_page(self.tech1, limit=4)
+        # New work due before the cursor position is not replayed
+        self._request(self.press, 'New', self.tech1, due_date=datetime.date(2030, 1, 1))
+        rest = work_queue.queue_page(self.tech1, cursor=first['next_cursor'], limit=100)
+        ids = [c['id'] for c in first['results'] + rest['results']]
+        self.assertEqual(ids, self._order(self.queue))
+
+    def test_delta_returns_changes_and_remaining_ids(self):
+        from maintenance import work_queue
+        token = work_queue.queue_page(self.tech1)['sync_token']
+
+        completed, reassigned, edited = self.queue[1], self.queue[2], self.queue[3]
+        MaintenanceRequest.objects.filter(pk=completed.pk).update(status='Repaired', updated_at=timezone.now())
+        reassigned.assigned_technician = self.tech2
+        reassigned.save()
+        edited.subject = 'Edited'
+        edited.save()
+
+        delta = work_queue.queue_delta(self.tech1, token)
+        self.assertEqual([c['id'] for c in delta['changed']], [edited.pk])
+        self.assertEqual(delta['changed'][0]['subject'], 'Edited')
+        remaining = [r for r in self.queue if r not in (completed, reassigned)]
+        self.assertEqual(delta['ids'], self._order(remaining))
+
+        # Changes inside the overlap window are sent again
+        again = work_queue.queue_delta(self.tech1, delta['sync_token'])
+        self.assertEqual([c['id'] for c in again['changed']], [edited.pk])
+        self.assertEqual(again['ids'], delta['ids'])
+        with mock.patch.object(work_queue, 'SYNC_OVERLAP', datetime.timedelta(0)):
+            self.assertEqual(work_queue.queue_delta(self.tech1, delta['sync_token'])['changed'], [])
+
+    def test_delta_includes_rows_committed_after_the_token(self):
+        from maintenance import work_queue
+        token = work_queue.queue_page(self.tech1)['sync_token']
+        # Stamped before the token was issued, committed after the read
+        late = self.queue[0]
+        stamped = work_queue.decode_sync_token(token) - datetime.timedelta(seconds=1)
+        MaintenanceRequest.objects.filter(pk=late.pk).update(subject='Late', updated_at=stamped)
+
+        delta = work_queue.queue_delta(self.tech1, token)
+        self.assertIn(late.pk, [c['id'] for c in delta['changed']])
+
+    def test_invalid_cursor_and_token(self):
+        from maintenance import work_queue
+        for bad in ('!!', 'bm9wZQ'):
+            with self.assertRaises(work_queue.InvalidCursor):
+                work_queue.queue_page(self.tech1, cursor=bad)
+        with self.assertRaises(work_queue.InvalidCursor):
+            work_queue.queue_delta(self.tech1, 'yesterday')
+
+        self.client.force_login(self.tech1)
+        response = self.client.get('/maintenance/api/work-queue/', {'cursor': '!!'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error_type'], 'validation')
+        response = self.client.get('/maintenance/api/work-queue/', {'limit': 3})
+        self.assertEqual([c['id'] for c in response.json()['results']], self._order(self.queue)[:3])
+
+
+class OverdueTests(WorkflowTestCase):
+    """overdue_q(), with_overdue() and is_overdue agree on one definition."""
+
+    def test_due_date_boundary_and_closed_statuses(self):
+        today = timezone.localdate()
+        yesterday, tomorrow = today - datetime.timedelta(days=1), today + datetime.timedelta(days=1)
+        cases = {
+            ('New', yesterday): True,
+            ('In Progress', yesterday): True,
+            ('New', today): False,
+            ('In Progress', tomorrow): False,
+            ('New', None): False,
+            ('Repaired', yesterday): False,
+            ('Scrap', yesterday): False,
+        }
+        requests = {key: self._request(self.pump, key[0], due_date=key[1]) for key in cases}
+
+        overdue_ids = set(MaintenanceRequest.objects.overdue().values_list('id', flat=True))
+        annotated = {r.pk: r for r in MaintenanceRequest.objects.with_overdue()}
+        for key, expected in cases.items():
+            with self.subTest(status=key[0], due=key[1]):
+                pk = requests[key].pk
+                self.assertEqual(pk in overdue_ids, expected)
+                self.assertEqual(annotated[pk].overdue_flag, expected)
+                self.assertEqual(annotated[pk].is_overdue, expected)
+                self.assertEqual(MaintenanceRequest.objects.get(pk=pk).is_overdue, expected)
+
+    def test_explicit_today(self):
+        due = datetime.date(2030, 1, 10)
+        request = self._request(self.pump, 'New', due_date=due)
+        self.assertFalse(MaintenanceRequest.objects.overdue(today=due).filter(pk=request.pk).exists())
+        self.assertTrue(
+            MaintenanceRequest.objects.overdue(today=due + datetime.timedelta(days=1))
+            .filter(pk=request.pk).exists()
+        )
+
+
+class LoadGeneratorTests(TestCase):
+    """Generated datasets depend only on seed, sizes and anchor."""
+
+    FIELDS = ('subject', 'request_type', 'status', 'scheduled_date', 'due_date',
+              'duration', 'created_at', 'updated_at')
+
+    def _rows(self, dataset):
+        return list(
+            MaintenanceRequest.objects.filter(equipment_id__in=dataset['equipment_ids'])
+            .order_by('id').values_list(*self.FIELDS)
+        )
+
+    def test_same_seed_and_anchor_give_same_rows(self):
+        sizes = loadgen.sizes_for('tiny', requests=200)
+        anchor = datetime.date(2030, 6, 1)
+        first = loadgen.generate(sizes, seed=3, prefix='DA', anchor=anchor)
+        second = loadgen.generate(sizes, seed=3, prefix='DB', anchor=anchor)
+        self.assertEqual(self._rows(first), self._rows(second))
+        self.assertEqual(
+            User.objects.get(pk=first['manager_id']).password,
+            User.objects.get(pk=second['manager_id']).password,
+        )
+        latest = max(row[-2] for row in self._rows(first))
+        self.assertLess(latest, timezone.make_aware(datetime.datetime(2030, 6, 1)))
+
+        other_day = loadgen.generate(sizes, seed=3, prefix='DC', anchor=datetime.date(2030, 6, 2))
+        self.assertNotEqual(self._rows(first), self._rows(other_day))
+
+
+class BenchmarkCompareTests(SimpleTestCase):
+    """benchmarks.compare() against hand-built result dicts."""
+
+    def _results(self, **scenarios):
+        return {'results': {'1x': {
+            name: {'queries': q, 'p95_ms': p95, 'peak_kb': kb} for name, (q, p95, kb) in scenarios.items()
+        }}}
+
+    def test_regressions(self):
+        baseline = self._results(
+            kanban_data=(4, 10.0, 500.0), calendar=(3, 2.0, 100.0), detail=(5, 8.0, 300.0),
+        )
+        current = self._results(
+            kanban_data=(5, 13.0, 700.0),   # +1 query, p95 +30%, memory +200 KiB
+            calendar=(3, 2.9, 150.0),       # +45% but under the absolute noise floors
+            detail=(4, 8.5, 300.0),         # fewer queries, p95 within threshold
+        )
+        self.assertEqual(benchmarks.compare(current, baseline), [
+            '1x kanban_data: queries 4 -> 5',
+            '1x kanban_data: p95 10.00 ms -> 13.00 ms',
+            '1x kanban_data: peak memory 500 KiB -> 700 KiB',
+        ])
+
+    def test_threshold(self):
+        baseline = self._results(kanban_data=(4, 10.0, 500.0))
+        current = self._results(kanban_data=(4, 13.0, 500.0))
+        self.assertEqual(benchmarks.compare(current, baseline, threshold=0.5), [])
+        self.assertEqual(len(benchmarks.compare(current, baseline, threshold=0.1)), 1)
+
+    def test_missing_scales_scenarios_and_query_counts_are_skipped(self):
+        baseline = self._results(kanban_data=(None, 10.0, 500.0))
+        current = self._results(kanban_data=(9, 10.0, 500.0), new_scenario=(50, 99.0, 9000.0))
+        current['results']['10x'] = current['results']['1x']
+        self.assertEqual(benchmarks.compare(current, baseline), [])
+        self.assertEqual(benchmarks.compare(current, {}), [])
@@ -6,6 +6,7 @@ app_name = 'maintenance'
 urlpatterns = [
     # Existing views
     path('', views.kanban_board, name='kanban'),
+    path('kanban/benchmark/', views.kanban_benchmark, name='kanban_benchmark'),
     path('api/equipment-details/', views.get_equipment_details, name='api_equipment_details'),
     path('request/new/', views.create_maintenance_request, name='create_request'),
     
@@ -14,11 +15,14 @@ urlpatterns = [
     path('api/start-work/', views.start_work, name='api_start_work'),
     path('api/complete-work/', views.complete_work, name='api_complete_work'),
     path('api/scrap-request/', views.scrap_request, name='api_scrap_request'),
+    path('api/scrap-equipment/', views.scrap_equipment, name='api_scrap_equipment'),
     path('api/request-actions/', views.get_request_actions, name='api_request_actions'),
     path('api/kanban-data/', views.kanban_data, name='api_kanban_data'),
     path('api/kanban-move/', views.kanban_move, name='api_kanban_move'),
     path('calendar/', views.calendar_page, name='calendar'),
     path('api/calendar-data/', views.calendar_data, name='api_calendar_data'),
+    path('api/workload/', views.workload_data, name='api_workload'),
+    path('api/work-queue/', views.work_queue_data, name='api_work_queue'),
     
     # PHASE 9: Reports
     path('reports/team-requests/', views.report_team_requests, name='report_team_requests'),
@@ -1,98 +1,287 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, condition
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db.models import Q
+from django.db.models import Q, Count, F, Max, Window
+from django.db.models.functions import RowNumber
 from django.views.decorators.csrf import csrf_exempt
+from gearguard.db import retry_on_busy
+from gearguard.query_budget import query_budget
 from .models import MaintenanceRequest
-from equipment.models import Equipment
+from equipment.models import Equipment, Department
+from equipment.tree import filter_requests_by_subtree
+from teams.membership import team_index
+from .workload import get_workload
+from . import work_queue
+from .assignment import AssignmentEngine
 from .workflow import (
     WorkflowEngine, PermissionChecker, WorkflowException, 
     InvalidTransitionError, PermissionError as WorkflowPermissionError,
-    MissingDataError, get_available_actions, get_workflow_state
+    MissingDataError, ScrapCascade, get_available_actions, get_workflow_state
 )
 from django.utils import timezone
-from datetime import date
+from datetime import date, datetime
 import calendar as _calendar
-from django.db import transaction
 from django.urls import reverse
 
 
 
+KANBAN_COLUMNS = ['New', 'In Progress', 'Repaired', 'Scrap']
+KANBAN_PAGE_SIZE = 50
+
+
+def _kanban_card(r):
+    """Serialize a request for the Kanban board (shared by HTML and API)."""
+    card = {
+        'id': r.id,
+        'subject': r.subject,
+        'equipment': r.equipment.name if r.equipment else None,
+        'assigned_technician': None,
+        'scheduled_date': r.scheduled_date.isoformat() if r.scheduled_date else None,
+        'is_overdue': r.is_overdue,
+        'status': r.status,
+        # Column order key (with id); fixed width so clients can compare strings
+        'created_at': r.created_at.isoformat(timespec='microseconds'),
+    }
+    if r.assigned_technician:
+        card['assigned_technician'] = {
+            'id': r.assigned_technician.id,
+            'name': r.assigned_technician.get_full_name() or r.assigned_technician.username,
+            'avatar': (r.assigned_technician.username[:1].upper())
+        }
+    return card
+
+
+def kanban_snapshot(per_column=KANBAN_PAGE_SIZE, statuses=None, offset=0):
+    """
+    Return ({status: [cards]}, {status: total}) for the first page of each
+    column using a single query.
+
+    Rows are ranked within their status with ROW_NUMBER() and the column
+    total comes from a COUNT() window over the same partition, so one
+    statement returns both the page and the badge counts.
+    """
+    qs = MaintenanceRequest.objects.with_overdue().select_related(
+        'equipment', 'assigned_technician'
+    )
+    if statuses:
+        qs = qs.filter(status__in=statuses)
+    qs = qs.annotate(
+        column_rank=Window(
+            RowNumber(),
+            partition_by=[F('status')],
+            order_by=[F('created_at').desc(), F('id').desc()],
+        ),
+        column_total=Window(Count('id'), partition_by=[F('status')]),
+    ).filter(
+        column_rank__gt=offset, column_rank__lte=offset + per_column
+    ).order_by('status', 'column_rank')
+
+    grouped = {status: [] for status in KANBAN_COLUMNS}
+    counts = {status: 0 for status in KANBAN_COLUMNS}
+    for r in qs:
+        column = r.status if r.status in grouped else 'New'
+        grouped[column].append(_kanban_card(r))
+        counts[column] = r.column_total
+    return grouped, counts
+
+
+@query_budget(3)
 def kanban_board(request):
     # If the user is not authenticated, send them to the landing page
     # with a `next` parameter so they can login and return here.
     if not request.user.is_authenticated:
         return redirect(reverse('home') + f"?next={request.path}")
 
-    new_requests = MaintenanceRequest.objects.filter(status="New")
-    in_progress_requests = MaintenanceRequest.objects.filter(status="In Progress")
-    repaired_requests = MaintenanceRequest.objects.filter(status="Repaired")
-    scrap_requests = MaintenanceRequest.objects.filter(status="Scrap")
-
-    columns = [
-        ("New", new_requests),
-        ("In Progress", in_progress_requests),
-        ("Repaired", repaired_requests),
-        ("Scrap", scrap_requests),
-    ]
-
+    # Render the first page of every column into the page so the board
+    # draws without waiting for a kanban_data round trip.
+    grouped, counts = kanban_snapshot()
     context = {
-        "columns": columns
+        "initial_board": {
+            'success': True,
+            'data': grouped,
+            'counts': counts,
+            'page_size': KANBAN_PAGE_SIZE,
+            'user_role': PermissionChecker.get_user_role(request.user),
+        }
     }
 
     return render(request, "maintenance/kanban.html", context)
 
 
+@query_budget(2)
+@login_required
+@require_http_methods(["GET"])
+def kanban_benchmark(request):
+    """
+    In-browser render benchmark for kanban.js.
+
+    Uses synthetic cards generated client-side from a seed, so results are
+    reproducible and independent of the database. Query parameters:
+    cards (default 10000), seed (default 1), runs (default 5).
+    """
+    return render(request, 'maintenance/kanban_benchmark.html')
+
+
+def kanban_column_after(status, after, per_column=KANBAN_PAGE_SIZE):
+    """
+    Return ([cards], total) for the cards of one column that come after a
+    keyset cursor (created_at, id) in board order (newest first). Unlike an
+    offset, the cursor stays correct when cards move in or out of the
+    column above it.
+    """
+    created_at, last_id = after
+    qs = MaintenanceRequest.objects.filter(status=status)
+    page = qs.with_overdue().select_related('equipment', 'assigned_technician').filter(
+        Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=last_id)
+    ).order_by('-created_at', '-id')[:per_column]
+    return [_kanban_card(r) for r in page], qs.count()
+
+
+def _parse_kanban_cursor(value):
+    """'<created_at ISO>|<id>' as sent by kanban.js -> (datetime, id)."""
+    created_at, _, last_id = value.rpartition('|')
+    created_at = datetime.fromisoformat(created_at)
+    if timezone.is_naive(created_at):
+        raise ValueError(value)
+    return created_at, int(last_id)
+
+
+@query_budget(3)
 @login_required
 @require_http_methods(["GET"])
 def kanban_data(request):
     """
     API: Return Kanban data grouped by status.
+    
+    Query Parameters (optional):
+    - per_column: page size per column (default: all cards)
+    - status: restrict to one column (used for "load more")
+    - after: '<created_at>|<id>' of the last card loaded in that column
+      (keyset "load more"; needs status)
+    - offset: number of cards already loaded in that column
+    
+    Returns: { success, data: {status: [cards]}, counts: {status: total}, user_role }
     """
-    qs = MaintenanceRequest.objects.select_related(
-        'equipment', 'assigned_team', 'assigned_technician', 'created_by'
-    ).order_by('-created_at')
+    try:
+        per_column = int(request.GET['per_column']) if request.GET.get('per_column') else None
+        offset = int(request.GET.get('offset', 0))
+        after = _parse_kanban_cursor(request.GET['after']) if request.GET.get('after') else None
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid per_column, offset or after'}, status=400)
 
-    grouped = {'New': [], 'In Progress': [], 'Repaired': [], 'Scrap': []}
+    status_filter = request.GET.get('status')
+    statuses = [status_filter] if status_filter in KANBAN_COLUMNS else None
 
-    for r in qs:
-        card = {
-            'id': r.id,
-            'subject': r.subject,
-            'equipment': r.equipment.name if r.equipment else None,
-            'assigned_technician': None,
-            'scheduled_date': r.scheduled_date.isoformat() if r.scheduled_date else None,
-            'is_overdue': r.is_overdue,
-            'status': r.status,
-        }
-        if r.assigned_technician:
-            card['assigned_technician'] = {
-                'id': r.assigned_technician.id,
-                'name': r.assigned_technician.get_full_name() or r.assigned_technician.username,
-                'avatar': (r.assigned_technician.username[:1].upper())
-            }
+    if after and statuses:
+        grouped = {status: [] for status in KANBAN_COLUMNS}
+        counts = {status: 0 for status in KANBAN_COLUMNS}
+        grouped[status_filter], counts[status_filter] = kanban_column_after(
+            status_filter, after, per_column or KANBAN_PAGE_SIZE
+        )
+    elif per_column:
+        grouped, counts = kanban_snapshot(per_column=per_column, statuses=statuses, offset=offset)
+    else:
+        qs = MaintenanceRequest.objects.with_overdue().select_related(
+            'equipment', 'assigned_technician'
+        ).order_by('-created_at', '-id')
+        if statuses:
+            qs = qs.filter(status__in=statuses)
 
-        if r.status in grouped:
-            grouped[r.status].append(card)
-        else:
-            grouped['New'].append(card)
+        grouped = {status: [] for status in KANBAN_COLUMNS}
+        for r in qs:
+            card = _kanban_card(r)
+            if r.status in grouped:
+                grouped[r.status].append(card)
+            else:
+                grouped['New'].append(card)
+        counts = {status: len(cards) for status, cards in grouped.items()}
 
     return JsonResponse({
         'success': True,
         'data': grouped,
+        'counts': counts,
         'user_role': PermissionChecker.get_user_role(request.user)
     }, status=200)
 
 
+def _kanban_move_result(request_id, from_status, cascaded_from=None):
+    """
+    Build the part of a kanban_move response the board needs to apply a
+    move locally: the updated card(s) and per-column count deltas.
+
+    Args:
+        request_id: id of the moved request
+        from_status: its status before the move
+        cascaded_from: {request_id: previous status} for requests moved as
+            a side effect (scrap cascade)
+    """
+    cascaded_from = cascaded_from or {}
+    moved = {
+        r.id: r for r in MaintenanceRequest.objects.with_overdue().select_related(
+            'equipment', 'assigned_technician'
+        ).filter(id__in=[request_id, *cascaded_from])
+    }
+
+    deltas = {status: 0 for status in KANBAN_COLUMNS}
+    for rid, previous in [(request_id, from_status), *cascaded_from.items()]:
+        r = moved.get(rid)
+        if r is None or r.status == previous:
+            continue
+        deltas[previous] = deltas.get(previous, 0) - 1
+        deltas[r.status] = deltas.get(r.status, 0) + 1
+
+    card = moved.get(request_id)
+    return {
+        'card': _kanban_card(card) if card else None,
+        'from_status': from_status,
+        'count_deltas': {status: d for status, d in deltas.items() if d},
+        'cascaded': [
+            dict(_kanban_card(moved[rid]), from_status=previous)
+            for rid, previous in cascaded_from.items() if rid in moved
+        ],
+    }
+
+
+@retry_on_busy
+def _scrap_with_equipment(mr, from_status, user):
+    """
+    Scrap a request, its equipment and the equipment's other open requests
+    as one unit, retried whole when SQLite is busy (see gearguard.db).
+
+    Returns (result, cascade, cascaded_from), cascaded_from being
+    {request_id: status} of the other open requests before the cascade.
+    """
+    # A retried attempt starts again from the status that was loaded
+    mr.status = from_status
+    # Remember where the other open requests sit so the board can move
+    # them without reloading
+    cascaded_from = dict(
+        MaintenanceRequest.objects.filter(
+            equipment_id=mr.equipment_id,
+            status__in=ScrapCascade.OPEN_STATUSES,
+        ).exclude(id=mr.id).values_list('id', 'status')
+    )
+    result = WorkflowEngine.scrap_request(mr, user)
+    # Scrap automation: scrap the equipment and cascade to its other open
+    # requests
+    cascade = ScrapCascade.scrap_equipment([mr.equipment_id], user)
+    return result, cascade, cascaded_from
+
+
+@query_budget(5)
 @login_required
 @require_http_methods(["POST"])
 def kanban_move(request):
     """
     API: Move a card to a new status (called by drag-and-drop).
     Expects JSON body: { id: <int>, new_status: <str>, duration: <float, optional> }
+
+    On success the response also carries the updated `card`, its
+    `from_status`, `count_deltas` ({status: +/-n}) and any `cascaded`
+    cards, so the board can apply the move without refetching.
     """
     import json
 
@@ -113,27 +302,51 @@ def kanban_move(request):
     except MaintenanceRequest.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Request not found'}, status=404)
 
-    if mr.status == new_status:
-        return JsonResponse({'success': True, 'message': 'No change', 'status': mr.status}, status=200)
+    from_status = mr.status
+    if from_status == new_status:
+        return JsonResponse({
+            'success': True,
+            'message': 'No change',
+            'status': mr.status,
+            **_kanban_move_result(mr.id, from_status),
+        }, status=200)
 
     try:
         if new_status == 'In Progress':
             result = WorkflowEngine.start_work(mr, request.user)
-            return JsonResponse({'success': True, 'message': result['message'], 'status': result['status']}, status=200)
+            return JsonResponse({
+                'success': True,
+                'message': result['message'],
+                'status': result['status'],
+                **_kanban_move_result(mr.id, from_status),
+            }, status=200)
 
         if new_status == 'Repaired':
             if duration is None:
                 return JsonResponse({'success': False, 'error': 'Duration required to complete work', 'error_type': 'workflow'}, status=400)
             result = WorkflowEngine.complete_work(mr, duration, request.user)
-            return JsonResponse({'success': True, 'message': result['message'], 'status': result['status'], 'duration': result['duration']}, status=200)
+            return JsonResponse({
+                'success': True,
+                'message': result['message'],
+                'status': result['status'],
+                'duration': result['duration'],
+                **_kanban_move_result(mr.id, from_status),
+            }, status=200)
 
         if new_status == 'Scrap':
-            with transaction.atomic():
-                result = WorkflowEngine.scrap_request(mr, request.user)
-                # Scrap automation: mark equipment as scrapped
-                if result['status'] == 'Scrap':
-                    mr.equipment.mark_scrapped()
-            return JsonResponse({'success': True, 'message': result['message'], 'status': result['status']}, status=200)
+            result, cascade, cascaded_from = _scrap_with_equipment(mr, from_status, request.user)
+            cascaded_ids = set(cascade['request_ids'])
+            cascaded_from = {
+                rid: status for rid, status in cascaded_from.items()
+                if rid in cascaded_ids
+            }
+            return JsonResponse({
+                'success': True,
+                'message': result['message'],
+                'status': result['status'],
+                'cascaded_request_ids': cascade['request_ids'],
+                **_kanban_move_result(mr.id, from_status, cascaded_from),
+            }, status=200)
 
         return JsonResponse({'success': False, 'error': f'Unsupported status change to {new_status}'}, status=400)
 
@@ -145,6 +358,7 @@ def kanban_move(request):
         return JsonResponse({'success': False, 'error': str(e), 'error_type': 'unknown'}, status=500)
 
 
+@query_budget(5)
 @login_required
 @require_http_methods(["GET"])
 def get_equipment_details(request):
@@ -186,7 +400,12 @@ def get_equipment_details(request):
         }, status=400)
     
     try:
-        equipment = get_object_or_404(Equipment, id=equipment_id)
+        equipment = get_object_or_404(
+            Equipment.objects.select_related(
+                'department', 'default_maintenance_team', 'default_technician'
+            ),
+            id=equipment_id
+        )
     except Equipment.DoesNotExist:
         return JsonResponse({
             'success': False,
@@ -207,7 +426,7 @@ def get_equipment_details(request):
     response_data = {
         'success': True,
         'data': {
-            'department': equipment.department,
+            'department': equipment.department.name,
             'is_scrapped': equipment.is_scrapped,
             'warranty_status': 'Under Warranty' if equipment.is_under_warranty else 'Out of Warranty',
         },
@@ -238,33 +457,66 @@ def get_equipment_details(request):
     return JsonResponse(response_data, status=200)
 
 
-@login_required
-@require_http_methods(["GET"])
-def calendar_data(request):
-    """
-    API: Return preventive maintenance requests for a given month/year.
-    Query parameters: year, month (integers). Defaults to current month.
-    Returns: { success: True, events: [ { id, date, subject, equipment, assigned_technician } ] }
-    """
+def _calendar_month_range(request):
+    """Return (first_day, last_day) for the year/month query params, or None."""
     try:
         today = timezone.localdate()
         year = int(request.GET.get('year', today.year))
         month = int(request.GET.get('month', today.month))
+        return date(year, month, 1), date(year, month, _calendar.monthrange(year, month)[1])
     except Exception:
-        return JsonResponse({'success': False, 'error': 'Invalid year or month'}, status=400)
+        return None
 
-    # build month range
-    try:
-        first_day = date(year, month, 1)
-        last_day = date(year, month, _calendar.monthrange(year, month)[1])
-    except Exception:
-        return JsonResponse({'success': False, 'error': 'Invalid month/year range'}, status=400)
 
-    qs = MaintenanceRequest.objects.select_related('equipment', 'assigned_technician').filter(
+def _calendar_queryset(first_day, last_day):
+    return MaintenanceRequest.objects.filter(
         request_type='Preventive',
         scheduled_date__isnull=False,
         scheduled_date__range=(first_day, last_day),
         equipment__is_scrapped=False
+    )
+
+
+def calendar_etag(request):
+    """
+    ETag for one calendar month, from a single aggregate over the month.
+
+    Any edit, delete or move in/out of the month changes the count or the
+    latest updated_at of the requests (or their equipment), so clients can
+    revalidate a cached month without downloading it again.
+    """
+    month_range = _calendar_month_range(request)
+    if month_range is None:
+        return None
+    stats = _calendar_queryset(*month_range).aggregate(
+        count=Count('id'),
+        latest=Max('updated_at'),
+        equipment_latest=Max('equipment__updated_at'),
+    )
+    latest = stats['latest'].timestamp() if stats['latest'] else 0
+    equipment_latest = stats['equipment_latest'].timestamp() if stats['equipment_latest'] else 0
+    return f"{month_range[0]:%Y-%m}:{stats['count']}:{latest}:{equipment_latest}"
+
+
+@query_budget(4)
+@login_required
+@require_http_methods(["GET"])
+@condition(etag_func=calendar_etag)
+def calendar_data(request):
+    """
+    API: Return preventive maintenance requests for a given month/year.
+    Query parameters: year, month (integers). Defaults to current month.
+    Returns: { success: True, events: [ { id, date, subject, equipment, assigned_technician } ] }
+
+    Responses carry an ETag; a matching If-None-Match gets a 304.
+    """
+    month_range = _calendar_month_range(request)
+    if month_range is None:
+        return JsonResponse({'success': False, 'error': 'Invalid year or month'}, status=400)
+    first_day, last_day = month_range
+
+    qs = _calendar_queryset(first_day, last_day).select_related(
+        'equipment', 'assigned_technician'
     ).order_by('scheduled_date')
 
     events = []
@@ -281,6 +533,7 @@ def calendar_data(request):
     return JsonResponse({'success': True, 'events': events}, status=200)
 
 
+@query_budget(2)
 @login_required
 @require_http_methods(["GET"])
 def calendar_page(request):
@@ -288,6 +541,7 @@ def calendar_page(request):
     return render(request, 'maintenance/calendar.html')
 
 
+@query_budget(9)
 @login_required
 @require_http_methods(["GET", "POST"])
 def create_maintenance_request(request):
@@ -300,7 +554,6 @@ def create_maintenance_request(request):
         subject = request.POST.get('subject')
         request_type = request.POST.get('request_type')
         equipment_id = request.POST.get('equipment')
-        assigned_technician_id = request.POST.get('assigned_technician')
         scheduled_date = request.POST.get('scheduled_date')
         due_date = request.POST.get('due_date')
         duration = request.POST.get('duration')
@@ -333,24 +586,30 @@ def create_maintenance_request(request):
                 'equipments': Equipment.objects.filter(is_scrapped=False)
             })
         
+        try:
+            scheduled_date = date.fromisoformat(scheduled_date) if scheduled_date else None
+            due_date = date.fromisoformat(due_date) if due_date else None
+            duration = float(duration) if duration else None
+        except ValueError:
+            return render(request, 'maintenance/create_request.html', {
+                'error': 'Dates must be YYYY-MM-DD and duration a number of hours',
+                'equipments': Equipment.objects.filter(is_scrapped=False)
+            })
+        
         # Create maintenance request
         maintenance_request = MaintenanceRequest(
             subject=subject,
             request_type=request_type or 'Corrective',
             equipment=equipment,
             created_by=request.user,
-            scheduled_date=scheduled_date or None,
-            due_date=due_date or None,
-            duration=float(duration) if duration else None,
+            scheduled_date=scheduled_date,
+            due_date=due_date,
+            duration=duration,
         )
         
-        # Assign technician if provided
-        if assigned_technician_id:
-            try:
-                technician = Equipment.objects.get(id=assigned_technician_id).default_technician
-                maintenance_request.assigned_technician = technician
-            except:
-                pass
+        # Auto-assign team and the least-loaded technician of that team
+        # (the equipment's default technician wins ties)
+        AssignmentEngine.auto_assign(maintenance_request)
         
         maintenance_request.save()
         
@@ -369,6 +628,7 @@ def create_maintenance_request(request):
 # ============================================================================
 # These endpoints enforce strict workflow rules and role-based permissions.
 
+@query_budget(7)
 @login_required
 @require_http_methods(["POST"])
 def assign_technician(request):
@@ -396,7 +656,9 @@ def assign_technician(request):
         }, status=400)
     
     try:
-        maintenance_request = MaintenanceRequest.objects.get(id=request_id)
+        maintenance_request = MaintenanceRequest.objects.select_related(
+            'equipment', 'assigned_team', 'assigned_technician'
+        ).get(id=request_id)
         technician = get_object_or_404(User, id=technician_id)
     except MaintenanceRequest.DoesNotExist:
         return JsonResponse({
@@ -431,6 +693,7 @@ def assign_technician(request):
         }, status=500)
 
 
+@query_budget(4)
 @login_required
 @require_http_methods(["POST"])
 def start_work(request):
@@ -456,7 +719,9 @@ def start_work(request):
         }, status=400)
     
     try:
-        maintenance_request = MaintenanceRequest.objects.get(id=request_id)
+        maintenance_request = MaintenanceRequest.objects.select_related(
+            'equipment', 'assigned_team', 'assigned_technician'
+        ).get(id=request_id)
     except MaintenanceRequest.DoesNotExist:
         return JsonResponse({
             'success': False,
@@ -490,6 +755,7 @@ def start_work(request):
         }, status=500)
 
 
+@query_budget(5)
 @login_required
 @require_http_methods(["POST"])
 def complete_work(request):
@@ -517,7 +783,9 @@ def complete_work(request):
         }, status=400)
     
     try:
-        maintenance_request = MaintenanceRequest.objects.get(id=request_id)
+        maintenance_request = MaintenanceRequest.objects.select_related(
+            'equipment', 'assigned_team', 'assigned_technician'
+        ).get(id=request_id)
     except MaintenanceRequest.DoesNotExist:
         return JsonResponse({
             'success': False,
@@ -552,6 +820,7 @@ def complete_work(request):
         }, status=500)
 
 
+@query_budget(5)
 @login_required
 @require_http_methods(["POST"])
 def scrap_request(request):
@@ -577,7 +846,9 @@ def scrap_request(request):
         }, status=400)
     
     try:
-        maintenance_request = MaintenanceRequest.objects.get(id=request_id)
+        maintenance_request = MaintenanceRequest.objects.select_related(
+            'equipment', 'assigned_team', 'assigned_technician'
+        ).get(id=request_id)
     except MaintenanceRequest.DoesNotExist:
         return JsonResponse({
             'success': False,
@@ -611,6 +882,59 @@ def scrap_request(request):
         }, status=500)
 
 
+@query_budget(7)
+@login_required
+@require_http_methods(["POST"])
+def scrap_equipment(request):
+    """
+    API: Decommission one or more assets at once.
+    
+    POST Parameters:
+    - equipment_ids: one or more equipment IDs (repeat the parameter)
+    - include_descendants: '1' to also scrap every asset below them
+    
+    Returns: JSON with scrapped equipment and cascaded request IDs
+    
+    Rules:
+    - Only managers can scrap equipment
+    - Open (New / In Progress) requests on the equipment move to Scrap
+    """
+    try:
+        equipment_ids = [int(i) for i in request.POST.getlist('equipment_ids')]
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'error': 'equipment_ids must be integers'
+        }, status=400)
+    
+    include_descendants = request.POST.get('include_descendants') in ('1', 'true', 'on')
+    
+    try:
+        result = ScrapCascade.scrap_equipment(
+            equipment_ids, request.user, include_descendants=include_descendants
+        )
+        return JsonResponse(result, status=200)
+    except WorkflowPermissionError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'error_type': 'permission'
+        }, status=403)
+    except MissingDataError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'error_type': 'validation'
+        }, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'error_type': 'unknown'
+        }, status=500)
+
+
+@query_budget(4)
 @login_required
 @require_http_methods(["GET"])
 def get_request_actions(request):
@@ -633,7 +957,9 @@ def get_request_actions(request):
         }, status=400)
     
     try:
-        maintenance_request = MaintenanceRequest.objects.get(id=request_id)
+        maintenance_request = MaintenanceRequest.objects.select_related(
+            'equipment', 'assigned_team', 'assigned_technician'
+        ).get(id=request_id)
     except MaintenanceRequest.DoesNotExist:
         return JsonResponse({
             'success': False,
@@ -651,6 +977,7 @@ def get_request_actions(request):
     }, status=200)
 
 
+@query_budget(6)
 @login_required
 @require_http_methods(["GET"])
 def request_detail(request, request_id):
@@ -664,7 +991,11 @@ def request_detail(request, request_id):
     - Form to execute allowed actions
     """
     try:
-        maintenance_request = MaintenanceRequest.objects.get(id=request_id)
+        # Everything the template and workflow helpers touch, in one query
+        maintenance_request = MaintenanceRequest.objects.with_overdue().select_related(
+            'equipment__department', 'equipment__location',
+            'assigned_team', 'assigned_technician', 'created_by',
+        ).get(id=request_id)
     except MaintenanceRequest.DoesNotExist:
         return render(request, 'maintenance/request_not_found.html', {
             'error': 'Request not found'
@@ -680,18 +1011,76 @@ def request_detail(request, request_id):
         'state': state,
         'user_role': user_role,
         'available_technicians': (
-            maintenance_request.assigned_team.members.all()
-            if maintenance_request.assigned_team else []
+            User.objects.filter(
+                id__in=team_index.members(maintenance_request.assigned_team_id)
+            ).order_by('first_name', 'last_name')
+            if maintenance_request.assigned_team_id else []
         )
     }
     
     return render(request, 'maintenance/request_detail.html', context)
 
 
+@query_budget(7)
+@login_required
+@require_http_methods(["GET"])
+def workload_data(request):
+    """
+    API: Team x technician workload matrix for dispatchers.
+    
+    Returns open, new, in-progress and overdue counts plus summed estimated
+    duration (hours) per team and per technician. Idle team members are
+    listed with zero counts. Cached briefly, dropped on every transition.
+    Manager access only.
+    """
+    if not PermissionChecker.is_manager(request.user):
+        return JsonResponse({
+            'success': False,
+            'error': 'Workload data is available to managers only.',
+            'error_type': 'permission'
+        }, status=403)
+    
+    return JsonResponse({'success': True, **get_workload()}, status=200)
+
+
+@query_budget(3)
+@login_required
+@require_http_methods(["GET"])
+def work_queue_data(request):
+    """
+    API: The current technician's open requests, ordered by due date.
+    
+    Query Parameters (optional):
+    - cursor: next_cursor from the previous page
+    - limit: page size (default 25, max 100)
+    - since: sync_token from a previous response; returns only the delta
+    
+    Returns:
+    - page:  { success, results: [cards], next_cursor, sync_token }
+    - delta: { success, changed: [cards], ids: [queue order], sync_token }
+      (changed may repeat cards already sent; replace them by id)
+    """
+    try:
+        if request.GET.get('since'):
+            data = work_queue.queue_delta(request.user, request.GET['since'])
+        else:
+            data = work_queue.queue_page(
+                request.user,
+                cursor=request.GET.get('cursor'),
+                limit=request.GET.get('limit', work_queue.PAGE_SIZE),
+            )
+    except ValueError as e:
+        # InvalidCursor or a non-numeric limit
+        return JsonResponse({'success': False, 'error': str(e), 'error_type': 'validation'}, status=400)
+
+    return JsonResponse({'success': True, **data}, status=200)
+
+
 # ============================================================================
 # PHASE 9: REPORTS & ANALYTICS
 # ============================================================================
 
+@query_budget(3)
 @login_required
 @require_http_methods(["GET"])
 def report_team_requests(request):
@@ -699,7 +1088,7 @@ def report_team_requests(request):
     Report: Requests per Maintenance Team
     
     Shows aggregated request count grouped by team.
-    Optional filters: date range, status.
+    Optional filters: date range, status, asset subtree, overdue.
     Manager access only.
     """
     from django.db.models import Count
@@ -712,6 +1101,8 @@ def report_team_requests(request):
     
     # Get filter parameters
     status_filter = request.GET.get('status')
+    asset_filter = request.GET.get('asset')
+    overdue_filter = request.GET.get('overdue') in ('1', 'true', 'on')
     date_from = request.GET.get('date_from')
     date_to = request.GET.get('date_to')
     
@@ -720,6 +1111,13 @@ def report_team_requests(request):
         equipment__is_scrapped=False
     )
     
+    # Apply asset subtree filter (e.g. everything under a production line)
+    qs = filter_requests_by_subtree(qs, asset_filter)
+    
+    # Only overdue requests (index range scan on status, due_date)
+    if overdue_filter:
+        qs = qs.overdue()
+    
     # Apply status filter
     if status_filter and status_filter != '':
         qs = qs.filter(status=status_filter)
@@ -770,6 +1168,8 @@ def report_team_requests(request):
         'teams': teams,
         'total': total,
         'status_filter': status_filter,
+        'asset_filter': asset_filter,
+        'overdue_filter': overdue_filter,
         'date_from': date_from,
         'date_to': date_to,
         'statuses': [s[0] for s in MaintenanceRequest.STATUS_CHOICES],
@@ -778,6 +1178,7 @@ def report_team_requests(request):
     return render(request, 'maintenance/report_team_requests.html', context)
 
 
+@query_budget(4)
 @login_required
 @require_http_methods(["GET"])
 def report_equipment_requests(request):
@@ -786,7 +1187,7 @@ def report_equipment_requests(request):
     
     Shows aggregated request count grouped by equipment.
     Highlights high-maintenance assets.
-    Optional filters: department, status, date range.
+    Optional filters: department, status, date range, asset subtree, overdue.
     Manager access only.
     """
     from django.db.models import Count
@@ -800,6 +1201,8 @@ def report_equipment_requests(request):
     # Get filter parameters
     department_filter = request.GET.get('department')
     status_filter = request.GET.get('status')
+    asset_filter = request.GET.get('asset')
+    overdue_filter = request.GET.get('overdue') in ('1', 'true', 'on')
     date_from = request.GET.get('date_from')
     date_to = request.GET.get('date_to')
     
@@ -808,9 +1211,20 @@ def report_equipment_requests(request):
         equipment__is_scrapped=False
     )
     
-    # Apply department filter
-    if department_filter and department_filter != '':
-        qs = qs.filter(equipment__department=department_filter)
+    # Apply department filter (by Department id)
+    try:
+        department_filter = int(department_filter) if department_filter else None
+    except ValueError:
+        department_filter = None
+    if department_filter:
+        qs = qs.filter(equipment__department_id=department_filter)
+    
+    # Apply asset subtree filter (e.g. everything under a production line)
+    qs = filter_requests_by_subtree(qs, asset_filter)
+    
+    # Only overdue requests (index range scan on status, due_date)
+    if overdue_filter:
+        qs = qs.overdue()
     
     # Apply status filter
     if status_filter and status_filter != '':
@@ -849,10 +1263,8 @@ def report_equipment_requests(request):
         })
         total += item['count']
     
-    # Get unique departments for filter dropdown
-    departments = Equipment.objects.filter(
-        is_scrapped=False
-    ).values_list('department', flat=True).distinct().order_by('department')
+    # Departments for filter dropdown (cached dimension table)
+    departments = Department.cached_choices()
     
     # Handle request type (JSON or HTML)
     if request.GET.get('format') == 'json':
@@ -867,15 +1279,18 @@ def report_equipment_requests(request):
         'total': total,
         'department_filter': department_filter,
         'status_filter': status_filter,
+        'asset_filter': asset_filter,
+        'overdue_filter': overdue_filter,
         'date_from': date_from,
         'date_to': date_to,
-        'departments': list(departments),
+        'departments': departments,
         'statuses': [s[0] for s in MaintenanceRequest.STATUS_CHOICES],
     }
     
     return render(request, 'maintenance/report_equipment_requests.html', context)
 
 
+@query_budget(4)
 @login_required
 @require_http_methods(["GET"])
 def report_department_requests(request):
@@ -883,6 +1298,7 @@ def report_department_requests(request):
     Report: Requests per Department
     
     Shows aggregated request count grouped by department.
+    Optional filters: status, date range, asset subtree, overdue.
     Manager access only.
     """
     from django.db.models import Count
@@ -895,6 +1311,8 @@ def report_department_requests(request):
     
     # Get filter parameters
     status_filter = request.GET.get('status')
+    asset_filter = request.GET.get('asset')
+    overdue_filter = request.GET.get('overdue') in ('1', 'true', 'on')
     date_from = request.GET.get('date_from')
     date_to = request.GET.get('date_to')
     
@@ -903,6 +1321,13 @@ def report_department_requests(request):
         equipment__is_scrapped=False
     )
     
+    # Apply asset subtree filter (e.g. everything under a production line)
+    qs = filter_requests_by_subtree(qs, asset_filter)
+    
+    # Only overdue requests (index range scan on status, due_date)
+    if overdue_filter:
+        qs = qs.overdue()
+    
     # Apply status filter
     if status_filter and status_filter != '':
         qs = qs.filter(status=status_filter)
@@ -924,19 +1349,21 @@ def report_department_requests(request):
         except:
             pass
     
-    # Aggregate by department
-    dept_data = qs.values('equipment__department').annotate(
+    # Aggregate by department id; labels come from the cached dimension table
+    dept_data = qs.values('equipment__department_id').annotate(
         count=Count('id')
     ).order_by('-count')
+    dept_names = Department.cached_names()
     
     # Format for JSON response
     departments = []
     total = 0
     for item in dept_data:
-        dept_name = item['equipment__department'] or 'Unknown'
+        dept_id = item['equipment__department_id']
         count = item['count']
         departments.append({
-            'name': dept_name,
+            'id': dept_id,
+            'name': dept_names.get(dept_id, 'Unknown'),
             'count': count
         })
         total += count
@@ -953,6 +1380,8 @@ def report_department_requests(request):
         'departments': departments,
         'total': total,
         'status_filter': status_filter,
+        'asset_filter': asset_filter,
+        'overdue_filter': overdue_filter,
         'date_from': date_from,
         'date_to': date_to,
         'statuses': [s[0] for s in MaintenanceRequest.STATUS_CHOICES],
@@ -0,0 +1,163 @@
+"""
+Per-technician work queue for tablets.
+
+A technician's queue is their open (New / In Progress) requests ordered by
+due date, undated work last. Every read is a range scan on the
+(assigned_technician, status, due_date) index:
+
+- queue_page() pages through the queue with an opaque keyset cursor
+  (due_date, id) instead of OFFSET, so deep pages cost the same as the
+  first one.
+- queue_delta() serves offline-friendly polling: given the sync token of
+  the previous poll it returns only cards updated since then plus the
+  ordered list of ids still in the queue, so the client can drop cards
+  that were completed or reassigned away without refetching everything.
+
+updated_at is stamped before a write commits, so a change stamped just
+before a token can become visible only after the read that issued it.
+Deltas therefore reach SYNC_OVERLAP back past the token; cards in the
+overlap are sent again and the client replaces them by id.
+"""
+
+import base64
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import MaintenanceRequest
+
+
+OPEN_STATUSES = MaintenanceRequest.OPEN_STATUSES
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+# Longer than any write transaction (busy timeout plus retries)
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+class InvalidCursor(ValueError):
+    """Raised for a malformed pagination cursor or sync token."""
+
+
+# ============================================================================
+# CURSORS
+# ============================================================================
+
+def encode_cursor(due_date, request_id):
+    raw = f"{due_date.isoformat() if due_date else ''}|{request_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (due_date or None, id) from an encoded cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        due, _, request_id = base64.urlsafe_b64decode(padded).decode().partition('|')
+        return (date.fromisoformat(due) if due else None), int(request_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def encode_sync_token(moment):
+    # Epoch microseconds: URL-safe without escaping
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_sync_token(token):
+    try:
+        return datetime.fromtimestamp(int(token) / 1_000_000, tz=dt_timezone.utc)
+    except (ValueError, OverflowError, OSError) as e:
+        raise InvalidCursor("Invalid sync token") from e
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+def _queue(technician):
+    return MaintenanceRequest.objects.filter(
+        assigned_technician=technician,
+        status__in=OPEN_STATUSES,
+    )
+
+
+CARD_FIELDS = ('id', 'subject', 'equipment__name', 'status', 'due_date', 'scheduled_date', 'updated_at')
+
+
+def _card(row):
+    """Compact card: only what a tablet list needs."""
+    return {
+        'id': row['id'],
+        'subject': row['subject'],
+        'equipment': row['equipment__name'],
+        'status': row['status'],
+        'due_date': row['due_date'].isoformat() if row['due_date'] else None,
+        'scheduled_date': row['scheduled_date'].isoformat() if row['scheduled_date'] else None,
+        'updated_at': row['updated_at'].isoformat() if row['updated_at'] else None,
+    }
+
+
+def queue_page(technician, cursor=None, limit=PAGE_SIZE):
+    """
+    Return one page of the technician's queue.
+
+    Returns: {
+        'results': [card, ...],
+        'next_cursor': str | None,
+        'sync_token': str   # pass to queue_delta() on the next poll
+    }
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    sync_token = encode_sync_token(timezone.now())
+
+    qs = _queue(technician)
+    if cursor:
+        due, last_id = decode_cursor(cursor)
+        if due is None:
+            qs = qs.filter(due_date__isnull=True, id__gt=last_id)
+        else:
+            qs = qs.filter(
+                Q(due_date__gt=due)
+                | Q(due_date=due, id__gt=last_id)
+                | Q(due_date__isnull=True)
+            )
+
+    rows = list(
+        qs.order_by(F('due_date').asc(nulls_last=True), 'id')
+        .values(*CARD_FIELDS)[:limit + 1]
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['due_date'], rows[-1]['id'])
+
+    return {
+        'results': [_card(row) for row in rows],
+        'next_cursor': next_cursor,
+        'sync_token': sync_token,
+    }
+
+
+def queue_delta(technician, since):
+    """
+    Return what changed in the technician's queue since a sync token.
+
+    Returns: {
+        'changed': [card, ...],   # open cards updated since the token (minus SYNC_OVERLAP)
+        'ids': [int, ...],        # every id still in the queue, in queue order
+        'sync_token': str
+    }
+    Cards missing from `ids` have left the queue (completed, scrapped or
+    reassigned) and should be dropped by the client.
+    """
+    moment = decode_sync_token(since)
+    sync_token = encode_sync_token(timezone.now())
+
+    qs = _queue(technician).order_by(F('due_date').asc(nulls_last=True), 'id')
+    changed = qs.filter(updated_at__gte=moment - SYNC_OVERLAP).values(*CARD_FIELDS)
+
+    return {
+        'changed': [_card(row) for row in changed],
+        'ids': list(qs.values_list('id', flat=True)),
+        'sync_token': sync_token,
+    }
@@ -9,14 +9,25 @@ Architecture:
 - WorkflowException: Custom exception for workflow violations
 - WorkflowEngine: Centralized state machine and transition logic
 - PermissionChecker: Role-based access control (User, Technician, Manager)
+- BulkWorkflow: Applies one transition to many requests (admin actions)
+- ScrapCascade: Bulk decommissioning of equipment and its open requests
 - Helper functions: Simplified API for common transitions
 """
 
+import functools
+
 from django.core.exceptions import ValidationError, PermissionDenied
+from django.db import transaction
 from django.utils import timezone
 from datetime import date
 from .models import MaintenanceRequest
+from .signals import requests_bulk_updated, scrap_cascade_completed
+from . import tasks
+from equipment.models import Equipment, EquipmentClosure
 from teams.models import MaintenanceTeam
+from teams.membership import team_index
+from gearguard import metrics
+from gearguard.db import retry_on_busy
 
 
 # ============================================================================
@@ -43,6 +54,59 @@ class MissingDataError(WorkflowException):
     pass
 
 
+# ============================================================================
+# METRICS
+# ============================================================================
+
+_OUTCOMES = (
+    (InvalidTransitionError, 'invalid_transition'),
+    (PermissionError, 'permission_denied'),
+    (MissingDataError, 'missing_data'),
+    (ValidationError, 'invalid'),
+)
+
+
+def _observed(action, to_status=None):
+    """
+    Count every call of a WorkflowEngine action in
+    gearguard_workflow_transitions_total by from/to status and outcome.
+    Actions that do not change the status (assignments) report
+    to_status = from_status. Refusals also count as permission denials.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(request_obj, *args, **kwargs):
+            from_status = request_obj.status
+            outcome = 'error'
+            try:
+                result = func(request_obj, *args, **kwargs)
+                outcome = 'success'
+                return result
+            except Exception as e:
+                outcome = next((name for cls, name in _OUTCOMES if isinstance(e, cls)), 'error')
+                if outcome == 'permission_denied':
+                    metrics.inc('gearguard_permission_denials_total', action=action)
+                raise
+            finally:
+                metrics.inc(
+                    'gearguard_workflow_transitions_total',
+                    action=action, from_status=from_status,
+                    to_status=to_status or from_status, outcome=outcome,
+                )
+        return wrapper
+    return decorator
+
+
+# ============================================================================
+# PERSISTENCE
+# ============================================================================
+
+@retry_on_busy
+def _save(request_obj):
+    """Persist a transition; retried when SQLite is busy (see gearguard.db)."""
+    request_obj.save()
+
+
 # ============================================================================
 # ROLE DEFINITION & PERMISSION SYSTEM
 # ============================================================================
@@ -80,7 +144,7 @@ class PermissionChecker:
             return UserRole.MANAGER
         
         # Check if user belongs to any maintenance team
-        if user.maintenance_teams.exists():
+        if team_index.has_any_team(user.id):
             return UserRole.TECHNICIAN
         
         return UserRole.USER
@@ -98,8 +162,8 @@ class PermissionChecker:
     
     @staticmethod
     def belongs_to_team(user, team):
-        """Check if user is a member of a maintenance team."""
-        return team.members.filter(id=user.id).exists()
+        """Check if user is a member of a maintenance team (in-memory index)."""
+        return team_index.is_member(user.id, team.id)
     
     @staticmethod
     def can_assign_technician(user, request_obj):
@@ -212,7 +276,8 @@ class WorkflowEngine:
             )
     
     @staticmethod
-    def assign_technician(request_obj, technician, user):
+    @_observed('assign_technician')
+    def assign_technician(request_obj, technician, user, save=True):
         """
         Assign a technician to a maintenance request.
         
@@ -220,6 +285,7 @@ class WorkflowEngine:
             request_obj: MaintenanceRequest instance
             technician: User instance to assign
             user: User performing the action (for permission check)
+            save: Persist the change (False lets bulk callers batch the writes)
         
         Raises:
             PermissionError: If user lacks permission
@@ -256,7 +322,8 @@ class WorkflowEngine:
         
         # Assign
         request_obj.assigned_technician = technician
-        request_obj.save()
+        if save:
+            _save(request_obj)
         
         return {
             'success': True,
@@ -265,13 +332,61 @@ class WorkflowEngine:
         }
     
     @staticmethod
-    def start_work(request_obj, user):
+    @_observed('assign_team')
+    def assign_team(request_obj, team, user, save=True):
+        """
+        Assign (or re-assign) the maintenance team of an open request.
+        
+        Args:
+            request_obj: MaintenanceRequest instance
+            team: MaintenanceTeam instance
+            user: User performing the action (must be manager)
+            save: Persist the change (False lets bulk callers batch the writes)
+        
+        Raises:
+            PermissionError: If user is not a manager
+            MissingDataError: If equipment is scrapped
+            InvalidTransitionError: If the request is already closed
+        
+        The assigned technician is cleared if they are not a member of the
+        new team.
+        """
+        if not PermissionChecker.is_manager(user):
+            raise PermissionError("Only managers can assign maintenance teams.")
+        
+        if request_obj.equipment.is_scrapped:
+            raise MissingDataError(
+                f"Cannot assign team: equipment '{request_obj.equipment.name}' is marked as scrapped."
+            )
+        
+        if request_obj.status not in ('New', 'In Progress'):
+            raise InvalidTransitionError(
+                f"Cannot assign a team to a request in '{request_obj.status}' status."
+            )
+        
+        request_obj.assigned_team = team
+        if (request_obj.assigned_technician_id
+                and not team_index.is_member(request_obj.assigned_technician_id, team.id)):
+            request_obj.assigned_technician = None
+        if save:
+            _save(request_obj)
+        
+        return {
+            'success': True,
+            'message': f"Assigned team {team.name} to request #{request_obj.id}",
+            'team': team.name
+        }
+    
+    @staticmethod
+    @_observed('start_work', 'In Progress')
+    def start_work(request_obj, user, save=True):
         """
         Transition request from 'New' to 'In Progress'.
         
         Args:
             request_obj: MaintenanceRequest instance
             user: User performing the action (must be assigned technician or manager)
+            save: Persist the change (False lets bulk callers batch the writes)
         
         Raises:
             PermissionError: If user is not assigned technician or manager
@@ -297,7 +412,8 @@ class WorkflowEngine:
         
         # Transition
         request_obj.status = 'In Progress'
-        request_obj.save()
+        if save:
+            _save(request_obj)
         
         return {
             'success': True,
@@ -306,7 +422,8 @@ class WorkflowEngine:
         }
     
     @staticmethod
-    def complete_work(request_obj, duration_hours, user):
+    @_observed('complete_work', 'Repaired')
+    def complete_work(request_obj, duration_hours, user, save=True):
         """
         Transition request from 'In Progress' to 'Repaired'.
         
@@ -314,6 +431,7 @@ class WorkflowEngine:
             request_obj: MaintenanceRequest instance
             duration_hours: Float, hours spent on this work (required)
             user: User performing the action (must be assigned technician or manager)
+            save: Persist the change (False lets bulk callers batch the writes)
         
         Raises:
             PermissionError: If user is not assigned technician or manager
@@ -350,7 +468,8 @@ class WorkflowEngine:
         # Transition
         request_obj.status = 'Repaired'
         request_obj.duration = duration_float
-        request_obj.save()
+        if save:
+            _save(request_obj)
         
         return {
             'success': True,
@@ -360,13 +479,15 @@ class WorkflowEngine:
         }
     
     @staticmethod
-    def scrap_request(request_obj, user):
+    @_observed('scrap_request', 'Scrap')
+    def scrap_request(request_obj, user, save=True):
         """
         Transition request to 'Scrap' status (terminal state).
         
         Args:
             request_obj: MaintenanceRequest instance
             user: User performing the action (must be manager)
+            save: Persist the change (False lets bulk callers batch the writes)
         
         Raises:
             PermissionError: If user is not a manager
@@ -384,7 +505,8 @@ class WorkflowEngine:
         
         # Transition
         request_obj.status = 'Scrap'
-        request_obj.save()
+        if save:
+            _save(request_obj)
         
         return {
             'success': True,
@@ -434,6 +556,240 @@ class WorkflowEngine:
         }
 
 
+# ============================================================================
+# BULK WORKFLOW (admin actions)
+# ============================================================================
+
+class BulkWorkflow:
+    """
+    Applies one WorkflowEngine transition to many requests.
+    
+    Every row is validated by the same WorkflowEngine method used by the
+    APIs (called with save=False). Rows that pass are written with one
+    bulk_update per chunk. Signals are not sent per row, so the follow-up
+    work (technician load rebuild, cache invalidation) is triggered once
+    via the requests_bulk_updated signal after commit.
+    
+    'scrap' then runs ScrapCascade on the equipment of the scrapped rows,
+    like a Scrap move on the Kanban board: the equipment is decommissioned
+    and its other open requests are scrapped too.
+    
+    Actions and parameters:
+    - assign_team:       team
+    - assign_technician: technician
+    - start:             (none)
+    - complete:          duration
+    - scrap:             (none)
+    """
+    
+    CHUNK_SIZE = 500
+    
+    ACTIONS = {
+        'assign_team': (
+            lambda obj, user, p: WorkflowEngine.assign_team(obj, p['team'], user, save=False),
+            ['assigned_team', 'assigned_technician'],
+        ),
+        'assign_technician': (
+            lambda obj, user, p: WorkflowEngine.assign_technician(obj, p['technician'], user, save=False),
+            ['assigned_technician'],
+        ),
+        'start': (
+            lambda obj, user, p: WorkflowEngine.start_work(obj, user, save=False),
+            ['status'],
+        ),
+        'complete': (
+            lambda obj, user, p: WorkflowEngine.complete_work(obj, p['duration'], user, save=False),
+            ['status', 'duration'],
+        ),
+        'scrap': (
+            lambda obj, user, p: WorkflowEngine.scrap_request(obj, user, save=False),
+            ['status'],
+        ),
+    }
+    
+    @staticmethod
+    def apply(queryset, action, user, **params):
+        """
+        Run an action over every request in queryset.
+        
+        Returns: {
+            'succeeded': [request ids],
+            'failed': {request id: error message},
+            'cascade': ScrapCascade.scrap_equipment() result ('scrap' only) or None,
+        }
+        """
+        if action not in BulkWorkflow.ACTIONS:
+            raise InvalidTransitionError(f"Unknown bulk action '{action}'")
+        transition, fields = BulkWorkflow.ACTIONS[action]
+        fields = fields + ['updated_at']
+        
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+        succeeded, failed = [], {}
+        technician_ids, equipment_ids = set(), set()
+        now = timezone.now()
+        
+        for i in range(0, len(ids), BulkWorkflow.CHUNK_SIZE):
+            chunk = ids[i:i + BulkWorkflow.CHUNK_SIZE]
+            with transaction.atomic():
+                objs = MaintenanceRequest.objects.select_related(
+                    'equipment', 'assigned_team', 'assigned_technician'
+                ).select_for_update().filter(pk__in=chunk)
+                changed = []
+                for obj in objs:
+                    previous_technician = obj.assigned_technician_id
+                    try:
+                        transition(obj, user, params)
+                    except (WorkflowException, ValidationError) as e:
+                        failed[obj.pk] = e.messages[0] if isinstance(e, ValidationError) else str(e)
+                        continue
+                    obj.updated_at = now
+                    changed.append(obj)
+                    technician_ids.update(
+                        pk for pk in (previous_technician, obj.assigned_technician_id) if pk
+                    )
+                    equipment_ids.add(obj.equipment_id)
+                if changed:
+                    MaintenanceRequest.objects.bulk_update(changed, fields)
+                    succeeded.extend(obj.pk for obj in changed)
+        
+        if succeeded:
+            tasks.defer(
+                requests_bulk_updated.send,
+                sender=BulkWorkflow,
+                request_ids=succeeded,
+                technician_ids=sorted(technician_ids),
+            )
+        
+        cascade = None
+        if action == 'scrap' and equipment_ids:
+            cascade = ScrapCascade.scrap_equipment(equipment_ids, user)
+        
+        return {'succeeded': succeeded, 'failed': failed, 'cascade': cascade}
+
+
+# ============================================================================
+# SCRAP CASCADE (bulk decommissioning)
+# ============================================================================
+
+class ScrapCascade:
+    """
+    Scraps equipment together with every open request on it.
+
+    The state change is done with set-based UPDATEs in a single transaction:
+    - Equipment -> is_scrapped = True
+    - New / In Progress requests on that equipment -> Scrap
+
+    Both source statuses are valid Scrap transitions in
+    WorkflowEngine.VALID_TRANSITIONS, so no per-row validation is needed.
+    Follow-up work (counters, caches, rollups) is deferred to a background
+    step via the scrap_cascade_completed signal.
+    """
+
+    OPEN_STATUSES = MaintenanceRequest.OPEN_STATUSES
+    CHUNK_SIZE = 500
+
+    @staticmethod
+    def _chunks(ids, size):
+        for i in range(0, len(ids), size):
+            yield ids[i:i + size]
+
+    @staticmethod
+    @retry_on_busy
+    def scrap_equipment(equipment_list, user, include_descendants=False):
+        """
+        Decommission one or more assets and bulk-scrap their open requests.
+
+        Args:
+            equipment_list: iterable of Equipment instances or ids
+            user: User performing the action (must be manager)
+            include_descendants: also scrap every asset below each one
+
+        Raises:
+            PermissionError: If user is not a manager
+            MissingDataError: If no equipment was given
+        """
+        if not PermissionChecker.is_manager(user):
+            metrics.inc('gearguard_permission_denials_total', action='scrap_equipment')
+            raise PermissionError(
+                "Only managers can scrap equipment. "
+                "Contact your manager if this equipment should be decommissioned."
+            )
+
+        equipment_ids = sorted({getattr(e, 'pk', e) for e in equipment_list})
+        if not equipment_ids:
+            raise MissingDataError("No equipment selected for scrapping.")
+
+        now = timezone.now()
+        chunk_size = ScrapCascade.CHUNK_SIZE
+
+        with transaction.atomic():
+            if include_descendants:
+                expanded = set(equipment_ids)
+                for chunk in ScrapCascade._chunks(equipment_ids, chunk_size):
+                    expanded.update(
+                        EquipmentClosure.objects.filter(
+                            ancestor_id__in=chunk
+                        ).values_list('descendant_id', flat=True)
+                    )
+                equipment_ids = sorted(expanded)
+
+            equipment_count = 0
+            request_ids = []
+            from_statuses = {}
+            for chunk in ScrapCascade._chunks(equipment_ids, chunk_size):
+                equipment_count += Equipment.objects.filter(
+                    id__in=chunk, is_scrapped=False
+                ).update(is_scrapped=True, updated_at=now)
+
+                open_requests = MaintenanceRequest.objects.filter(
+                    equipment_id__in=chunk,
+                    status__in=ScrapCascade.OPEN_STATUSES,
+                )
+                # order_by(): skip the default -created_at sort of the ids
+                rows = list(open_requests.order_by().values_list('id', 'status'))
+                chunk_request_ids = [pk for pk, _ in rows]
+                for _, status in rows:
+                    from_statuses[status] = from_statuses.get(status, 0) + 1
+                if chunk_request_ids:
+                    MaintenanceRequest.objects.filter(
+                        id__in=chunk_request_ids
+                    ).update(status='Scrap', updated_at=now)
+                    request_ids.extend(chunk_request_ids)
+
+            tasks.defer(
+                ScrapCascade.run_followups,
+                equipment_ids=equipment_ids,
+                request_ids=request_ids,
+            )
+
+        for status, count in from_statuses.items():
+            metrics.inc(
+                'gearguard_workflow_transitions_total', count,
+                action='scrap_equipment', from_status=status, to_status='Scrap', outcome='success',
+            )
+
+        return {
+            'success': True,
+            'message': (
+                f"Scrapped {equipment_count} equipment and "
+                f"{len(request_ids)} open request(s)"
+            ),
+            'equipment_ids': equipment_ids,
+            'request_ids': request_ids,
+            'equipment_scrapped': equipment_count,
+            'requests_scrapped': len(request_ids),
+        }
+
+    @staticmethod
+    def run_followups(equipment_ids, request_ids):
+        """Background step: notify receivers doing the expensive follow-up work."""
+        scrap_cascade_completed.send(
+            sender=ScrapCascade,
+            equipment_ids=equipment_ids,
+            request_ids=request_ids,
+        )
+
+
 # ============================================================================
 # HELPER FUNCTIONS (Simplified API)
 # ============================================================================
@@ -483,3 +839,10 @@ def get_workflow_state(request_obj):
         'is_overdue': request_obj.is_overdue,
         'valid_next_transitions': WorkflowEngine.VALID_TRANSITIONS.get(request_obj.status, []),
     }
+
+
+def scrap_equipment(equipment_list, user, include_descendants=False):
+    """Shortcut for ScrapCascade.scrap_equipment()."""
+    return ScrapCascade.scrap_equipment(
+        equipment_list, user, include_descendants=include_descendants
+    )
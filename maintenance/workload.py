@@ -0,0 +1,172 @@
+"""
+Team / technician workload matrix for dispatchers.
+
+The whole team x technician x status matrix comes from one
+conditional-aggregation query over open requests, grouped by
+(assigned_team, assigned_technician). The result is cached briefly and
+dropped whenever a request changes, a scrap cascade or bulk transition
+finishes, or team membership changes.
+"""
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+
+from gearguard import metrics
+from teams.membership import team_index
+from teams.models import MaintenanceTeam
+from .models import MaintenanceRequest, overdue_q
+from .signals import requests_bulk_updated, scrap_cascade_completed
+
+
+CACHE_KEY = 'maintenance:workload:matrix'
+CACHE_TIMEOUT = 30  # seconds
+
+OPEN_STATUSES = MaintenanceRequest.OPEN_STATUSES
+
+
+def _empty_cell():
+    return {
+        'new': 0,
+        'in_progress': 0,
+        'open': 0,
+        'overdue': 0,
+        'estimated_hours': 0.0,
+    }
+
+
+def _add(total, cell):
+    for key in total:
+        total[key] += cell[key]
+
+
+def _user_name(first_name, last_name, username):
+    return f"{first_name} {last_name}".strip() or username
+
+
+def compute_workload():
+    """
+    Build the workload matrix.
+
+    Returns: {
+        'generated_at': iso timestamp,
+        'teams': [{
+            'id': int | None, 'name': str,
+            'totals': cell,
+            'technicians': [{'id': int | None, 'name': str, **cell}, ...]
+        }, ...]
+    }
+    where cell = {new, in_progress, open, overdue, estimated_hours}.
+    Idle team members are listed with zero counts.
+    """
+    today = timezone.localdate()
+    rows = MaintenanceRequest.objects.filter(
+        status__in=OPEN_STATUSES
+    ).values(
+        'assigned_team_id', 'assigned_technician_id'
+    ).annotate(
+        new=Count('id', filter=Q(status='New')),
+        in_progress=Count('id', filter=Q(status='In Progress')),
+        open=Count('id'),
+        overdue=Count('id', filter=overdue_q(today)),
+        estimated_hours=Sum('duration'),
+    ).order_by()
+
+    cells = {}
+    for row in rows:
+        cell = _empty_cell()
+        for key in ('new', 'in_progress', 'open', 'overdue'):
+            cell[key] = row[key]
+        cell['estimated_hours'] = float(row['estimated_hours'] or 0)
+        cells[(row['assigned_team_id'], row['assigned_technician_id'])] = cell
+
+    team_names = dict(MaintenanceTeam.objects.values_list('id', 'name'))
+    user_ids = {tech_id for _, tech_id in cells if tech_id}
+    for team_id in team_names:
+        user_ids.update(team_index.members(team_id))
+    user_names = {
+        pk: _user_name(first, last, username)
+        for pk, first, last, username in User.objects.filter(
+            id__in=user_ids
+        ).values_list('id', 'first_name', 'last_name', 'username')
+    }
+
+    teams = []
+    team_ids = sorted(team_names, key=lambda pk: team_names[pk].lower())
+    if any(team_id is None for team_id, _ in cells):
+        team_ids.append(None)
+
+    for team_id in team_ids:
+        tech_ids = {tech for team, tech in cells if team == team_id}
+        if team_id is not None:
+            tech_ids.update(team_index.members(team_id))
+
+        totals = _empty_cell()
+        technicians = []
+        for tech_id in sorted(tech_ids, key=lambda pk: (pk is None, user_names.get(pk, ''))):
+            cell = cells.get((team_id, tech_id), _empty_cell())
+            _add(totals, cell)
+            technicians.append({
+                'id': tech_id,
+                'name': user_names.get(tech_id, 'Unassigned') if tech_id else 'Unassigned',
+                **cell,
+            })
+
+        teams.append({
+            'id': team_id,
+            'name': team_names.get(team_id, 'Unassigned'),
+            'totals': totals,
+            'technicians': technicians,
+        })
+
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'teams': teams,
+    }
+
+
+def get_workload():
+    """Return the cached workload matrix, computing it on a miss."""
+    data = cache.get(CACHE_KEY)
+    metrics.cache_result('workload', hit=data is not None)
+    if data is None:
+        data = compute_workload()
+        cache.set(CACHE_KEY, data, CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_workload(**kwargs):
+    cache.delete(CACHE_KEY)
+
+
+def _on_members_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_workload()
+
+
+def connect_signals():
+    post_save.connect(
+        invalidate_workload,
+        sender=MaintenanceRequest,
+        dispatch_uid='maintenance.workload.request_saved',
+    )
+    post_delete.connect(
+        invalidate_workload,
+        sender=MaintenanceRequest,
+        dispatch_uid='maintenance.workload.request_deleted',
+    )
+    scrap_cascade_completed.connect(
+        invalidate_workload,
+        dispatch_uid='maintenance.workload.scrap_cascade',
+    )
+    requests_bulk_updated.connect(
+        invalidate_workload,
+        dispatch_uid='maintenance.workload.bulk_updated',
+    )
+    m2m_changed.connect(
+        _on_members_changed,
+        sender=MaintenanceTeam.members.through,
+        dispatch_uid='maintenance.workload.members_changed',
+    )
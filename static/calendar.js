@@ -8,12 +8,68 @@
 
   let viewDate = new Date(); // month view
 
+  // Month cache: bounded LRU of { etag, events } keyed by 'YYYY-M'.
+  // Cached months render immediately and are revalidated with If-None-Match.
+  const CACHE_SIZE = 12;
+  const monthCache = new Map();
+  const inflight = new Map();
+
+  function monthKey(year, month){ return `${year}-${month}`; }
+
+  function cacheGet(key){
+    const entry = monthCache.get(key);
+    if(entry){ monthCache.delete(key); monthCache.set(key, entry); } // mark most recent
+    return entry;
+  }
+
+  function cachePut(key, entry){
+    monthCache.delete(key);
+    monthCache.set(key, entry);
+    while(monthCache.size > CACHE_SIZE) monthCache.delete(monthCache.keys().next().value);
+  }
+
   function showAlert(msg){ ALERT.textContent = msg; ALERT.classList.add('show'); setTimeout(()=>{ ALERT.classList.remove('show'); ALERT.textContent=''; },4000); }
 
+  // Fetch (or revalidate) a month; resolves to { events, changed }
   function fetchEvents(year, month){
-    return fetch(`/maintenance/api/calendar-data/?year=${year}&month=${month}`)
-      .then(r=>r.json())
-      .then(j=>{ if(!j.success) throw new Error(j.error||'Failed'); return j.events; });
+    const key = monthKey(year, month);
+    if(inflight.has(key)) return inflight.get(key);
+
+    const cached = monthCache.get(key);
+    const headers = cached && cached.etag ? { 'If-None-Match': cached.etag } : {};
+    const req = fetch(`/maintenance/api/calendar-data/?year=${year}&month=${month}`, { headers, cache: 'no-store' })
+      .then(r=>{
+        if(r.status === 304 && cached) return { events: cached.events, changed: false };
+        return r.json().then(j=>{
+          if(!j.success) throw new Error(j.error||'Failed');
+          cachePut(key, { etag: r.headers.get('ETag'), events: j.events });
+          return { events: j.events, changed: true };
+        });
+      })
+      .finally(()=>{ inflight.delete(key); });
+    inflight.set(key, req);
+    return req;
+  }
+
+  function whenIdle(fn){
+    if(window.requestIdleCallback) requestIdleCallback(fn, { timeout: 2000 });
+    else setTimeout(fn, 200);
+  }
+
+  function prefetchAdjacent(year, month){
+    whenIdle(()=>{
+      [-1, 1].forEach(offset=>{
+        const d = new Date(year, month-1+offset, 1);
+        const y = d.getFullYear(), m = d.getMonth()+1;
+        if(!monthCache.has(monthKey(y, m))) fetchEvents(y, m).catch(err=>console.error(err));
+      });
+    });
+  }
+
+  function eventsByDate(events){
+    const map = {};
+    events.forEach(e=>{ map[e.date] = map[e.date]||[]; map[e.date].push(e); });
+    return map;
   }
 
   function start(){ render(); }
@@ -22,14 +78,24 @@
     const year = viewDate.getFullYear();
     const month = viewDate.getMonth()+1; // 1-12
     MONTH_LABEL.textContent = viewDate.toLocaleString(undefined,{month:'long', year:'numeric'});
-    ROOT.innerHTML = '';
-
-    fetchEvents(year, month).then(events=>{
-      const map = {};
-      events.forEach(e=>{ map[e.date] = map[e.date]||[]; map[e.date].push(e); });
+    const key = monthKey(year, month);
+    const isCurrent = ()=> viewDate.getFullYear()===year && viewDate.getMonth()+1===month;
 
-      buildCalendarGrid(year, month, map);
-    }).catch(err=>{ console.error(err); showAlert('Failed to load calendar'); buildCalendarGrid(year, month, {}); });
+    ROOT.innerHTML = '';
+    const cached = cacheGet(key);
+    if(cached) buildCalendarGrid(year, month, eventsByDate(cached.events));
+
+    fetchEvents(year, month).then(result=>{
+      // Redraw only if the data changed and the user is still on this month
+      if(!isCurrent() || (cached && !result.changed)) return;
+      ROOT.innerHTML = '';
+      buildCalendarGrid(year, month, eventsByDate(result.events));
+    }).catch(err=>{
+      console.error(err);
+      if(!isCurrent() || cached) return;
+      showAlert('Failed to load calendar');
+      buildCalendarGrid(year, month, {});
+    }).finally(()=>{ if(isCurrent()) prefetchAdjacent(year, month); });
   }
 
   function buildCalendarGrid(year, month, eventsMap){
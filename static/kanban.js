@@ -1,12 +1,17 @@
 // Kanban board client (Phase 6)
-// - Loads board via /maintenance/api/kanban-data/
+// - Draws the first page of each column from the server-rendered snapshot
+//   (#kanban-initial) and only calls /maintenance/api/kanban-data/ for updates
 // - Uses HTML5 Drag & Drop
-// - Calls /maintenance/api/kanban-move/ to persist moves
+// - Calls /maintenance/api/kanban-move/ to persist moves; moves are applied
+//   optimistically, rolled back on error and reconciled from the response
 
 (function(){
     const ROOT = document.getElementById('kanban-root');
     const ALERT = document.getElementById('kanban-alert');
+    const COLUMNS = ['New','In Progress','Repaired','Scrap'];
     let boardData = null;
+    let columnCounts = {};
+    let pageSize = 50;
     let userRole = 'user';
 
     // CSRF helper
@@ -31,13 +36,65 @@
         setTimeout(()=>{ ALERT.className = 'kanban-alert'; ALERT.textContent = ''; }, 5000);
     }
 
+    function applyBoard(data){
+        boardData = data.data;
+        columnCounts = data.counts || {};
+        userRole = data.user_role || 'user';
+        renderBoard(boardData);
+    }
+
+    function loadInitialBoard(){
+        const el = document.getElementById('kanban-initial');
+        if(!el) return false;
+        try{
+            const data = JSON.parse(el.textContent);
+            if(!data || !data.success) return false;
+            pageSize = data.page_size || pageSize;
+            applyBoard(data);
+            return true;
+        }catch(err){
+            console.error(err);
+            return false;
+        }
+    }
+
+    function loadedPerColumn(){
+        // Refresh as many cards as are currently shown so "load more" pages survive updates
+        let n = pageSize;
+        if(boardData){
+            COLUMNS.forEach(status => { n = Math.max(n, (boardData[status] || []).length); });
+        }
+        return n;
+    }
+
     async function fetchBoard(){
         try{
-            const res = await fetch('/maintenance/api/kanban-data/');
+            const res = await fetch('/maintenance/api/kanban-data/?per_column=' + loadedPerColumn());
             const data = await res.json();
             if(!data.success){ showAlert(data.error || 'Failed to load board','error'); return; }
-            boardData = data.data;
-            userRole = data.user_role || 'user';
+            applyBoard(data);
+        }catch(err){
+            console.error(err);
+            showAlert('Network error while loading board','error');
+        }
+    }
+
+    async function loadMore(status){
+        // Keyset cursor: the last loaded card, so cards moving in or out
+        // of the column above it never shift the next page
+        const loaded = boardData[status] || [];
+        const last = loaded[loaded.length - 1];
+        const params = new URLSearchParams({ status: status, per_column: pageSize });
+        if(last) params.set('after', last.created_at + '|' + last.id);
+        try{
+            const res = await fetch('/maintenance/api/kanban-data/?' + params.toString());
+            const data = await res.json();
+            if(!data.success){ showAlert(data.error || 'Failed to load cards','error'); return; }
+            // Skip cards that already arrived through a local move
+            const seen = new Set((boardData[status] || []).map(c => String(c.id)));
+            const page = (data.data[status] || []).filter(c => !seen.has(String(c.id)));
+            boardData[status] = (boardData[status] || []).concat(page);
+            columnCounts[status] = (data.counts || {})[status] ?? columnCounts[status];
             renderBoard(boardData);
         }catch(err){
             console.error(err);
@@ -45,14 +102,26 @@
         }
     }
 
-    function renderBoard(data){
+    // ------------------------------------------------------------------
+    // Virtualized rendering
+    //
+    // Each column is a fixed-height scroll viewport; only the cards inside
+    // the visible window (plus OVERSCAN rows) are mounted. Mounted cards are
+    // keyed by id so a refresh touches only cards whose data changed.
+    // ------------------------------------------------------------------
+
+    const ROW_HEIGHT = 96;   // px, must match .kg-viewport .kg-card height + gap
+    const OVERSCAN = 6;
+    const EDGE_SCROLL = 40;  // px from the viewport edge that scrolls while dragging
+    const views = {};
+    let renderedRole = null;
+
+    function buildBoard(){
         ROOT.innerHTML = '';
-        const columns = ['New','In Progress','Repaired','Scrap'];
-
         const board = document.createElement('div');
         board.className = 'kg-board';
 
-        columns.forEach(status => {
+        COLUMNS.forEach(status => {
             const col = document.createElement('div');
             col.className = 'kg-column';
             col.setAttribute('data-status', status);
@@ -61,32 +130,124 @@
 
             const header = document.createElement('div');
             header.className = 'kg-column-header';
-            header.innerHTML = `<h3>${status}</h3>`;
 
-            const list = document.createElement('div');
-            list.className = 'kg-column-list';
+            const viewport = document.createElement('div');
+            viewport.className = 'kg-column-list kg-viewport';
+            viewport.addEventListener('dragover', edgeScroll);
 
-            const cards = data[status] || [];
-            if(cards.length===0){
-                const empty = document.createElement('div');
-                empty.className = 'kg-empty';
-                empty.textContent = 'No requests';
-                list.appendChild(empty);
-            }
+            const spacer = document.createElement('div');
+            spacer.className = 'kg-spacer';
+            viewport.appendChild(spacer);
 
-            cards.forEach(card => {
-                const el = buildCard(card);
-                list.appendChild(el);
-            });
+            const empty = document.createElement('div');
+            empty.className = 'kg-empty';
+            empty.textContent = 'No requests';
+
+            const more = document.createElement('button');
+            more.type = 'button';
+            more.className = 'kg-load-more';
+            more.textContent = 'Load more';
+            more.addEventListener('click', () => loadMore(status));
 
             col.appendChild(header);
-            col.appendChild(list);
+            col.appendChild(empty);
+            col.appendChild(viewport);
+            col.appendChild(more);
             board.appendChild(col);
+
+            const view = { status, header, viewport, spacer, empty, more, cards: [], nodes: new Map(), frame: null };
+            viewport.addEventListener('scroll', () => scheduleWindow(view));
+            views[status] = view;
         });
 
         ROOT.appendChild(board);
     }
 
+    function renderBoard(data){
+        if(!ROOT.querySelector('.kg-board')) buildBoard();
+
+        // Draggability depends on the role, so a role change invalidates every node
+        if(renderedRole !== userRole){
+            COLUMNS.forEach(status => {
+                views[status].nodes.forEach(entry => entry.el.remove());
+                views[status].nodes.clear();
+            });
+            renderedRole = userRole;
+        }
+
+        COLUMNS.forEach(status => {
+            const view = views[status];
+            const cards = data[status] || [];
+            const total = columnCounts[status] ?? cards.length;
+            view.cards = cards;
+            view.header.innerHTML = `<h3>${status} <span class="kg-count">${cards.length < total ? cards.length + ' of ' + total : total}</span></h3>`;
+            view.empty.style.display = cards.length === 0 ? '' : 'none';
+            view.viewport.style.display = cards.length === 0 ? 'none' : '';
+            view.more.style.display = cards.length < total ? '' : 'none';
+            view.spacer.style.height = (cards.length * ROW_HEIGHT) + 'px';
+            renderWindow(view);
+        });
+    }
+
+    function scheduleWindow(view){
+        if(view.frame !== null) return;
+        view.frame = requestAnimationFrame(() => { view.frame = null; renderWindow(view); });
+    }
+
+    function renderWindow(view){
+        const cards = view.cards;
+        const height = view.viewport.clientHeight || (ROW_HEIGHT * 8);
+        const top = view.viewport.scrollTop;
+        const start = Math.max(0, Math.floor(top / ROW_HEIGHT) - OVERSCAN);
+        const end = Math.min(cards.length, Math.ceil((top + height) / ROW_HEIGHT) + OVERSCAN);
+
+        const visible = new Set();
+        for(let i = start; i < end; i++){
+            const card = cards[i];
+            const key = String(card.id);
+            const sig = cardSignature(card);
+            visible.add(key);
+
+            let entry = view.nodes.get(key);
+            if(!entry){
+                entry = { el: buildCard(card), sig, index: -1 };
+                view.spacer.appendChild(entry.el);
+                view.nodes.set(key, entry);
+            }else if(entry.sig !== sig){
+                const el = buildCard(card);
+                entry.el.replaceWith(el);
+                entry.el = el;
+                entry.sig = sig;
+            }
+            if(entry.index !== i){
+                entry.el.style.transform = `translateY(${i * ROW_HEIGHT}px)`;
+                entry.index = i;
+            }
+        }
+
+        view.nodes.forEach((entry, key) => {
+            // Keep the card being dragged mounted so the drag is not cancelled
+            if(!visible.has(key) && !entry.el.classList.contains('kg-dragging')){
+                entry.el.remove();
+                view.nodes.delete(key);
+            }
+        });
+    }
+
+    function cardSignature(card){
+        const tech = card.assigned_technician;
+        return [card.status, card.subject, card.equipment, tech ? tech.id + ':' + tech.name : '', card.scheduled_date, card.is_overdue].join('|');
+    }
+
+    function findCard(id){
+        for(const status of COLUMNS){
+            const cards = (boardData && boardData[status]) || [];
+            const index = cards.findIndex(c => String(c.id) === String(id));
+            if(index !== -1) return { card: cards[index], status, index };
+        }
+        return null;
+    }
+
     function buildCard(card){
         const el = document.createElement('div');
         el.className = 'kg-card';
@@ -96,6 +257,7 @@
 
         if(el.getAttribute('draggable')==='true'){
             el.addEventListener('dragstart', drag);
+            el.addEventListener('dragend', dragEnd);
         }
 
         const subject = document.createElement('div');
@@ -133,37 +295,117 @@
         ev.target.classList.add('kg-dragging');
     }
 
+    function dragEnd(ev){
+        ev.target.classList.remove('kg-dragging');
+    }
+
+    function edgeScroll(ev){
+        // Scroll the virtual list while dragging near its edges so off-screen
+        // positions stay reachable
+        const rect = ev.currentTarget.getBoundingClientRect();
+        if(ev.clientY - rect.top < EDGE_SCROLL) ev.currentTarget.scrollTop -= ROW_HEIGHT / 4;
+        else if(rect.bottom - ev.clientY < EDGE_SCROLL) ev.currentTarget.scrollTop += ROW_HEIGHT / 4;
+    }
+
+    // Server column order: created_at DESC, id DESC
+    function sortsBefore(a, b){
+        return a.created_at > b.created_at || (a.created_at === b.created_at && a.id > b.id);
+    }
+
+    // Call after columnCounts include the card
+    function insertCard(status, card){
+        const cards = boardData[status] = boardData[status] || [];
+        const at = cards.findIndex(c => sortsBefore(card, c));
+        if(at === -1){
+            // Past the last loaded card: leave it to "load more" while the
+            // column has unloaded cards, which may sort before it
+            if(cards.length + 1 < (columnCounts[status] ?? 0)) return;
+            cards.push(card);
+            return;
+        }
+        cards.splice(at, 0, card);
+    }
+
+    function removeCard(id){
+        const found = findCard(id);
+        if(found) boardData[found.status].splice(found.index, 1);
+        return found;
+    }
+
+    function adjustCounts(deltas, sign=1){
+        Object.keys(deltas).forEach(status => {
+            columnCounts[status] = Math.max(0, (columnCounts[status] ?? 0) + sign * deltas[status]);
+        });
+    }
+
+    // Apply a move locally and return a function that undoes it
+    function moveCardLocal(found, toStatus){
+        const original = Object.assign({}, found.card);
+        const deltas = { [found.status]: -1, [toStatus]: 1 };
+
+        boardData[found.status].splice(found.index, 1);
+        adjustCounts(deltas);
+        insertCard(toStatus, Object.assign({}, found.card, { status: toStatus }));
+        renderBoard(boardData);
+
+        return {
+            deltas,
+            rollback(){
+                removeCard(original.id);
+                boardData[found.status].splice(Math.min(found.index, boardData[found.status].length), 0, original);
+                adjustCounts(deltas, -1);
+                renderBoard(boardData);
+            },
+        };
+    }
+
+    // Replace the optimistic state with the server's view of the move
+    function applyMoveResult(move, data){
+        adjustCounts(move.deltas, -1);
+        adjustCounts(data.count_deltas || {});
+
+        const cards = (data.card ? [data.card] : []).concat(data.cascaded || []);
+        cards.forEach(card => {
+            const existing = removeCard(card.id);
+            // Cascaded cards that were never loaded stay unloaded; the
+            // count deltas already account for them
+            if(existing || card === data.card) insertCard(card.status, card);
+        });
+        renderBoard(boardData);
+    }
+
     async function drop(ev){
         ev.preventDefault();
         const cardId = ev.dataTransfer.getData('text/plain');
-        const cardEl = document.querySelector(`[data-id='${cardId}']`);
-        const fromStatus = cardEl.dataset.status;
+        // The source node may have been recycled by the virtual list, so
+        // resolve the card from board data rather than the DOM
+        const found = findCard(cardId);
+        if(!found) return;
+        const fromStatus = found.status;
         const toStatus = ev.currentTarget.getAttribute('data-status');
+        if(fromStatus === toStatus) return;
 
-        // Visual - optimistic move
-        const list = ev.currentTarget.querySelector('.kg-column-list');
-        list.appendChild(cardEl);
-
-        // If no permission, revert immediately
-        if(!canUserMoveTo(fromStatus, toStatus, cardEl)){
+        // If no permission, leave the card where it is
+        if(!canUserMoveTo(fromStatus, toStatus, found.card)){
             showAlert('You do not have permission to move this card','error');
-            fetchBoard();
             return;
         }
 
-        // If moving to Repaired, prompt for duration
+        // If moving to Repaired, prompt for duration before touching the board
         let duration = null;
         if(toStatus === 'Repaired'){
             duration = prompt('Enter hours spent (e.g. 2.5):');
             if(duration===null || duration.trim()===''){
                 showAlert('Duration required to complete work; action cancelled','error');
-                fetchBoard();
                 return;
             }
             duration = parseFloat(duration);
-            if(isNaN(duration) || duration <= 0){ showAlert('Invalid duration','error'); fetchBoard(); return; }
+            if(isNaN(duration) || duration <= 0){ showAlert('Invalid duration','error'); return; }
         }
 
+        // Visual - optimistic move
+        const move = moveCardLocal(found, toStatus);
+
         try{
             const res = await fetch('/maintenance/api/kanban-move/', {
                 method: 'POST',
@@ -176,19 +418,18 @@
 
             const data = await res.json();
             if(!data.success){
+                move.rollback();
                 showAlert(data.error || 'Move rejected by server','error');
-                fetchBoard();
                 return;
             }
 
+            applyMoveResult(move, data);
             showAlert(data.message || 'Card moved','success');
-            // Refresh a little to reflect authoritative state
-            setTimeout(fetchBoard, 300);
 
         }catch(err){
             console.error(err);
+            move.rollback();
             showAlert('Network error while saving move','error');
-            fetchBoard();
         }
     }
 
@@ -205,11 +446,10 @@
         return false;
     }
 
-    function canUserMoveTo(from, to, cardEl){
+    function canUserMoveTo(from, to, card){
         if(userRole === 'manager') return true;
         if(userRole === 'user') return false;
         if(userRole === 'technician'){
-            const assignedName = cardEl.querySelector('.kg-tech')?.textContent?.trim();
             // If moving New -> In Progress, technician must be assigned (and be them) — server enforces exact user check
             if(from === 'New' && to === 'In Progress') return true;
             if(from === 'In Progress' && to === 'Repaired') return true;
@@ -219,7 +459,18 @@
         return false;
     }
 
-    // Initial load
-    fetchBoard();
+    // Exposed for the in-browser benchmark page (kanban_benchmark.html)
+    window.GearGuardKanban = {
+        load(data){ pageSize = data.page_size || pageSize; applyBoard(data); },
+        board(){ return boardData; },
+        views,
+        renderWindow,
+    };
+
+    // Initial load: use the embedded snapshot, fall back to the API.
+    // The benchmark page sets data-autoload="false" and feeds synthetic data.
+    if(ROOT.dataset.autoload !== 'false' && !loadInitialBoard()){
+        fetchBoard();
+    }
 
 })();
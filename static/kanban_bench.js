@@ -0,0 +1,101 @@
+// Kanban render benchmark
+// - Generates a seeded synthetic board (default 10k cards) and feeds it to kanban.js
+// - Measures cold render, no-op refresh, 1% changed refresh and scroll windowing
+// - Query params: ?cards=10000&seed=1&runs=5
+
+(function(){
+    const OUT = document.getElementById('kanban-bench');
+    const KANBAN = window.GearGuardKanban;
+    const COLUMNS = ['New','In Progress','Repaired','Scrap'];
+    const params = new URLSearchParams(location.search);
+    const CARDS = parseInt(params.get('cards') || '10000', 10);
+    const SEED = parseInt(params.get('seed') || '1', 10);
+    const RUNS = parseInt(params.get('runs') || '5', 10);
+
+    // mulberry32: small deterministic PRNG so every run sees the same board
+    function prng(seed){
+        return function(){
+            seed |= 0; seed = seed + 0x6D2B79F5 | 0;
+            let t = Math.imul(seed ^ seed >>> 15, 1 | seed);
+            t = t + Math.imul(t ^ t >>> 7, 61 | t) ^ t;
+            return ((t ^ t >>> 14) >>> 0) / 4294967296;
+        };
+    }
+
+    function generate(count, seed){
+        const rand = prng(seed);
+        const data = {}; const counts = {};
+        COLUMNS.forEach(s => { data[s] = []; });
+        for(let i = 1; i <= count; i++){
+            const status = COLUMNS[Math.floor(rand() * COLUMNS.length)];
+            const tech = rand() < 0.8 ? { id: 1 + Math.floor(rand() * 40), name: 'Technician ' + (1 + Math.floor(rand() * 40)), avatar: 'T' } : null;
+            data[status].push({
+                id: i,
+                subject: 'Synthetic request #' + i,
+                equipment: 'Asset ' + (1 + Math.floor(rand() * 500)),
+                assigned_technician: tech,
+                scheduled_date: rand() < 0.5 ? new Date(Date.UTC(2025, Math.floor(rand() * 12), 1 + Math.floor(rand() * 28))).toISOString().slice(0, 10) : null,
+                is_overdue: rand() < 0.1,
+                status: status,
+            });
+        }
+        COLUMNS.forEach(s => { counts[s] = data[s].length; });
+        return { success: true, data, counts, user_role: 'manager', page_size: count };
+    }
+
+    function clone(snapshot){ return JSON.parse(JSON.stringify(snapshot)); }
+
+    // Time until the next frame after the work, so layout/paint is included
+    function timed(fn){
+        return new Promise(resolve => {
+            const t0 = performance.now();
+            fn();
+            requestAnimationFrame(() => setTimeout(() => resolve(performance.now() - t0), 0));
+        });
+    }
+
+    function summarize(samples){
+        const sorted = samples.slice().sort((a, b) => a - b);
+        const pick = q => sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))];
+        return { p50: pick(0.5), p95: pick(0.95), max: sorted[sorted.length - 1] };
+    }
+
+    async function run(){
+        const snapshot = generate(CARDS, SEED);
+        const results = {};
+        const record = (name, ms) => { (results[name] = results[name] || []).push(ms); };
+
+        for(let r = 0; r < RUNS; r++){
+            document.getElementById('kanban-root').innerHTML = '';
+            record('cold render', await timed(() => KANBAN.load(clone(snapshot))));
+            record('refresh (no changes)', await timed(() => KANBAN.load(clone(snapshot))));
+
+            const changed = clone(snapshot);
+            const rand = prng(SEED + r + 1);
+            for(let i = 0; i < CARDS / 100; i++){
+                const col = changed.data[COLUMNS[Math.floor(rand() * COLUMNS.length)]];
+                if(col.length) col[Math.floor(rand() * col.length)].subject += ' (edited)';
+            }
+            record('refresh (1% changed)', await timed(() => KANBAN.load(changed)));
+
+            for(const status of COLUMNS){
+                const view = KANBAN.views[status];
+                record('scroll window', await timed(() => {
+                    view.viewport.scrollTop = view.viewport.scrollHeight / 2;
+                    KANBAN.renderWindow(view);
+                }));
+            }
+        }
+
+        const mounted = document.querySelectorAll('#kanban-root .kg-card').length;
+        const rows = Object.keys(results).map(name => {
+            const s = summarize(results[name]);
+            return `<tr><th>${name}</th><td>${s.p50.toFixed(1)}</td><td>${s.p95.toFixed(1)}</td><td>${s.max.toFixed(1)}</td><td>${results[name].length}</td></tr>`;
+        }).join('');
+        OUT.innerHTML = `cards=${CARDS} seed=${SEED} runs=${RUNS} mounted card nodes=${mounted}
+            <table><tr><th>scenario</th><th>p50 ms</th><th>p95 ms</th><th>max ms</th><th>samples</th></tr>${rows}</table>`;
+        window.kanbanBenchResults = { cards: CARDS, seed: SEED, runs: RUNS, mounted, results };
+    }
+
+    run().catch(err => { console.error(err); OUT.textContent = 'Benchmark failed: ' + err; });
+})();
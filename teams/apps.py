@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class TeamsConfig(AppConfig):
     name = 'teams'
+
+    def ready(self):
+        from .membership import connect_signals
+        connect_signals()
@@ -0,0 +1,135 @@
+"""
+Process-local team -> member index.
+
+Membership checks (PermissionChecker.belongs_to_team, role lookups, the
+technician picker) used to hit the M2M table on every call. This index
+loads every (team, user) pair in one query and answers checks from
+in-memory sets.
+
+Invalidation is versioned: the version is a counter in the database
+(TeamMembershipVersion), bumped in the same transaction as every
+m2m_changed on MaintenanceTeam.members and every team/user deletion, so
+every worker process sees it once the change commits. Each process reads
+the counter at most every TEAM_MEMBERSHIP_CHECK_INTERVAL seconds and
+reloads when it differs from the version it loaded; the process that made
+the change reloads on its next lookup after commit.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete
+
+from gearguard import metrics
+
+from .models import MaintenanceTeam, TeamMembershipVersion
+
+
+class TeamMembershipIndex:
+    """In-memory team_id -> {user_id} and user_id -> {team_id} sets."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._members = {}
+        self._teams = {}
+
+    def _shared_version(self):
+        version = TeamMembershipVersion.objects.filter(pk=1).values_list('version', flat=True).first()
+        return version or 0
+
+    def _load(self):
+        """Rebuild both maps from the M2M table with a single query."""
+        members, teams = {}, {}
+        pairs = MaintenanceTeam.members.through.objects.values_list(
+            'maintenanceteam_id', 'user_id'
+        )
+        for team_id, user_id in pairs:
+            members.setdefault(team_id, set()).add(user_id)
+            teams.setdefault(user_id, set()).add(team_id)
+        self._members = {k: frozenset(v) for k, v in members.items()}
+        self._teams = {k: frozenset(v) for k, v in teams.items()}
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        interval = getattr(settings, 'TEAM_MEMBERSHIP_CHECK_INTERVAL', 2.0)
+        if self._version is not None and now - self._checked_at < interval:
+            metrics.cache_result('team_membership', hit=True)
+            return
+        version = self._shared_version()
+        self._checked_at = now
+        metrics.cache_result('team_membership', hit=version == self._version)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._load()
+                    self._version = version
+
+    def expire(self):
+        """Drop the local copy; the next lookup re-reads the version and reloads."""
+        self._version = None
+
+    def invalidate(self):
+        """Bump the shared version (inside the current transaction) for all processes."""
+        updated = TeamMembershipVersion.objects.filter(pk=1).update(version=F('version') + 1)
+        if not updated:
+            TeamMembershipVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+        self.expire()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def members(self, team_id):
+        """Return the frozenset of user ids in a team."""
+        self._ensure_fresh()
+        return self._members.get(team_id, frozenset())
+
+    def teams_for_user(self, user_id):
+        """Return the frozenset of team ids a user belongs to."""
+        self._ensure_fresh()
+        return self._teams.get(user_id, frozenset())
+
+    def is_member(self, user_id, team_id):
+        return user_id in self.members(team_id)
+
+    def has_any_team(self, user_id):
+        return bool(self.teams_for_user(user_id))
+
+
+team_index = TeamMembershipIndex()
+
+
+def _invalidate_index(**kwargs):
+    team_index.invalidate()
+    # Threads of this process may have reloaded before the commit made the
+    # change visible to them; drop the local copy again once it is.
+    transaction.on_commit(team_index.expire)
+
+
+def _on_members_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _invalidate_index()
+
+
+def connect_signals():
+    m2m_changed.connect(
+        _on_members_changed,
+        sender=MaintenanceTeam.members.through,
+        dispatch_uid='teams.membership.members_changed',
+    )
+    post_delete.connect(
+        _invalidate_index,
+        sender=MaintenanceTeam,
+        dispatch_uid='teams.membership.team_deleted',
+    )
+    post_delete.connect(
+        _invalidate_index,
+        sender=User,
+        dispatch_uid='teams.membership.user_deleted',
+    )
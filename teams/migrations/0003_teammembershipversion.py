@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-19 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0002_alter_maintenanceteam_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamMembershipVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Team Membership Version',
+                'verbose_name_plural': 'Team Membership Version',
+            },
+        ),
+    ]
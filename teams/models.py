@@ -32,9 +32,28 @@ class MaintenanceTeam(models.Model):
         ordering = ['name']
 
     def __str__(self):
-        return f"{self.name} ({self.members.count()} members)"
+        return f"{self.name} ({self.member_count} members)"
 
     @property
     def member_count(self):
-        """Total count of team members."""
-        return self.members.count()
+        """Total count of team members (served from the membership index)."""
+        from teams.membership import team_index
+        return len(team_index.members(self.pk))
+
+
+class TeamMembershipVersion(models.Model):
+    """
+    Single-row change counter for team membership.
+
+    Bumped in the same transaction as every membership change, so each
+    worker process can tell from one primary-key read whether its
+    in-memory membership index (teams.membership) is stale.
+    """
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Team Membership Version"
+        verbose_name_plural = "Team Membership Version"
+
+    def __str__(self):
+        return f"membership v{self.version}"
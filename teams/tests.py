@@ -1,3 +1,82 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from .membership import TeamMembershipIndex, team_index
+from .models import MaintenanceTeam, TeamMembershipVersion
+
+
+class TeamMembershipIndexTests(TestCase):
+    """
+    Membership changes bump the version in the database, so both this
+    process's index and any other process's (simulated by a second
+    TeamMembershipIndex) reload.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice')
+        cls.bob = User.objects.create_user('bob')
+        cls.team = MaintenanceTeam.objects.create(name='Electrical')
+        cls.team.members.add(cls.alice)
+
+    def setUp(self):
+        team_index.expire()
+        self.other = TeamMembershipIndex()
+
+    def assertMembers(self, index, members):
+        self.assertEqual(index.members(self.team.pk), {u.pk for u in members})
+
+    def test_add_and_remove_invalidate(self):
+        with override_settings(TEAM_MEMBERSHIP_CHECK_INTERVAL=0):
+            for index in (team_index, self.other):
+                self.assertMembers(index, [self.alice])
+
+            self.team.members.add(self.bob)
+            for index in (team_index, self.other):
+                self.assertMembers(index, [self.alice, self.bob])
+                self.assertEqual(index.teams_for_user(self.bob.pk), {self.team.pk})
+
+            self.team.members.remove(self.alice)
+            for index in (team_index, self.other):
+                self.assertMembers(index, [self.bob])
+                self.assertFalse(index.has_any_team(self.alice.pk))
+
+            self.bob.maintenance_teams.clear()
+            for index in (team_index, self.other):
+                self.assertMembers(index, [])
+
+    def test_deletions_invalidate(self):
+        with override_settings(TEAM_MEMBERSHIP_CHECK_INTERVAL=0):
+            self.assertTrue(self.other.is_member(self.alice.pk, self.team.pk))
+            self.alice.delete()
+            self.assertMembers(self.other, [])
+
+            self.team.members.add(self.bob)
+            self.assertTrue(self.other.has_any_team(self.bob.pk))
+            self.team.delete()
+            self.assertFalse(self.other.has_any_team(self.bob.pk))
+
+    def test_other_processes_recheck_after_the_interval(self):
+        with override_settings(TEAM_MEMBERSHIP_CHECK_INTERVAL=3600):
+            self.assertMembers(self.other, [self.alice])
+            self.team.members.add(self.bob)
+            # This process reloads at once; another one within its interval
+            self.assertMembers(team_index, [self.alice, self.bob])
+            self.assertMembers(self.other, [self.alice])
+        with override_settings(TEAM_MEMBERSHIP_CHECK_INTERVAL=0):
+            self.assertMembers(self.other, [self.alice, self.bob])
+
+    def test_version_is_bumped_in_the_database(self):
+        before = TeamMembershipVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+        self.team.members.add(self.bob)
+        self.team.members.remove(self.bob)
+        self.assertEqual(TeamMembershipVersion.objects.get(pk=1).version, before + 2)
+
+    def test_unchanged_version_is_checked_without_reloading(self):
+        with override_settings(TEAM_MEMBERSHIP_CHECK_INTERVAL=0):
+            self.other.members(self.team.pk)
+            with self.assertNumQueries(1):
+                self.assertMembers(self.other, [self.alice])
+        with override_settings(TEAM_MEMBERSHIP_CHECK_INTERVAL=3600):
+            with self.assertNumQueries(0):
+                self.assertMembers(self.other, [self.alice])